@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django import forms
+from django.db.models import QuerySet
 from django.http import HttpRequest
 from .models import (
     Course,
@@ -11,6 +12,10 @@ from .models import (
     CourseContent,
     Organization,
     BlockedEmail,
+    Enrollment,
+    OutboxMessage,
+    DeadLetterMessage,
+    QuizSubmission,
 )
 
 
@@ -82,6 +87,41 @@ class CourseContentAdmin(admin.ModelAdmin):
         return None
 
 
+class EnrollmentAdmin(admin.ModelAdmin):
+    list_display = ("email", "course", "next_content", "next_due_at")
+    search_fields = ("email",)
+    list_filter = ("course",)
+    raw_id_fields = ("next_content",)
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ("to", "subject", "status", "attempts", "next_attempt_at")
+    search_fields = ("to", "subject")
+    list_filter = ("status",)
+    raw_id_fields = ("enrollment",)
+
+
+class DeadLetterMessageAdmin(admin.ModelAdmin):
+    list_display = ("to", "subject", "attempts", "last_error", "failed_at")
+    search_fields = ("to", "subject", "last_error")
+    list_filter = ("imap_connection",)
+    raw_id_fields = ("enrollment",)
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected messages")
+    def requeue(
+        self, request: HttpRequest, queryset: QuerySet[DeadLetterMessage]
+    ) -> None:
+        count = queryset.requeue()  # type: ignore[attr-defined]
+        self.message_user(request, f"Requeued {count} messages.")
+
+
+class QuizSubmissionAdmin(admin.ModelAdmin):
+    list_display = ("enrollment", "quiz", "score", "passed", "submitted_at")
+    list_filter = ("passed", "quiz")
+    raw_id_fields = ("enrollment", "reply")
+
+
 admin.site.register(Course, CourseAdmin)
 admin.site.register(ImapConnection, ImapConnectionAdmin)
 admin.site.register(Lesson)
@@ -91,3 +131,7 @@ admin.site.register(Question, QuestionAdmin)
 admin.site.register(Answer)
 admin.site.register(Organization)
 admin.site.register(BlockedEmail)
+admin.site.register(Enrollment, EnrollmentAdmin)
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
+admin.site.register(DeadLetterMessage, DeadLetterMessageAdmin)
+admin.site.register(QuizSubmission, QuizSubmissionAdmin)
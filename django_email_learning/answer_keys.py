@@ -0,0 +1,139 @@
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from django_email_learning.models import Answer, Quiz
+
+CACHE_KEY_PREFIX = "django_email_learning:answer_key"
+
+_compiled_keys: dict[int, "AnswerKey"] = {}
+_compiled_keys_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """
+    Compact, immutable answer key of a published quiz.
+
+    Questions are kept in priority order. The answers of each question are
+    ordered by id and answer ``i`` of a question is bit ``i`` of its masks.
+    """
+
+    quiz_id: int
+    version: int
+    required_score: int
+    question_ids: tuple[int, ...]
+    answer_ids: tuple[tuple[int, ...], ...]
+    correct_masks: tuple[int, ...]
+    multiple_choice: tuple[bool, ...]
+
+    @property
+    def question_count(self) -> int:
+        return len(self.question_ids)
+
+    def selection_mask(self, question_index: int, answer_ids: Sequence[int]) -> int:
+        positions = self.answer_ids[question_index]
+        mask = 0
+        for answer_id in answer_ids:
+            mask |= 1 << positions.index(answer_id)
+        return mask
+
+    def correct_count(self, selections: Sequence[int]) -> int:
+        return sum(
+            selection == correct
+            for selection, correct in zip(selections, self.correct_masks)
+        )
+
+    def score(self, selections: Sequence[int]) -> int:
+        """Return the percentage of correctly answered questions."""
+        return self.correct_count(selections) * 100 // self.question_count
+
+    def passes(self, selections: Sequence[int]) -> bool:
+        return (
+            self.correct_count(selections) * 100
+            >= self.required_score * self.question_count
+        )
+
+
+def _answer_key_cache_key(quiz_id: int, version: int) -> str:
+    return f"{CACHE_KEY_PREFIX}:{quiz_id}:{version}"
+
+
+def _current_version(quiz_id: int) -> int:
+    """
+    Return the version of the answer key of a quiz, the time its quiz,
+    questions or answers last changed. It is read from the database, so a
+    change made by any process is seen by every other one.
+    """
+    changed_at = (
+        Quiz.objects.filter(pk=quiz_id)
+        .values_list("answer_key_changed_at", flat=True)
+        .get()
+    )
+    return int(changed_at.timestamp() * 1_000_000) if changed_at else 0
+
+
+def compile_answer_key(quiz_id: int, version: int) -> AnswerKey:
+    quiz = Quiz.objects.get(pk=quiz_id)
+    if not quiz.is_published:
+        raise ValueError("Answer keys are only available for published quizzes.")
+
+    questions = quiz.questions.order_by("priority", "id").prefetch_related(
+        Prefetch("answers", queryset=Answer.objects.order_by("id"))
+    )
+    question_ids = []
+    answer_ids = []
+    correct_masks = []
+    multiple_choice = []
+    for question in questions:
+        answers = list(question.answers.all())
+        mask = 0
+        for position, answer in enumerate(answers):
+            if answer.is_correct:
+                mask |= 1 << position
+        question_ids.append(question.id)
+        answer_ids.append(tuple(answer.id for answer in answers))
+        correct_masks.append(mask)
+        multiple_choice.append(mask.bit_count() > 1)
+
+    return AnswerKey(
+        quiz_id=quiz.id,
+        version=version,
+        required_score=quiz.required_score,
+        question_ids=tuple(question_ids),
+        answer_ids=tuple(answer_ids),
+        correct_masks=tuple(correct_masks),
+        multiple_choice=tuple(multiple_choice),
+    )
+
+
+def get_answer_key(quiz_id: int) -> AnswerKey:
+    """
+    Return the compiled answer key of a published quiz.
+
+    Keys are cached in process memory and in Django's cache under the quiz
+    id and its current version, so a cache hit only queries the version.
+    """
+    version = _current_version(quiz_id)
+    answer_key = _compiled_keys.get(quiz_id)
+    if answer_key is not None and answer_key.version == version:
+        return answer_key
+
+    cache_key = _answer_key_cache_key(quiz_id, version)
+    answer_key = cache.get(cache_key)
+    if answer_key is None:
+        answer_key = compile_answer_key(quiz_id, version)
+        cache.set(cache_key, answer_key, timeout=None)
+    with _compiled_keys_lock:
+        _compiled_keys[quiz_id] = answer_key
+    return answer_key
+
+
+def invalidate_answer_key(quiz_id: int) -> None:
+    Quiz.objects.filter(pk=quiz_id).update(answer_key_changed_at=timezone.now())
+    with _compiled_keys_lock:
+        _compiled_keys.pop(quiz_id, None)
@@ -0,0 +1,106 @@
+import hashlib
+import time
+from collections.abc import Callable
+from functools import wraps
+
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from django.views.decorators.http import condition
+
+from django_email_learning.conf import app_setting
+
+CACHE_KEY_PREFIX = "django_email_learning:api:version"
+
+# Version of the organization list, which changes with organizations and
+# memberships rather than with the content of one organization.
+ORGANIZATIONS = "organizations"
+
+
+def versions_are_shared() -> bool:
+    """Return whether every process sees the versions of the default cache."""
+    return not isinstance(caches["default"], LocMemCache)
+
+
+def _version_cache_key(scope: int | str) -> str:
+    return f"{CACHE_KEY_PREFIX}:{scope}"
+
+
+def content_version(scope: int | str) -> int:
+    """
+    Return the content version of an organization id or of ORGANIZATIONS.
+
+    A fresh version must never match an ETag handed out before the counter
+    was evicted, so it is seeded from the clock.
+    """
+    version = cache.get(_version_cache_key(scope))
+    if version is None:
+        cache.add(_version_cache_key(scope), time.time_ns(), timeout=None)
+        version = cache.get(_version_cache_key(scope))
+    return version
+
+
+def _bump(scope: int | str) -> None:
+    try:
+        cache.incr(_version_cache_key(scope))
+    except ValueError:
+        cache.set(_version_cache_key(scope), time.time_ns(), timeout=None)
+
+
+def bump_content_version(scope: int | str) -> None:
+    """
+    Bump the content version of a scope once the current transaction commits.
+
+    Bumping earlier would let a concurrent request read the rows from before
+    the write and tag them with the new version.
+    """
+    transaction.on_commit(lambda: _bump(scope))
+
+
+def _query_digest(request: HttpRequest) -> str:
+    query = request.GET.urlencode()
+    return hashlib.blake2s(query.encode(), digest_size=8).hexdigest()
+
+
+def organization_etag(request: HttpRequest, *args, **kwargs) -> str | None:  # type: ignore[no-untyped-def]
+    """ETag of the responses of a view of the organization in the URL."""
+    if not app_setting("API_ETAGS"):
+        return None
+    organization_id = kwargs["organization_id"]
+    version = content_version(organization_id)
+    return f"{organization_id}-{version}-{_query_digest(request)}"
+
+
+def organizations_etag(request: HttpRequest, *args, **kwargs) -> str | None:  # type: ignore[no-untyped-def]
+    """ETag of the organization list, which differs between users."""
+    if not app_setting("API_ETAGS"):
+        return None
+    version = content_version(ORGANIZATIONS)
+    return f"{request.user.pk}-{version}-{_query_digest(request)}"
+
+
+def etag(
+    etag_func: Callable[..., str | None],
+) -> Callable[[Callable[..., HttpResponseBase]], Callable[..., HttpResponseBase]]:
+    """
+    Like Django's condition(etag_func=...), but only successful responses
+    carry the ETag, so errors are never answered with 304 later.
+    """
+
+    def decorator(
+        view_func: Callable[..., HttpResponseBase],
+    ) -> Callable[..., HttpResponseBase]:
+        conditional_view = condition(etag_func=etag_func)(view_func)
+
+        @wraps(view_func)
+        def _wrapped_view(request, *view_args, **view_kwargs) -> HttpResponseBase:  # type: ignore[no-untyped-def]
+            response = conditional_view(request, *view_args, **view_kwargs)
+            if response.status_code not in (200, 304) and response.has_header("ETag"):
+                del response["ETag"]
+            return response
+
+        return _wrapped_view
+
+    return decorator
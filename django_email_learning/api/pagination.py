@@ -0,0 +1,64 @@
+import base64
+from dataclasses import dataclass
+from typing import Any
+
+from django.db.models import QuerySet
+from django.http import QueryDict
+
+from django_email_learning.conf import app_setting
+
+
+class InvalidPage(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Page:
+    rows: list[dict[str, Any]]
+    # Cursor of the next page, None on the last page.
+    next: str | None
+
+
+def encode_cursor(pk: int) -> str:
+    return base64.urlsafe_b64encode(f"id:{pk}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        prefix, _, pk = raw.decode().partition(":")
+        if prefix == "id":
+            return int(pk)
+    except ValueError:
+        pass
+    raise InvalidPage("Invalid cursor")
+
+
+def paginate(queryset: QuerySet, query: QueryDict) -> Page | None:
+    """
+    Return the page of ``queryset``, a ``values()`` queryset including the id,
+    requested with the ``limit`` and ``cursor``
+    query parameters, or None when neither is given.
+
+    Pages are read in id order starting after the id in the cursor, so every
+    page costs one index range scan however deep it is.
+    """
+    limit = query.get("limit")
+    cursor = query.get("cursor")
+    if limit is None and cursor is None:
+        return None
+    max_page_size = app_setting("API_MAX_PAGE_SIZE")
+    try:
+        page_size = min(int(limit), max_page_size) if limit else max_page_size
+    except ValueError:
+        raise InvalidPage("limit must be a positive integer")
+    if page_size < 1:
+        raise InvalidPage("limit must be a positive integer")
+    if cursor:
+        queryset = queryset.filter(pk__gt=decode_cursor(cursor))
+
+    rows = list(queryset.order_by("pk")[: page_size + 1])
+    if len(rows) <= page_size:
+        return Page(rows, None)
+    rows = rows[:page_size]
+    return Page(rows, encode_cursor(rows[-1]["id"]))
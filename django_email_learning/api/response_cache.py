@@ -0,0 +1,104 @@
+import hashlib
+from collections.abc import Callable
+from functools import wraps
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.http import HttpRequest, HttpResponse
+from django.http.response import HttpResponseBase
+
+from django_email_learning.api.etags import (
+    ORGANIZATIONS,
+    content_version,
+    versions_are_shared,
+)
+from django_email_learning.conf import app_setting
+
+CACHE_KEY_PREFIX = "django_email_learning:api:response"
+HITS_KEY = f"{CACHE_KEY_PREFIX}:hits"
+MISSES_KEY = f"{CACHE_KEY_PREFIX}:misses"
+
+
+def response_cache() -> BaseCache:
+    return caches[app_setting("API_CACHE_ALIAS")]
+
+
+def cache_enabled() -> bool:
+    """
+    Responses are cached when API_CACHE_TIMEOUT is set and the versions that
+    invalidate them are shared by all processes, the system checks report
+    the setting otherwise.
+    """
+    return bool(app_setting("API_CACHE_TIMEOUT")) and versions_are_shared()
+
+
+def organization_scope(request: HttpRequest, **kwargs) -> tuple[int | str, str]:  # type: ignore[no-untyped-def]
+    """Cache responses per organization and role of the requesting user."""
+    return kwargs["organization_id"], request.organization_role  # type: ignore[attr-defined]
+
+
+def organizations_scope(request: HttpRequest, **kwargs) -> tuple[int | str, str]:  # type: ignore[no-untyped-def]
+    """Cache the organization list per user, its content depends on the user."""
+    return ORGANIZATIONS, f"user{request.user.pk}"
+
+
+def _cache_key(request: HttpRequest, scope: int | str, variant: str) -> str:
+    digest = hashlib.blake2s(
+        request.get_full_path().encode(), digest_size=16
+    ).hexdigest()
+    version = content_version(scope)
+    return f"{CACHE_KEY_PREFIX}:{scope}:{version}:{variant}:{digest}"
+
+
+def _count(key: str) -> None:
+    cache = response_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def cache_stats() -> dict[str, int]:
+    """Return the hits and misses of the response cache."""
+    counts = response_cache().get_many([HITS_KEY, MISSES_KEY])
+    return {"hits": counts.get(HITS_KEY, 0), "misses": counts.get(MISSES_KEY, 0)}
+
+
+def cached_response(
+    scope: Callable[..., tuple[int | str, str]],
+) -> Callable[[Callable[..., HttpResponseBase]], Callable[..., HttpResponseBase]]:
+    """
+    Cache successful responses of a view under the content version of the
+    scope of the request, see api.etags.
+
+    Writes bump the version from model signals once they are committed, so
+    entries cached before a write are never served again and expire after API_CACHE_TIMEOUT. Streamed
+    responses are not cached.
+    """
+
+    def decorator(
+        view_func: Callable[..., HttpResponseBase],
+    ) -> Callable[..., HttpResponseBase]:
+        @wraps(view_func)
+        def _wrapped_view(request, *view_args, **view_kwargs) -> HttpResponseBase:  # type: ignore[no-untyped-def]
+            if not cache_enabled():
+                return view_func(request, *view_args, **view_kwargs)
+            timeout = app_setting("API_CACHE_TIMEOUT")
+            cache = response_cache()
+            key = _cache_key(request, *scope(request, **view_kwargs))
+            cached = cache.get(key)
+            if cached is not None:
+                _count(HITS_KEY)
+                content, content_type = cached
+                return HttpResponse(content, content_type=content_type)
+
+            _count(MISSES_KEY)
+            response = view_func(request, *view_args, **view_kwargs)
+            if response.status_code == 200 and isinstance(response, HttpResponse):
+                cache.set(key, (response.content, response["Content-Type"]), timeout)
+            return response
+
+        return _wrapped_view
+
+    return decorator
@@ -0,0 +1,43 @@
+from collections.abc import Iterator
+from typing import Any
+
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from django_email_learning.conf import app_setting
+
+
+def response_rows(queryset: QuerySet, model: type[BaseModel]) -> QuerySet:
+    """
+    Return ``queryset`` as dictionaries holding the fields of ``model``.
+
+    The rows come from typed database columns, so they are encoded without
+    building and validating a ``model`` instance per row.
+    """
+    return queryset.values(*model.model_fields)
+
+
+def json_response(data: dict[str, Any], status: int = 200) -> HttpResponse:
+    """Like JsonResponse but encoded by the JSON serializer of pydantic-core."""
+    return HttpResponse(to_json(data), content_type="application/json", status=status)
+
+
+def wants_ndjson(request: HttpRequest) -> bool:
+    return request.GET.get("format") == "ndjson"
+
+
+def ndjson_response(rows: QuerySet) -> StreamingHttpResponse:
+    """
+    Stream ``rows`` as newline delimited JSON, one object per line.
+
+    Rows are read with a database cursor in chunks of API_STREAM_CHUNK_SIZE,
+    so memory use does not grow with the number of rows.
+    """
+
+    def lines() -> Iterator[bytes]:
+        for row in rows.iterator(chunk_size=app_setting("API_STREAM_CHUNK_SIZE")):
+            yield to_json(row) + b"\n"
+
+    return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
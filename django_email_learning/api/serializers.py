@@ -99,6 +99,8 @@ class CreateImapConnectionRequest(BaseModel):
     password: str = Field(min_length=1, examples=["aSafePassword123!"])
     server: str = Field(min_length=1, examples=["imap.example.com"])
     port: int = Field(gt=0, examples=[993])
+    smtp_server: Optional[str] = Field(None, examples=["smtp.example.com"])
+    smtp_port: Optional[int] = Field(None, gt=0, examples=[587])
 
     def to_django_model(self, organization_id: int) -> ImapConnection:
         organization = Organization.objects.get(id=organization_id)
@@ -111,6 +113,10 @@ class CreateImapConnectionRequest(BaseModel):
             port=self.port,
             organization=organization,
         )
+        if self.smtp_server:
+            imap_connection.smtp_server = self.smtp_server
+        if self.smtp_port:
+            imap_connection.smtp_port = self.smtp_port
         return imap_connection
 
 
@@ -119,6 +125,8 @@ class ImapConnectionResponse(BaseModel):
     email: str
     server: str
     port: int
+    smtp_server: str
+    smtp_port: int
     organization_id: int
 
     model_config = ConfigDict(from_attributes=True)
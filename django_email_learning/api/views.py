@@ -3,8 +3,26 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.db.utils import IntegrityError
 from django.http import JsonResponse
+from django.http.response import HttpResponseBase
 from pydantic import ValidationError
 from django_email_learning.api import serializers
+from django_email_learning.api.etags import (
+    etag,
+    organization_etag,
+    organizations_etag,
+)
+from django_email_learning.api.response_cache import (
+    cached_response,
+    organization_scope,
+    organizations_scope,
+)
+from django_email_learning.api.pagination import InvalidPage, paginate
+from django_email_learning.api.serialization import (
+    json_response,
+    ndjson_response,
+    response_rows,
+    wants_ndjson,
+)
 from django_email_learning.models import (
     Course,
     ImapConnection,
@@ -22,6 +40,8 @@ import json
 @method_decorator(ensure_csrf_cookie, name="get")
 @method_decorator(accessible_for(roles={"admin", "editor"}), name="post")
 @method_decorator(accessible_for(roles={"admin", "editor", "viewer"}), name="get")
+@method_decorator(etag(organization_etag), name="get")
+@method_decorator(cached_response(organization_scope), name="get")
 class CourseView(View):
     def post(self, request, *args, **kwargs) -> JsonResponse:  # type: ignore[no-untyped-def]
         payload = json.loads(request.body)
@@ -40,7 +60,7 @@ class CourseView(View):
         except (IntegrityError, ValueError) as e:
             return JsonResponse({"error": str(e)}, status=409)
 
-    def get(self, request, *args, **kwargs) -> JsonResponse:  # type: ignore[no-untyped-def]
+    def get(self, request, *args, **kwargs) -> HttpResponseBase:  # type: ignore[no-untyped-def]
         courses = Course.objects.filter(organization_id=kwargs["organization_id"])
         enabled = request.GET.get("enabled")
         if enabled is not None:
@@ -48,22 +68,30 @@ class CourseView(View):
                 courses = courses.filter(enabled=True)
             elif enabled.lower() in ["false", "no"]:
                 courses = courses.filter(enabled=False)
+        rows = response_rows(courses, serializers.CourseResponse)
+        if wants_ndjson(request):
+            return ndjson_response(rows)
+        try:
+            page = paginate(rows, request.GET)
+        except InvalidPage as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
-        response_list = []
-        for course in courses:
-            response_list.append(
-                serializers.CourseResponse.model_validate(course).model_dump()
-            )
-        return JsonResponse({"courses": response_list}, status=200)
+        if page is None:
+            return json_response({"courses": list(rows)})
+        return json_response({"courses": page.rows, "next": page.next})
 
 
 @method_decorator(accessible_for(roles={"admin", "editor"}), name="post")
 @method_decorator(accessible_for(roles={"admin", "editor"}), name="delete")
 @method_decorator(accessible_for(roles={"admin", "editor", "viewer"}), name="get")
+@method_decorator(etag(organization_etag), name="get")
+@method_decorator(cached_response(organization_scope), name="get")
 class SingleCourseView(View):
     def get(self, request, *args, **kwargs) -> JsonResponse:  # type: ignore[no-untyped-def]
         try:
-            course = Course.objects.get(id=kwargs["course_id"])
+            course = Course.objects.get(
+                id=kwargs["course_id"], organization_id=kwargs["organization_id"]
+            )
             return JsonResponse(
                 serializers.CourseResponse.model_validate(course).model_dump(),
                 status=200,
@@ -105,19 +133,24 @@ class SingleCourseView(View):
 
 @method_decorator(accessible_for(roles={"admin", "editor"}), name="post")
 @method_decorator(accessible_for(roles={"admin", "editor", "viewer"}), name="get")
+@method_decorator(etag(organization_etag), name="get")
+@method_decorator(cached_response(organization_scope), name="get")
 class ImapConnectionView(View):
-    def get(self, request, *args, **kwargs) -> JsonResponse:  # type: ignore[no-untyped-def]
-        response_list = []
+    def get(self, request, *args, **kwargs) -> HttpResponseBase:  # type: ignore[no-untyped-def]
         imap_connections = ImapConnection.objects.filter(
             organization_id=kwargs["organization_id"]
         )
-        for connection in imap_connections:
-            response_list.append(
-                serializers.ImapConnectionResponse.model_validate(
-                    connection
-                ).model_dump()
-            )
-        return JsonResponse({"imap_connections": response_list}, status=200)
+        rows = response_rows(imap_connections, serializers.ImapConnectionResponse)
+        if wants_ndjson(request):
+            return ndjson_response(rows)
+        try:
+            page = paginate(rows, request.GET)
+        except InvalidPage as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        if page is None:
+            return json_response({"imap_connections": list(rows)})
+        return json_response({"imap_connections": page.rows, "next": page.next})
 
     def post(self, request, *args, **kwargs) -> JsonResponse:  # type: ignore[no-untyped-def]
         payload = json.loads(request.body)
@@ -142,21 +175,19 @@ class ImapConnectionView(View):
 @method_decorator(ensure_csrf_cookie, name="get")
 @method_decorator(is_an_organization_member(), name="get")
 @method_decorator(is_platform_admin(), name="post")
+@method_decorator(etag(organizations_etag), name="get")
+@method_decorator(cached_response(organizations_scope), name="get")
 class OrganizationsView(View):
-    def get(self, request, *args, **kwargs) -> JsonResponse:  # type: ignore[no-untyped-def]
-        if request.user.is_superuser:
-            organizations = Organization.objects.all()
-        else:
-            organizations_users = OrganizationUser.objects.select_related(
-                "organization"
-            ).filter(user_id=request.user.id)
-            organizations = [ou.organization for ou in organizations_users]  # type: ignore[assignment]
-        response_list = []
-        for org in organizations:
-            response_list.append(
-                serializers.OrganizationResponse.model_validate(org).model_dump()
-            )
-        return JsonResponse({"organizations": response_list}, status=200)
+    def get(self, request, *args, **kwargs) -> HttpResponseBase:  # type: ignore[no-untyped-def]
+        organizations = Organization.objects.all()
+        if not request.user.is_superuser:
+            organizations = organizations.filter(
+                organizationuser__user_id=request.user.id
+            ).order_by("organizationuser__id")
+        rows = response_rows(organizations, serializers.OrganizationResponse)
+        if wants_ndjson(request):
+            return ndjson_response(rows)
+        return json_response({"organizations": list(rows)})
 
     def post(self, request, *args, **kwargs) -> JsonResponse:  # type: ignore[no-untyped-def]
         try:
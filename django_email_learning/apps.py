@@ -7,4 +7,5 @@ class EmailLearningConfig(AppConfig):
     verbose_name = "Email Learning"
 
     def ready(self) -> None:
+        import django_email_learning.checks  # noqa
         import django_email_learning.signals  # noqa
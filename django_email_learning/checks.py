@@ -0,0 +1,41 @@
+from typing import Any
+
+from django.core.checks import CheckMessage, Error, register
+from django.core.exceptions import ImproperlyConfigured
+
+from django_email_learning.api.etags import versions_are_shared
+from django_email_learning.conf import app_setting
+from django_email_learning.delivery.ratelimit import validate_rate_limits
+
+
+@register()
+def check_api_cache(app_configs: Any, **kwargs: Any) -> list[CheckMessage]:
+    if app_setting("API_CACHE_TIMEOUT") and not versions_are_shared():
+        return [
+            Error(
+                "API_CACHE_TIMEOUT is set but the default cache is local to "
+                "each process, cached API responses would not be invalidated "
+                "by writes of other processes.",
+                hint="Use a cache shared by all processes as the default cache, "
+                "e.g. Redis, Memcached, a database or file based cache, or set "
+                "API_CACHE_TIMEOUT to 0.",
+                id="django_email_learning.E001",
+            )
+        ]
+    return []
+
+
+@register()
+def check_rate_limits(app_configs: Any, **kwargs: Any) -> list[CheckMessage]:
+    try:
+        validate_rate_limits()
+    except ImproperlyConfigured as e:
+        return [
+            Error(
+                str(e),
+                hint='Set limits like {"rate": 2, "capacity": 20} in '
+                "SMTP_RATE_LIMIT and SMTP_HOST_RATE_LIMITS.",
+                id="django_email_learning.E002",
+            )
+        ]
+    return []
@@ -0,0 +1,87 @@
+from typing import Any
+
+from django.conf import settings
+
+DEFAULTS: dict[str, Any] = {
+    # Maximum number of open SMTP connections per sending identity.
+    "SMTP_POOL_SIZE": 4,
+    # SMTP connections are closed and replaced after sending this many messages.
+    "SMTP_MAX_MESSAGES_PER_CONNECTION": 100,
+    "SMTP_TIMEOUT": 30,
+    # SMTP connections idle for SMTP_IDLE_CHECK_AFTER seconds are checked with
+    # NOOP before they are reused, and replaced without a check once idle for
+    # longer than SMTP_MAX_IDLE seconds.
+    "SMTP_IDLE_CHECK_AFTER": 5,
+    "SMTP_MAX_IDLE": 60,
+    # Limits of the asyncio delivery worker.
+    "WORKER_CONCURRENCY": 50,
+    "WORKER_CONCURRENCY_PER_HOST": 4,
+    # Seconds a worker owns the due enrollments it claimed. Enrollments that
+    # are not advanced before the lease expires are claimed again.
+    "LEASE_SECONDS": 300,
+    # Token bucket limiting every sending account, for example
+    # {"rate": 2, "capacity": 20} allows bursts of 20 messages and 2 messages
+    # per second after that. None disables the limit.
+    "SMTP_RATE_LIMIT": None,
+    # Token buckets limiting SMTP hosts, shared by every account on the host,
+    # keyed by host name, e.g. {"smtp.gmail.com": {"rate": 5, "capacity": 50}}.
+    "SMTP_HOST_RATE_LIMITS": {},
+    # Failed sends are retried with an exponential backoff starting at
+    # RETRY_BASE_DELAY seconds. Messages that failed RETRY_MAX_ATTEMPTS times
+    # are moved to the dead-letter table.
+    "RETRY_BASE_DELAY": 60,
+    "RETRY_MAX_DELAY": 6 * 60 * 60,
+    "RETRY_MAX_ATTEMPTS": 8,
+    "IMAP_TIMEOUT": 30,
+    # IDLE is restarted after this many seconds, servers may drop clients
+    # that stay idle for 30 minutes (RFC 2177).
+    "IMAP_IDLE_TIMEOUT": 25 * 60,
+    # Seconds between two polls of servers without IDLE support.
+    "IMAP_POLL_INTERVAL": 60,
+    # Listeners reconnect with an exponential backoff between these delays.
+    "IMAP_RECONNECT_BASE_DELAY": 1,
+    "IMAP_RECONNECT_MAX_DELAY": 300,
+    # listen_for_mail reads the ImapConnections again after this many
+    # seconds, to listen to the connections added or edited since.
+    "IMAP_CONNECTIONS_REFRESH_INTERVAL": 60,
+    # Number of new messages fetched with one UID FETCH.
+    "IMAP_FETCH_BATCH_SIZE": 100,
+    # Only the header and this many bytes of the body of replies are
+    # fetched, enough for the answer lines but not for attachments.
+    "IMAP_PARTIAL_BODY_BYTES": 8192,
+    # Seconds the inbound router keeps the course slugs of an organization in
+    # process memory. Changes made by other processes are seen after at most
+    # this long when the default cache isn't shared between processes.
+    "COURSE_SLUGS_TTL": 60,
+    # Number of processes parsing fetched replies, 0 parses them in the
+    # fetching thread. Every fetched batch is split evenly between the
+    # processes, in chunks of at most INBOUND_PARSE_CHUNK_SIZE messages.
+    "INBOUND_PARSE_WORKERS": 0,
+    "INBOUND_PARSE_CHUNK_SIZE": 500,
+    # Largest page of the list endpoints of the API, bigger limits are capped.
+    "API_MAX_PAGE_SIZE": 100,
+    # Rows read per database round trip when streaming a list as NDJSON.
+    "API_STREAM_CHUNK_SIZE": 2000,
+    # Read endpoints of the API send ETags and answer unchanged content with
+    # 304. Versions are kept in the default cache, which must be shared by
+    # all processes serving the API, disable ETags otherwise.
+    "API_ETAGS": True,
+    # Responses of the read endpoints of the API are cached for this many
+    # seconds in the API_CACHE_ALIAS cache of the CACHES setting, which can be
+    # a local memory, file based or Redis cache. 0 disables the cache. Entries
+    # are invalidated through versions in the default cache, the cache is
+    # only used when the default cache is shared by all processes serving
+    # the API.
+    "API_CACHE_ALIAS": "default",
+    "API_CACHE_TIMEOUT": 0,
+}
+
+
+def app_setting(name: str) -> Any:
+    """
+    Return a setting of the app.
+
+    Settings are read from the DJANGO_EMAIL_LEARNING dictionary in the Django
+    settings and fall back to DEFAULTS.
+    """
+    return getattr(settings, "DJANGO_EMAIL_LEARNING", {}).get(name, DEFAULTS[name])
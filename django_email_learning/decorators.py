@@ -31,14 +31,22 @@ def accessible_for(roles: set[str]) -> typing.Callable:
             if not user.is_authenticated:
                 return JsonResponse({"error": "Unauthorized"}, status=401)
 
-            if not user.is_superuser:
-                has_access = OrganizationUser.objects.filter(  # type: ignore[misc]
-                    user=user,
-                    organization_id=view_kwargs.get("organization_id"),
-                    role__in=roles,
-                ).exists()
-                if not has_access:
+            if user.is_superuser:
+                request.organization_role = "superuser"
+            else:
+                role = (
+                    OrganizationUser.objects.filter(  # type: ignore[misc]
+                        user=user,
+                        organization_id=view_kwargs.get("organization_id"),
+                        role__in=roles,
+                    )
+                    .values_list("role", flat=True)
+                    .first()
+                )
+                if role is None:
                     return JsonResponse({"error": "Forbidden"}, status=403)
+                # The role the request was granted with, e.g. for cache keys.
+                request.organization_role = role
             return view_func(request, *view_args, **view_kwargs)
 
         return _wrapped_view
@@ -0,0 +1,93 @@
+import os
+import socket
+import uuid
+from collections.abc import Iterator
+from datetime import timedelta
+from itertools import groupby
+from operator import attrgetter
+from typing import TypeVar
+
+from django.db import connection, transaction
+from django.db.models import Model, Q, QuerySet
+from django.utils import timezone
+
+M = TypeVar("M", bound=Model)
+
+
+def default_lease_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(
+    queryset: QuerySet[Model],
+    owner: str,
+    limit: int,
+    lease_seconds: int,
+) -> list[int]:
+    """
+    Lease up to ``limit`` rows of the ordered ``queryset`` to ``owner``.
+
+    The model needs ``lease_token`` and ``lease_expires_at`` fields. Rows with
+    a lease that is not expired yet are never claimed, so concurrent workers
+    claim disjoint rows. Returns the ids of the claimed rows.
+
+    Leases run from the time of the claim, not from the start of the pass
+    that claims, so a long pass doesn't hand out leases that already expired.
+    """
+    model = queryset.model
+    claimed_at = timezone.now()
+    unleased = Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=claimed_at)
+    claimable = queryset.filter(unleased)
+    token = f"{owner}:{uuid.uuid4().hex}"
+    lease = {
+        "lease_token": token,
+        "lease_expires_at": claimed_at + timedelta(seconds=lease_seconds),
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        # Only the claimed rows are locked, not the rows of joined tables,
+        # where the backend supports it. MariaDB and older MySQL don't.
+        of = ("self",) if connection.features.has_select_for_update_of else ()
+        with transaction.atomic():
+            ids = list(
+                claimable.select_for_update(skip_locked=True, of=of).values_list(
+                    "pk", flat=True
+                )[:limit]
+            )
+            model._default_manager.filter(pk__in=ids).update(**lease)
+        return ids
+
+    # Without SKIP LOCKED the candidates are claimed with a conditional
+    # UPDATE, which only succeeds for the rows no other worker claimed in the
+    # meantime.
+    candidates = list(claimable.values_list("pk", flat=True)[:limit])
+    model._default_manager.filter(unleased, pk__in=candidates).update(**lease)
+    return list(
+        model._default_manager.filter(pk__in=candidates, lease_token=token)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+
+def group_by_lease(objects: list[M]) -> Iterator[tuple[str, list[M]]]:
+    """
+    Group claimed ``objects`` by the lease token they were claimed with.
+
+    Writes finishing the work on claimed rows filter on this token, so a
+    worker whose lease expired and was claimed by another worker changes
+    nothing.
+    """
+    key = attrgetter("lease_token")
+    for token, group in groupby(sorted(objects, key=key), key=key):
+        yield token, list(group)
+
+
+def owned_ids(queryset: QuerySet[Model], token: str) -> set[int]:
+    """
+    Lock and return the ids of the rows of ``queryset`` still leased with
+    ``token``, to be called in the transaction writing the rows.
+    """
+    return set(
+        queryset.select_for_update()
+        .filter(lease_token=token)
+        .values_list("pk", flat=True)
+    )
@@ -0,0 +1,52 @@
+from django.conf import settings
+
+from django_email_learning.models import CourseContent, Enrollment, OutboxMessage
+
+
+def render_content(content: CourseContent) -> tuple[str, str]:
+    """Return the subject and the plain text body of a course content."""
+    if content.type == "lesson" and content.lesson:
+        return content.lesson.title, content.lesson.content
+
+    if content.type == "quiz" and content.quiz:
+        lines = []
+        for number, question in enumerate(content.quiz.questions.all(), start=1):
+            answers = list(question.answers.all())
+            hint = (
+                " (choose all correct answers)"
+                if sum(answer.is_correct for answer in answers) > 1
+                else ""
+            )
+            lines.append(f"{number}. {question.text}{hint}")
+            for option, answer in enumerate(answers, start=1):
+                lines.append(f"   {option}) {answer.text}")
+            lines.append("")
+        quiz_id = content.quiz.pk
+        lines.append(
+            f'Reply with "answer {quiz_id}" and the numbers of your answers in '
+            f'question order, for example "answer {quiz_id} 1,3". Join the '
+            'numbers of several answers to one question with "+", like 1+2.'
+        )
+        return content.quiz.title, "\n".join(lines)
+
+    raise ValueError(f"Course content {content.pk} has nothing to send.")
+
+
+def build_outbox_message(
+    enrollment: Enrollment, content: CourseContent
+) -> OutboxMessage:
+    course = enrollment.course
+    subject, body = render_content(content)
+    from_email = (
+        course.imap_connection.email
+        if course.imap_connection
+        else settings.DEFAULT_FROM_EMAIL
+    )
+    return OutboxMessage(
+        enrollment=enrollment,
+        imap_connection=course.imap_connection,
+        from_email=from_email,
+        to=enrollment.email,
+        subject=f"[{course.slug}] {subject}",
+        body=body,
+    )
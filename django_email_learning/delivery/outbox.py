@@ -0,0 +1,153 @@
+import logging
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from itertools import groupby
+
+from django.utils import timezone
+
+from django_email_learning.conf import app_setting
+from django_email_learning.delivery.leases import (
+    claim,
+    default_lease_owner,
+    group_by_lease,
+)
+from django_email_learning.delivery.ratelimit import acquire
+from django_email_learning.delivery.retries import SendFailure, record_failures
+from django_email_learning.delivery.smtp import get_email_backend
+from django_email_learning.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def claim_outbox_messages(
+    owner: str, now: datetime, limit: int, lease_seconds: int | None = None
+) -> list[OutboxMessage]:
+    """
+    Lease up to ``limit`` pending outbox messages that are due to ``owner``.
+
+    New messages and due retries are found by the same range scan over the
+    (status, next_attempt_at) index.
+    """
+    ids = claim(
+        OutboxMessage.objects.filter(
+            status="pending", next_attempt_at__lte=now
+        ).order_by("next_attempt_at", "pk"),
+        owner,
+        limit,
+        lease_seconds or app_setting("LEASE_SECONDS"),
+    )
+    if not ids:
+        return []
+    return list(
+        OutboxMessage.objects.filter(pk__in=ids)
+        .select_related("imap_connection")
+        .order_by("next_attempt_at", "pk")
+    )
+
+
+def iter_claimed_outbox(
+    now: datetime, batch_size: int, owner: str | None = None
+) -> Iterator[list[OutboxMessage]]:
+    """
+    Claim and yield the pending outbox messages in batches.
+
+    Messages that fail to send or are throttled are scheduled after ``now``,
+    so they are not claimed again during the same pass.
+    """
+    owner = owner or default_lease_owner()
+    while batch := claim_outbox_messages(owner, now, batch_size):
+        yield batch
+
+
+def mark_sent(messages: list[OutboxMessage], sent_at: datetime) -> None:
+    """
+    Mark ``messages`` as sent with a bulk UPDATE per lease, skipping the
+    messages whose lease was taken over by another worker.
+    """
+    for token, leased in group_by_lease(messages):
+        for message in leased:
+            message.status = "sent"
+            message.sent_at = sent_at
+            message.lease_token = ""
+            message.lease_expires_at = None
+        OutboxMessage.objects.filter(lease_token=token).bulk_update(
+            leased, ["status", "sent_at", "lease_token", "lease_expires_at"]
+        )
+
+
+def group_by_connection(
+    batch: list[OutboxMessage],
+) -> Iterator[list[OutboxMessage]]:
+    batch = sorted(batch, key=lambda message: message.imap_connection_id or 0)
+    for _, group in groupby(batch, key=lambda message: message.imap_connection_id):
+        yield list(group)
+
+
+def throttle(batch: list[OutboxMessage]) -> list[OutboxMessage]:
+    """
+    Return the messages of ``batch`` the rate limits allow to send now.
+
+    The other messages are rescheduled for when their buckets are expected
+    to hold enough tokens.
+    """
+    allowed = []
+    for messages in group_by_connection(batch):
+        granted, wait = acquire(messages[0].imap_connection, len(messages))
+        allowed += messages[:granted]
+        for token, throttled in group_by_lease(messages[granted:]):
+            OutboxMessage.objects.filter(
+                pk__in=[message.pk for message in throttled], lease_token=token
+            ).update(
+                next_attempt_at=timezone.now() + timedelta(seconds=wait),
+                lease_token="",
+                lease_expires_at=None,
+            )
+    return allowed
+
+
+def send_outbox_messages(
+    batch: list[OutboxMessage],
+) -> tuple[list[OutboxMessage], list[SendFailure]]:
+    """
+    Send ``batch`` and return the messages that were sent and the failures.
+
+    Messages are grouped by sending account so each account opens one
+    connection for its messages.
+    """
+    sent = []
+    failures: list[SendFailure] = []
+    for messages in group_by_connection(batch):
+        try:
+            backend = get_email_backend(messages[0].imap_connection)
+            backend.open()
+        except Exception as error:
+            logger.exception("Opening the email backend failed")
+            failures += [(message, error) for message in messages]
+            continue
+        try:
+            for message in messages:
+                try:
+                    backend.send_messages([message.to_email_message()])
+                except Exception as error:
+                    logger.exception(f"Sending outbox message {message.pk} failed")
+                    failures.append((message, error))
+                    continue
+                sent.append(message)
+        finally:
+            backend.close()
+    return sent, failures
+
+
+def drain_outbox(
+    now: datetime | None = None, batch_size: int = 500, owner: str | None = None
+) -> int:
+    """Send the pending outbox messages and return the number of sends."""
+    now = now or timezone.now()
+    sent = 0
+    for batch in iter_claimed_outbox(now, batch_size, owner):
+        delivered, failures = send_outbox_messages(throttle(batch))
+        finished_at = timezone.now()
+        mark_sent(delivered, finished_at)
+        record_failures(failures, finished_at)
+        sent += len(delivered)
+    return sent
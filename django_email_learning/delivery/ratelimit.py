@@ -0,0 +1,184 @@
+import logging
+import math
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+
+from django_email_learning.conf import app_setting
+from django_email_learning.models import ImapConnection
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "django_email_learning:rate_limit"
+LOCK_SECONDS = 5
+LOCK_ATTEMPTS = 200
+# Seconds after which messages are retried when a bucket stayed locked by
+# other workers.
+LOCKED_RETRY_DELAY = 1.0
+
+
+class BucketLocked(Exception):
+    """The bucket stayed locked by other workers for too long."""
+
+
+@dataclass(frozen=True)
+class TokenBucket:
+    """
+    Token bucket whose state is kept in the Django cache.
+
+    The bucket holds at most ``capacity`` tokens and refills with ``rate``
+    tokens per second, so it allows bursts of ``capacity`` messages and a
+    sustained rate of ``rate`` messages per second. Updates are serialized
+    with a cache lock so every worker sharing the cache sees the same bucket.
+    """
+
+    key: str
+    rate: float
+    capacity: int
+
+    @classmethod
+    def from_setting(
+        cls, key: str, limit: dict[str, Any] | None
+    ) -> "TokenBucket | None":
+        if not limit:
+            return None
+        try:
+            bucket = cls(
+                key=key, rate=float(limit["rate"]), capacity=int(limit["capacity"])
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            raise ImproperlyConfigured(
+                f"The rate limit of {key} needs a rate and a capacity, got {limit!r}"
+            ) from e
+        if bucket.rate <= 0 or bucket.capacity < 1:
+            raise ImproperlyConfigured(
+                f"The rate and capacity of the rate limit of {key} must be "
+                f"positive, got {limit!r}"
+            )
+        return bucket
+
+    @property
+    def cache_key(self) -> str:
+        return f"{CACHE_KEY_PREFIX}:{self.key}"
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        lock_key = f"{self.cache_key}:lock"
+        for _ in range(LOCK_ATTEMPTS):
+            if cache.add(lock_key, 1, LOCK_SECONDS):
+                break
+            time.sleep(0.005)
+        else:
+            raise BucketLocked(f"Can not lock the rate limit bucket {self.key}")
+        try:
+            yield
+        finally:
+            cache.delete(lock_key)
+
+    def _tokens(self, now: float) -> float:
+        state = cache.get(self.cache_key)
+        if state is None:
+            return float(self.capacity)
+        tokens, updated_at = state
+        return min(self.capacity, tokens + max(0.0, now - updated_at) * self.rate)
+
+    def _store(self, tokens: float, now: float) -> None:
+        # The state expires once the bucket would be full again anyway.
+        timeout = math.ceil((self.capacity - tokens) / self.rate) + 1
+        cache.set(self.cache_key, (tokens, now), timeout)
+
+    def take(self, count: int, now: float | None = None) -> int:
+        """Take up to ``count`` tokens and return the number of tokens taken."""
+        now = time.time() if now is None else now
+        with self._locked():
+            tokens = self._tokens(now)
+            taken = min(count, int(tokens))
+            self._store(tokens - taken, now)
+        return taken
+
+    def give_back(self, count: int, now: float | None = None) -> None:
+        if count <= 0:
+            return
+        now = time.time() if now is None else now
+        try:
+            with self._locked():
+                self._store(min(self.capacity, self._tokens(now) + count), now)
+        except BucketLocked:
+            # The tokens are lost, the bucket refills them at its rate.
+            logger.warning(f"Giving tokens back to {self.key} failed", exc_info=True)
+
+    def wait_time(self, count: int) -> float:
+        """Seconds until an empty bucket holds ``count`` tokens."""
+        return min(count, self.capacity) / self.rate
+
+
+def smtp_host(imap_connection: ImapConnection | None) -> str:
+    if imap_connection and imap_connection.smtp_server:
+        return imap_connection.smtp_server
+    return settings.EMAIL_HOST
+
+
+def buckets_for(imap_connection: ImapConnection | None) -> list[TokenBucket]:
+    """
+    Return the buckets limiting the messages sent through ``imap_connection``.
+
+    Every sending account is limited by SMTP_RATE_LIMIT and every SMTP host by
+    its entry in SMTP_HOST_RATE_LIMITS.
+    """
+    connection_key = imap_connection.pk if imap_connection else "default"
+    host = smtp_host(imap_connection)
+    buckets = [
+        TokenBucket.from_setting(
+            f"connection:{connection_key}", app_setting("SMTP_RATE_LIMIT")
+        ),
+        TokenBucket.from_setting(
+            f"host:{host}", app_setting("SMTP_HOST_RATE_LIMITS").get(host)
+        ),
+    ]
+    return [bucket for bucket in buckets if bucket is not None]
+
+
+def acquire(
+    imap_connection: ImapConnection | None, count: int, now: float | None = None
+) -> tuple[int, float]:
+    """
+    Take tokens for up to ``count`` messages sent through ``imap_connection``.
+
+    Returns the number of messages that may be sent now and, when that is less
+    than ``count``, the seconds to wait before sending the rest. Messages are
+    throttled as well when a bucket stays locked by other workers.
+    """
+    granted = count
+    taken: list[tuple[TokenBucket, int]] = []
+    locked = False
+    try:
+        for bucket in buckets_for(imap_connection):
+            got = bucket.take(granted, now)
+            taken.append((bucket, got))
+            granted = got
+            if not granted:
+                break
+    except BucketLocked:
+        logger.warning("Taking rate limit tokens failed", exc_info=True)
+        granted = 0
+        locked = True
+    for bucket, got in taken:
+        bucket.give_back(got - granted, now)
+    if granted == count:
+        return granted, 0.0
+    if locked:
+        return 0, LOCKED_RETRY_DELAY
+    return granted, max(bucket.wait_time(count - granted) for bucket, _ in taken)
+
+
+def validate_rate_limits() -> None:
+    """Raise ImproperlyConfigured when a configured rate limit is invalid."""
+    TokenBucket.from_setting("SMTP_RATE_LIMIT", app_setting("SMTP_RATE_LIMIT"))
+    for host, limit in app_setting("SMTP_HOST_RATE_LIMITS").items():
+        TokenBucket.from_setting(f"SMTP_HOST_RATE_LIMITS[{host!r}]", limit)
@@ -0,0 +1,103 @@
+import random
+import smtplib
+from datetime import datetime, timedelta
+
+from django.db import transaction
+
+from django_email_learning.conf import app_setting
+from django_email_learning.delivery.leases import group_by_lease, owned_ids
+from django_email_learning.models import DeadLetterMessage, OutboxMessage
+
+SendFailure = tuple[OutboxMessage, Exception]
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Return whether sending may succeed when retried after ``error``.
+
+    SMTP replies are classified by their code, 4xx replies are transient and
+    5xx replies are permanent. Authentication errors are transient because
+    they are fixed on the account and not on the message. Connection errors
+    and timeouts are transient, errors in the message itself are permanent.
+    """
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return any(code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code < 500
+    if isinstance(error, (OSError, smtplib.SMTPException)):
+        return True
+    return not isinstance(error, (ValueError, TypeError, UnicodeError))
+
+
+def backoff_delay(attempts: int) -> float:
+    """
+    Seconds to wait before retrying a message that failed ``attempts`` times.
+
+    The delay doubles with every attempt up to RETRY_MAX_DELAY. A random
+    jitter of up to half the delay keeps the retries of messages that failed
+    together from hitting the server at the same time again.
+    """
+    delay = min(
+        app_setting("RETRY_MAX_DELAY"),
+        app_setting("RETRY_BASE_DELAY") * 2 ** (attempts - 1),
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def record_failures(failures: list[SendFailure], now: datetime) -> None:
+    """
+    Schedule the retry of transiently failed messages and dead-letter the rest.
+
+    Messages that failed permanently or RETRY_MAX_ATTEMPTS times are moved to
+    the dead-letter table. Messages whose lease was taken over by another
+    worker are left to that worker.
+    """
+    errors = {message.pk: error for message, error in failures}
+    for token, messages in group_by_lease([message for message, _ in failures]):
+        _record_leased_failures(token, messages, errors, now)
+
+
+def _record_leased_failures(
+    token: str,
+    messages: list[OutboxMessage],
+    errors: dict[int, Exception],
+    now: datetime,
+) -> None:
+    retries = []
+    dead = []
+    for message in messages:
+        error = errors[message.pk]
+        message.attempts += 1
+        message.last_error = f"{type(error).__name__}: {error}"
+        if is_transient(error) and message.attempts < app_setting("RETRY_MAX_ATTEMPTS"):
+            message.next_attempt_at = now + timedelta(
+                seconds=backoff_delay(message.attempts)
+            )
+            message.lease_token = ""
+            message.lease_expires_at = None
+            retries.append(message)
+        else:
+            dead.append(message)
+    with transaction.atomic():
+        OutboxMessage.objects.filter(lease_token=token).bulk_update(
+            retries,
+            [
+                "attempts",
+                "last_error",
+                "next_attempt_at",
+                "lease_token",
+                "lease_expires_at",
+            ],
+        )
+        owned = owned_ids(
+            OutboxMessage.objects.filter(pk__in=[message.pk for message in dead]),
+            token,
+        )
+        DeadLetterMessage.objects.bulk_create(
+            DeadLetterMessage.from_outbox_message(message)
+            for message in dead
+            if message.pk in owned
+        )
+        OutboxMessage.objects.filter(pk__in=owned).delete()
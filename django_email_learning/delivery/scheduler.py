@@ -0,0 +1,137 @@
+import logging
+from collections.abc import Iterator
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+
+from django_email_learning.conf import app_setting
+from django_email_learning.delivery.leases import (
+    claim,
+    default_lease_owner,
+    group_by_lease,
+    owned_ids,
+)
+from django_email_learning.delivery.messages import build_outbox_message
+from django_email_learning.delivery.outbox import drain_outbox
+from django_email_learning.models import BlockedEmail, Enrollment, OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def due_enrollments(now: datetime) -> QuerySet[Enrollment]:
+    """
+    Return the enrollments whose next content is due at ``now``.
+
+    The lookup is a range scan over the (next_due_at, status) index, completed
+    enrollments have no due date and are never part of it.
+    """
+    return (
+        Enrollment.objects.filter(
+            next_due_at__lte=now, status="active", course__enabled=True
+        )
+        .filter(
+            Q(next_content__lesson__is_published=True)
+            | Q(next_content__quiz__is_published=True)
+        )
+        .exclude(email__in=BlockedEmail.objects.values("email"))
+    )
+
+
+def claim_due_enrollments(
+    owner: str, now: datetime, limit: int, lease_seconds: int | None = None
+) -> list[Enrollment]:
+    """
+    Lease up to ``limit`` due enrollments to ``owner`` and return them.
+
+    Claimed enrollments are skipped by the other workers until they are
+    advanced or their lease expires, so every due content is claimed by
+    exactly one worker.
+    """
+    ids = claim(
+        due_enrollments(now).order_by("next_due_at", "pk"),
+        owner,
+        limit,
+        lease_seconds or app_setting("LEASE_SECONDS"),
+    )
+    if not ids:
+        return []
+    return list(
+        Enrollment.objects.filter(pk__in=ids)
+        .select_related(
+            "course__imap_connection", "next_content__lesson", "next_content__quiz"
+        )
+        .prefetch_related("next_content__quiz__questions__answers")
+        .order_by("next_due_at", "pk")
+    )
+
+
+def iter_claimed_chunks(
+    now: datetime, chunk_size: int, owner: str | None = None
+) -> Iterator[list[Enrollment]]:
+    """
+    Claim and yield the due enrollments in chunks of at most ``chunk_size``.
+
+    Enrollments that are not advanced keep their lease, so they are not
+    claimed again during the same pass.
+    """
+    owner = owner or default_lease_owner()
+    while chunk := claim_due_enrollments(owner, now, chunk_size):
+        yield chunk
+
+
+def build_outbox_messages(chunk: list[Enrollment]) -> list[OutboxMessage]:
+    """Render the next content of every enrollment, skipping broken content."""
+    messages = []
+    for enrollment in chunk:
+        try:
+            message = build_outbox_message(enrollment, enrollment.next_content)  # type: ignore[arg-type]
+        except ValueError:
+            logger.exception(f"Can not build the message for {enrollment}")
+            continue
+        messages.append(message)
+    return messages
+
+
+def schedule_due_content(
+    now: datetime | None = None, chunk_size: int = 500, owner: str | None = None
+) -> int:
+    """
+    Queue the next content of every learner it is due for in the outbox.
+
+    The messages of a chunk are inserted with one bulk_create in the same
+    transaction that records the content as sent, so a content is queued
+    exactly once. Enrollments whose lease was taken over by another worker
+    are left to that worker. Returns the number of queued messages.
+    """
+    now = now or timezone.now()
+    queued = 0
+    for chunk in iter_claimed_chunks(now, chunk_size, owner):
+        for token, enrollments in group_by_lease(chunk):
+            messages = build_outbox_messages(enrollments)
+            with transaction.atomic():
+                owned = owned_ids(
+                    Enrollment.objects.filter(pk__in=[e.pk for e in enrollments]),
+                    token,
+                )
+                messages = [m for m in messages if m.enrollment_id in owned]
+                for message in messages:
+                    message.next_attempt_at = now
+                OutboxMessage.objects.bulk_create(messages)
+                Enrollment.objects.filter(
+                    pk__in=[message.enrollment_id for message in messages],
+                    lease_token=token,
+                ).content_sent(now)
+            queued += len(messages)
+    return queued
+
+
+def deliver_due_content(now: datetime | None = None, chunk_size: int = 500) -> int:
+    """
+    Queue the due content in the outbox and send the pending outbox messages.
+
+    Returns the number of messages sent.
+    """
+    schedule_due_content(now, chunk_size)
+    return drain_outbox(now, chunk_size)
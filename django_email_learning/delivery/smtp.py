@@ -0,0 +1,304 @@
+import re
+import smtplib
+import ssl
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import sanitize_address
+
+from django_email_learning.conf import app_setting
+from django_email_learning.models import ImapConnection
+
+
+@dataclass(frozen=True)
+class SmtpIdentity:
+    """The SMTP server and the account used to send emails."""
+
+    host: str
+    port: int
+    username: str = ""
+    password: str = field(default="", repr=False)
+    use_ssl: bool = False
+    # Log in without TLS to servers that don't offer STARTTLS.
+    allow_plaintext: bool = False
+
+    @classmethod
+    def from_imap_connection(cls, connection: ImapConnection) -> "SmtpIdentity":
+        return cls(
+            host=connection.smtp_server,
+            port=connection.smtp_port,
+            username=connection.email,
+            password=connection.decrypt_password(connection.password),
+            use_ssl=connection.smtp_port == 465,
+            allow_plaintext=connection.allow_plaintext,
+        )
+
+
+def _message_data(message: bytes) -> bytes:
+    message = re.sub(rb"\r\n|\n|\r", b"\r\n", message)
+    message = re.sub(rb"(?m)^\.", b"..", message)
+    if not message.endswith(b"\r\n"):
+        message += b"\r\n"
+    return message + b".\r\n"
+
+
+def pipelined_sendmail(
+    smtp: smtplib.SMTP, from_addr: str, to_addrs: Sequence[str], message: bytes
+) -> dict[str, tuple[int, bytes]]:
+    """
+    Send a message, with MAIL, RCPT and DATA in a single round trip when the
+    server supports PIPELINING (RFC 2920).
+
+    Raises the same exceptions and returns the refused recipients like
+    smtplib.SMTP.sendmail().
+    """
+    if not smtp.has_extn("pipelining"):
+        return smtp.sendmail(from_addr, list(to_addrs), message)
+
+    commands = [f"MAIL FROM:{smtplib.quoteaddr(from_addr)}"]
+    commands += [f"RCPT TO:{smtplib.quoteaddr(address)}" for address in to_addrs]
+    commands.append("DATA")
+    smtp.send(("\r\n".join(commands) + "\r\n").encode("ascii"))
+
+    mail_code, mail_response = smtp.getreply()
+    refused = {}
+    for address in to_addrs:
+        code, response = smtp.getreply()
+        if code not in (250, 251):
+            refused[address] = (code, response)
+    data_code, data_response = smtp.getreply()
+
+    if data_code == 354 and (mail_code != 250 or len(refused) == len(to_addrs)):
+        # The server should have rejected DATA, end the empty message so the
+        # connection stays usable.
+        smtp.send(b".\r\n")
+        smtp.getreply()
+        data_code = 554
+    if mail_code != 250:
+        smtp.rset()
+        raise smtplib.SMTPSenderRefused(mail_code, mail_response, from_addr)
+    if len(refused) == len(to_addrs):
+        smtp.rset()
+        raise smtplib.SMTPRecipientsRefused(refused)  # type: ignore[arg-type]
+    if data_code != 354:
+        smtp.rset()
+        raise smtplib.SMTPDataError(data_code, data_response)
+
+    smtp.send(_message_data(message))
+    code, response = smtp.getreply()
+    if code != 250:
+        smtp.rset()
+        raise smtplib.SMTPDataError(code, response)
+    return refused
+
+
+class PooledSmtpConnection:
+    """
+    An SMTP connection of a pool.
+
+    Plain connections are upgraded with STARTTLS, servers that don't offer it
+    are refused for authenticated identities unless they allow plaintext.
+    """
+
+    def __init__(self, identity: SmtpIdentity, timeout: float) -> None:
+        smtp_class = smtplib.SMTP_SSL if identity.use_ssl else smtplib.SMTP
+        self.smtp = smtp_class(identity.host, identity.port, timeout=timeout)
+        try:
+            self.smtp.ehlo()
+            if not identity.use_ssl and self.smtp.has_extn("starttls"):
+                self.smtp.starttls(context=ssl.create_default_context())
+                self.smtp.ehlo()
+            elif (
+                not identity.use_ssl
+                and identity.username
+                and not identity.allow_plaintext
+            ):
+                raise smtplib.SMTPNotSupportedError(
+                    f"{identity.host}:{identity.port} doesn't offer STARTTLS"
+                )
+            if identity.username:
+                self.smtp.login(identity.username, identity.password)
+        except BaseException:
+            self.smtp.close()
+            raise
+        self.sent_messages = 0
+        self.idle_since = time.monotonic()
+
+    def is_alive(self, check_after: float, max_idle: float) -> bool:
+        """
+        Return whether the connection can be reused. Connections idle for
+        less than ``check_after`` seconds are reused without a round trip,
+        connections idle for longer than ``max_idle`` seconds are assumed to
+        be closed by the server and the others are checked with NOOP.
+        """
+        idle = time.monotonic() - self.idle_since
+        if idle > max_idle:
+            return False
+        if idle < check_after:
+            return True
+        try:
+            return self.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, message: EmailMessage) -> bool:
+        recipients = message.recipients()
+        if not recipients:
+            return False
+        encoding = message.encoding or "utf-8"
+        from_addr = sanitize_address(message.from_email, encoding)
+        to_addrs = [sanitize_address(address, encoding) for address in recipients]
+        pipelined_sendmail(
+            self.smtp,
+            from_addr,
+            to_addrs,
+            message.message().as_bytes(linesep="\r\n"),
+        )
+        self.sent_messages += 1
+        return True
+
+    def close(self) -> None:
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class SmtpConnectionPool:
+    """
+    A bounded pool of authenticated SMTP connections for one identity.
+
+    Connections are reused across messages and threads, closed after
+    ``max_messages_per_connection`` messages and discarded on any error.
+    Connections idle for at least ``idle_check_after`` seconds are checked
+    before they are reused and replaced when they don't answer or were idle
+    for longer than ``max_idle`` seconds.
+    """
+
+    def __init__(
+        self,
+        identity: SmtpIdentity,
+        max_connections: int,
+        max_messages_per_connection: int,
+        timeout: float = 30,
+        idle_check_after: float = 5,
+        max_idle: float = 60,
+    ) -> None:
+        self.identity = identity
+        self.max_messages_per_connection = max_messages_per_connection
+        self.timeout = timeout
+        self.idle_check_after = idle_check_after
+        self.max_idle = max_idle
+        self._idle: list[PooledSmtpConnection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_connections)
+
+    def _checkout(self) -> PooledSmtpConnection:
+        """Return a live idle connection or else a new one."""
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return PooledSmtpConnection(self.identity, self.timeout)
+            if connection.is_alive(self.idle_check_after, self.max_idle):
+                return connection
+            connection.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledSmtpConnection]:
+        with self._slots:
+            connection = self._checkout()
+            try:
+                yield connection
+            except BaseException:
+                connection.close()
+                raise
+            if connection.sent_messages >= self.max_messages_per_connection:
+                connection.close()
+            else:
+                connection.idle_since = time.monotonic()
+                with self._lock:
+                    self._idle.append(connection)
+
+    def send_messages(self, messages: Sequence[EmailMessage]) -> int:
+        sent = position = 0
+        while position < len(messages):
+            with self.connection() as connection:
+                while (
+                    position < len(messages)
+                    and connection.sent_messages < self.max_messages_per_connection
+                ):
+                    sent += connection.send(messages[position])
+                    position += 1
+        return sent
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+_pools: dict[SmtpIdentity, SmtpConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(identity: SmtpIdentity) -> SmtpConnectionPool:
+    with _pools_lock:
+        pool = _pools.get(identity)
+        if pool is None:
+            pool = SmtpConnectionPool(
+                identity,
+                max_connections=app_setting("SMTP_POOL_SIZE"),
+                max_messages_per_connection=app_setting(
+                    "SMTP_MAX_MESSAGES_PER_CONNECTION"
+                ),
+                timeout=app_setting("SMTP_TIMEOUT"),
+                idle_check_after=app_setting("SMTP_IDLE_CHECK_AFTER"),
+                max_idle=app_setting("SMTP_MAX_IDLE"),
+            )
+            _pools[identity] = pool
+    return pool
+
+
+def close_pools() -> None:
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+class PooledEmailBackend(BaseEmailBackend):
+    """Email backend sending through the process-wide pool of an identity."""
+
+    def __init__(
+        self, identity: SmtpIdentity, fail_silently: bool = False, **kwargs: Any
+    ) -> None:
+        super().__init__(fail_silently=fail_silently, **kwargs)
+        self.pool = get_pool(identity)
+
+    def send_messages(self, email_messages: Sequence[EmailMessage]) -> int:
+        try:
+            return self.pool.send_messages(email_messages)
+        except (smtplib.SMTPException, OSError):
+            if not self.fail_silently:
+                raise
+            return 0
+
+
+def get_email_backend(connection: ImapConnection | None) -> BaseEmailBackend:
+    """
+    Return the backend sending emails of courses using the given connection.
+
+    Connections without an SMTP server use the default backend of the project.
+    """
+    if connection is None or not connection.smtp_server:
+        return get_connection()
+    return PooledEmailBackend(SmtpIdentity.from_imap_connection(connection))
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import close_old_connections
+from django.utils import timezone
+
+from django_email_learning.delivery.leases import default_lease_owner
+from django_email_learning.delivery.outbox import (
+    iter_claimed_outbox,
+    mark_sent,
+    throttle,
+)
+from django_email_learning.delivery.ratelimit import smtp_host
+from django_email_learning.delivery.retries import SendFailure, record_failures
+from django_email_learning.delivery.scheduler import schedule_due_content
+from django_email_learning.delivery.smtp import get_email_backend
+from django_email_learning.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+SendJob = tuple[OutboxMessage, str, BaseEmailBackend]
+
+
+class DeliveryWorker:
+    """
+    Deliver due content with many concurrent sends.
+
+    The ORM is only used at batch boundaries: the due content is queued in the
+    outbox, a batch of pending outbox messages is claimed at once, its
+    messages are sent concurrently and the messages that were sent are marked
+    with a single bulk UPDATE. Concurrent sends are limited globally and per
+    SMTP host, and every batch is throttled by the rate limits of its sending
+    accounts and hosts.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        concurrency: int,
+        concurrency_per_host: int,
+        owner: str | None = None,
+    ) -> None:
+        self.owner = owner or default_lease_owner()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.concurrency_per_host = concurrency_per_host
+
+    def _prepare_batch(
+        self, batches: Iterator[list[OutboxMessage]]
+    ) -> tuple[list[SendJob], list[SendFailure]] | None:
+        """
+        Claim the next batch and return its send jobs and the messages whose
+        email backend could not be created, e.g. because the password of the
+        account can't be decrypted.
+        """
+        batch = next(batches, None)
+        if batch is None:
+            return None
+        jobs = []
+        failures: list[SendFailure] = []
+        backends: dict[int | None, BaseEmailBackend | Exception] = {}
+        for message in throttle(batch):
+            connection = message.imap_connection
+            if message.imap_connection_id not in backends:
+                try:
+                    backends[message.imap_connection_id] = get_email_backend(connection)
+                except Exception as error:
+                    logger.exception(
+                        f"Creating the email backend of {connection} failed"
+                    )
+                    backends[message.imap_connection_id] = error
+            backend = backends[message.imap_connection_id]
+            if isinstance(backend, Exception):
+                failures.append((message, backend))
+            else:
+                jobs.append((message, smtp_host(connection), backend))
+        return jobs, failures
+
+    async def _send(
+        self,
+        job: SendJob,
+        global_slots: asyncio.Semaphore,
+        host_slots: dict[str, asyncio.Semaphore],
+        executor: ThreadPoolExecutor,
+    ) -> SendFailure | None:
+        message, host, backend = job
+        if host not in host_slots:
+            host_slots[host] = asyncio.Semaphore(self.concurrency_per_host)
+        async with global_slots, host_slots[host]:
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    executor, backend.send_messages, [message.to_email_message()]
+                )
+            except Exception as error:
+                logger.exception(f"Sending outbox message {message.pk} failed")
+                return message, error
+        return None
+
+    def _finish_batch(
+        self, delivered: list[OutboxMessage], failures: list[SendFailure]
+    ) -> None:
+        finished_at = timezone.now()
+        mark_sent(delivered, finished_at)
+        record_failures(failures, finished_at)
+
+    async def deliver_due(self, now: datetime | None = None) -> int:
+        """
+        Queue the content due at ``now``, send the pending outbox messages and
+        return the number of sends.
+        """
+        now = now or timezone.now()
+        await sync_to_async(schedule_due_content)(now, self.batch_size, self.owner)
+        batches = iter_claimed_outbox(now, self.batch_size, self.owner)
+        global_slots = asyncio.Semaphore(self.concurrency)
+        host_slots: dict[str, asyncio.Semaphore] = {}
+        sent = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                prepared = await sync_to_async(self._prepare_batch)(batches)
+                if prepared is None:
+                    return sent
+                jobs, failures = prepared
+                results = await asyncio.gather(
+                    *(
+                        self._send(job, global_slots, host_slots, executor)
+                        for job in jobs
+                    )
+                )
+                failures += [result for result in results if result is not None]
+                failed = {message.pk for message, _ in failures}
+                delivered = [job[0] for job in jobs if job[0].pk not in failed]
+                await sync_to_async(self._finish_batch)(delivered, failures)
+                sent += len(delivered)
+
+    async def run(self, poll_interval: float) -> None:
+        """
+        Deliver the due content every ``poll_interval`` seconds. A pass that
+        fails is logged and the worker carries on with the next one.
+        """
+        while True:
+            try:
+                # The worker is long-lived, so database connections that
+                # timed out are replaced before every pass.
+                await sync_to_async(close_old_connections)()
+                sent = await self.deliver_due()
+            except Exception:
+                logger.exception("Delivery pass failed")
+            else:
+                logger.info(f"Delivery worker sent {sent} messages")
+            await asyncio.sleep(poll_interval)
@@ -0,0 +1,115 @@
+import sys
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass
+from itertools import chain
+
+from django_email_learning.answer_keys import AnswerKey
+
+# Array typecodes used as lanes, from the narrowest to the widest.
+LANE_TYPECODES = ("B", "H", "I", "L", "Q")
+
+
+@dataclass(frozen=True)
+class BatchGradeResult:
+    """
+    Result of grading a batch of submissions.
+
+    ``correct_counts`` and ``passed`` have one item per submission, while
+    ``question_correctness`` has one array per question with ``1`` for the
+    submissions that answered it correctly.
+    """
+
+    question_count: int
+    correct_counts: array
+    passed: list[bool]
+    question_correctness: tuple[array, ...]
+
+    def __len__(self) -> int:
+        return len(self.passed)
+
+    def score(self, index: int) -> int:
+        """Return the percentage of correctly answered questions."""
+        return self.correct_counts[index] * 100 // self.question_count
+
+    def correct_questions(self, index: int) -> list[bool]:
+        return [bool(column[index]) for column in self.question_correctness]
+
+
+def _lane_typecode(answer_key: AnswerKey) -> str:
+    max_answers = max((len(ids) for ids in answer_key.answer_ids), default=0)
+    for typecode in LANE_TYPECODES:
+        lane_bits = array(typecode).itemsize * 8
+        # The top bit of every lane is kept free to detect mismatches.
+        if max_answers < lane_bits and answer_key.question_count < 2**lane_bits:
+            return typecode
+    raise ValueError("Questions have too many answers to be graded in a batch.")
+
+
+def grade_submissions(
+    answer_key: AnswerKey, submissions: Sequence[Sequence[int]]
+) -> BatchGradeResult:
+    """
+    Grade many submissions of the same quiz at once.
+
+    Each submission holds one selection mask per question, in the question
+    order of the answer key (see AnswerKey.selection_mask). Bits that don't
+    belong to an answer of the question are ignored, as long as the mask
+    fits the lane used for the quiz.
+
+    The masks of each question are packed as lanes of one big integer, so
+    comparing a question for every submission is a handful of integer
+    operations instead of a Python loop.
+    """
+    question_count = answer_key.question_count
+    if any(length != question_count for length in set(map(len, submissions))):
+        raise ValueError(
+            f"Every submission must have exactly {question_count} selections."
+        )
+
+    typecode = _lane_typecode(answer_key)
+    lane_bytes = array(typecode).itemsize
+    lane_bits = lane_bytes * 8
+    size = len(submissions) * lane_bytes
+    byteorder = sys.byteorder
+
+    def pack(lanes: array) -> int:
+        return int.from_bytes(lanes.tobytes(), byteorder)
+
+    def unpack(value: int) -> array:
+        lanes = array(typecode)
+        lanes.frombytes(value.to_bytes(size, byteorder))
+        return lanes
+
+    ones = pack(array(typecode, [1]) * len(submissions))
+    high_bits = ones << (lane_bits - 1)
+    low_bits = high_bits - ones
+
+    # Selections are flattened once, a question's column is then a slice.
+    try:
+        selections = array(typecode, chain.from_iterable(submissions))
+    except OverflowError:
+        raise ValueError("Selections must be non-negative masks of the answers.")
+    correct_counts = 0
+    question_correctness = []
+    for index, (answer_ids, correct_mask) in enumerate(
+        zip(answer_key.answer_ids, answer_key.correct_masks)
+    ):
+        column = selections[index::question_count]
+        selected = pack(column) & (ones * ((1 << len(answer_ids)) - 1))
+        mismatches = selected ^ (ones * correct_mask)
+        # Adding the low bits carries into the top bit of every lane that
+        # has a mismatch, without spilling into the next lane.
+        wrong = (mismatches + low_bits) & high_bits
+        correct = (wrong ^ high_bits) >> (lane_bits - 1)
+        correct_counts += correct
+        question_correctness.append(unpack(correct))
+
+    counts = unpack(correct_counts)
+    threshold = -(-answer_key.required_score * question_count // 100)
+    return BatchGradeResult(
+        question_count=question_count,
+        correct_counts=counts,
+        passed=[count >= threshold for count in counts],
+        question_correctness=tuple(question_correctness),
+    )
@@ -0,0 +1,145 @@
+import imaplib
+import logging
+import re
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from django_email_learning.conf import app_setting
+from django_email_learning.inbound.parsing import FetchedMessage
+from django_email_learning.models import MailboxCheckpoint
+
+logger = logging.getLogger(__name__)
+
+UID_RE = re.compile(rb"\bUID (\d+)")
+FETCH_START_RE = re.compile(rb"^\d+ \(")
+
+MessageHandler = Callable[[MailboxCheckpoint, list[FetchedMessage]], None]
+
+
+def _check(response: tuple[str, list[Any]]) -> list[Any]:
+    status, data = response
+    if status != "OK":
+        raise imaplib.IMAP4.error(f"IMAP command failed: {data!r}")
+    return data
+
+
+def select_mailbox(client: imaplib.IMAP4, mailbox: str) -> int:
+    """Select ``mailbox`` and return its UIDVALIDITY."""
+    _check(client.select(mailbox))
+    _, data = client.response("UIDVALIDITY")
+    if not data or data[0] is None:
+        raise imaplib.IMAP4.error(f"{mailbox} has no UIDVALIDITY")
+    return int(data[-1])
+
+
+def new_uids(client: imaplib.IMAP4, last_uid: int) -> list[int]:
+    """
+    Return the UIDs greater than ``last_uid`` in ascending order.
+
+    ``n:*`` always matches the highest UID of the mailbox, even when it is
+    lower than ``n``, so the result is filtered again.
+    """
+    data = _check(client.uid("SEARCH", f"UID {last_uid + 1}:*"))
+    uids = (int(uid) for uid in b" ".join(data).split())
+    return sorted(uid for uid in uids if uid > last_uid)
+
+
+def parse_fetch_response(data: list[Any]) -> list[FetchedMessage]:
+    """
+    Return the messages of a ``(UID BODY[HEADER] BODY[TEXT]<0>)`` response.
+
+    imaplib returns every literal as a (prefix, literal) tuple, the items of
+    a message can come in any order, so they are collected by their label.
+    """
+    messages = []
+    uid: int | None = None
+    parts: dict[str, bytes] = {}
+
+    def flush() -> None:
+        if uid is not None:
+            messages.append((uid, parts.get("HEADER", b""), parts.get("TEXT", b"")))
+
+    for item in data:
+        prefix = item[0] if isinstance(item, tuple) else item
+        if not isinstance(prefix, bytes):
+            continue
+        if FETCH_START_RE.match(prefix):
+            flush()
+            uid, parts = None, {}
+        if match := UID_RE.search(prefix):
+            uid = int(match.group(1))
+        if isinstance(item, tuple):
+            label = prefix.rsplit(b"BODY[", 1)[-1].split(b"]", 1)[0]
+            parts[label.decode()] = item[1]
+    flush()
+    return messages
+
+
+def fetch_range(
+    client: imaplib.IMAP4, uids: Sequence[int], body_bytes: int
+) -> list[FetchedMessage]:
+    """
+    Fetch the header and the first ``body_bytes`` of the body of the
+    messages of ``uids``, a sorted batch, with one UID FETCH.
+
+    Replies are read from their first lines, so big attachments and long
+    quoted history are never downloaded.
+    """
+    data = _check(
+        client.uid(
+            "FETCH",
+            f"{uids[0]}:{uids[-1]}",
+            f"(UID BODY.PEEK[HEADER] BODY.PEEK[TEXT]<0.{body_bytes}>)",
+        )
+    )
+    wanted = set(uids)
+    return [message for message in parse_fetch_response(data) if message[0] in wanted]
+
+
+def sync_mailbox(
+    client: imaplib.IMAP4,
+    imap_connection_id: int,
+    handle: MessageHandler,
+    batch_size: int = 100,
+    mailbox: str = "INBOX",
+    body_bytes: int | None = None,
+) -> int:
+    """
+    Pass the messages that arrived since the last sync to ``handle``.
+
+    Only ``UID n+1:*`` is searched and fetched, where n is the highest UID of
+    the checkpoint, so the cost of a sync is proportional to the new mail and
+    not to the size of the mailbox. The checkpoint is moved after every batch
+    ``handle`` processed, a batch that failed is fetched again by the next
+    sync. When the UIDVALIDITY of the mailbox changed the old UIDs are
+    meaningless and the whole mailbox is synced again.
+
+    Returns the number of handled messages.
+    """
+    body_bytes = body_bytes or app_setting("IMAP_PARTIAL_BODY_BYTES")
+    uidvalidity = select_mailbox(client, mailbox)
+    checkpoint, _ = MailboxCheckpoint.objects.get_or_create(
+        imap_connection_id=imap_connection_id, mailbox=mailbox
+    )
+    if checkpoint.uidvalidity != uidvalidity:
+        if checkpoint.uidvalidity:
+            logger.warning(
+                f"UIDVALIDITY of {mailbox} of ImapConnection {imap_connection_id} "
+                "changed, syncing the whole mailbox again"
+            )
+        checkpoint.uidvalidity = uidvalidity
+        checkpoint.last_uid = 0
+        checkpoint.save(update_fields=["uidvalidity", "last_uid", "updated_at"])
+
+    handled = 0
+    uids = new_uids(client, checkpoint.last_uid)
+    for start in range(0, len(uids), batch_size):
+        batch = uids[start : start + batch_size]
+        # Messages expunged since the search are missing from the batch.
+        messages = fetch_range(client, batch, body_bytes)
+        if messages:
+            handle(checkpoint, messages)
+        checkpoint.last_uid = batch[-1]
+        checkpoint.save(update_fields=["last_uid", "updated_at"])
+        handled += len(messages)
+    return handled
@@ -0,0 +1,155 @@
+import imaplib
+import re
+import select
+import socket
+import ssl
+import threading
+import time
+from dataclasses import dataclass, field
+
+from django_email_learning.models import ImapConnection
+
+NEW_MAIL_RE = re.compile(rb"^\* \d+ (EXISTS|RECENT)\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class ImapIdentity:
+    """The IMAP server and the account learners reply to."""
+
+    host: str
+    port: int
+    username: str
+    password: str = field(repr=False)
+    use_ssl: bool = True
+    # Log in without TLS to servers that don't offer STARTTLS.
+    allow_plaintext: bool = False
+
+    @classmethod
+    def from_imap_connection(cls, connection: ImapConnection) -> "ImapIdentity":
+        return cls(
+            host=connection.server,
+            port=connection.port,
+            username=connection.email,
+            password=connection.decrypt_password(connection.password),
+            use_ssl=connection.port == 993,
+            allow_plaintext=connection.allow_plaintext,
+        )
+
+
+def connect(
+    identity: ImapIdentity, timeout: float, mailbox: str = "INBOX"
+) -> imaplib.IMAP4:
+    """
+    Open an authenticated IMAP connection with ``mailbox`` selected.
+
+    Plain connections are upgraded with STARTTLS, servers that don't offer it
+    are refused unless the identity allows plaintext.
+    """
+    client: imaplib.IMAP4
+    if identity.use_ssl:
+        client = imaplib.IMAP4_SSL(
+            identity.host,
+            identity.port,
+            ssl_context=ssl.create_default_context(),
+            timeout=timeout,
+        )
+    else:
+        client = imaplib.IMAP4(identity.host, identity.port, timeout=timeout)
+    try:
+        if not identity.use_ssl and "STARTTLS" in client.capabilities:
+            client.starttls(ssl.create_default_context())
+        elif not identity.use_ssl and not identity.allow_plaintext:
+            raise imaplib.IMAP4.error(
+                f"{identity.host}:{identity.port} doesn't offer STARTTLS"
+            )
+        client.login(identity.username, identity.password)
+        # Servers often advertise more capabilities, IDLE among them, once
+        # the client is authenticated.
+        _, data = client.capability()
+        client.capabilities = tuple(data[-1].decode().upper().split())  # type: ignore[union-attr]
+        client.select(mailbox)
+    except BaseException:
+        client.shutdown()
+        raise
+    return client
+
+
+class _LineReader:
+    """
+    Read lines from the socket of an IMAP client with a timeout.
+
+    imaplib reads through a buffered file that can not be used again after a
+    read timed out, so IDLE responses are read from the socket directly.
+    """
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.buffer = b""
+
+    def _ready(self, timeout: float) -> bool:
+        if isinstance(self.sock, ssl.SSLSocket) and self.sock.pending():
+            return True
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        return bool(readable)
+
+    def readline(self, timeout: float) -> bytes | None:
+        """Return the next line, b"" when the server closed the connection and
+        None when no line arrived before ``timeout``."""
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self.buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self._ready(remaining):
+                return None
+            data = self.sock.recv(4096)
+            if not data:
+                return b""
+            self.buffer += data
+        line, _, self.buffer = self.buffer.partition(b"\n")
+        return line + b"\n"
+
+
+def idle(
+    client: imaplib.IMAP4,
+    timeout: float,
+    stop: threading.Event,
+    check_interval: float = 1.0,
+) -> bool:
+    """
+    Wait with the IDLE command (RFC 2177) until new mail arrives in the
+    selected mailbox, ``timeout`` passes or ``stop`` is set.
+
+    Returns whether new mail arrived. Raises imaplib.IMAP4.abort when the
+    server closes the connection.
+    """
+    response_timeout = client.sock.gettimeout() or 30
+    tag = client._new_tag()
+    client.send(tag + b" IDLE\r\n")
+    reader = _LineReader(client.sock)
+    line = reader.readline(response_timeout)
+    if not line or not line.startswith(b"+"):
+        raise imaplib.IMAP4.abort(f"IDLE was rejected: {line!r}")
+
+    new_mail = False
+    deadline = time.monotonic() + timeout
+    while not stop.is_set() and (remaining := deadline - time.monotonic()) > 0:
+        line = reader.readline(min(check_interval, remaining))
+        if line is None:
+            continue
+        if not line or line.startswith(b"* BYE"):
+            raise imaplib.IMAP4.abort("The server closed the connection")
+        if NEW_MAIL_RE.match(line):
+            new_mail = True
+            break
+
+    client.send(b"DONE\r\n")
+    while True:
+        line = reader.readline(response_timeout)
+        if not line:
+            raise imaplib.IMAP4.abort("No response to DONE")
+        if line.startswith(tag):
+            break
+        if NEW_MAIL_RE.match(line):
+            new_mail = True
+    if not line[len(tag) :].lstrip().upper().startswith(b"OK"):
+        raise imaplib.IMAP4.error(f"IDLE failed: {line!r}")
+    return new_mail
@@ -0,0 +1,166 @@
+import imaplib
+import logging
+import random
+import threading
+from collections.abc import Callable, Iterable
+
+from django_email_learning.conf import app_setting
+from django_email_learning.inbound.imap import ImapIdentity, connect, idle
+from django_email_learning.models import ImapConnection
+
+logger = logging.getLogger(__name__)
+
+NewMailHandler = Callable[[int, imaplib.IMAP4], None]
+
+
+def reconnect_delay(failures: int) -> float:
+    """Seconds to wait before reconnecting after ``failures`` failed attempts."""
+    delay = min(
+        app_setting("IMAP_RECONNECT_MAX_DELAY"),
+        app_setting("IMAP_RECONNECT_BASE_DELAY") * 2 ** (failures - 1),
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class MailboxListener(threading.Thread):
+    """
+    Keep one authenticated connection to the inbox of an ImapConnection and
+    call ``on_new_mail`` with its id and the connected client whenever new
+    mail arrives.
+
+    The handler is also called after every (re)connection, to catch up on the
+    mail that arrived while the listener was not connected. Servers without
+    IDLE support are polled with NOOP every ``poll_interval`` seconds.
+    Connection errors are retried with an exponential backoff until ``stop``
+    is set.
+    """
+
+    def __init__(
+        self,
+        imap_connection_id: int,
+        identity: ImapIdentity,
+        on_new_mail: NewMailHandler,
+        stop: threading.Event,
+        idle_timeout: float,
+        poll_interval: float,
+    ) -> None:
+        super().__init__(name=f"imap-listener-{imap_connection_id}", daemon=True)
+        self.imap_connection_id = imap_connection_id
+        self.identity = identity
+        self.on_new_mail = on_new_mail
+        self.stop = stop
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.connections = 0
+
+    def run(self) -> None:
+        failures = 0
+        while not self.stop.is_set():
+            try:
+                client = connect(self.identity, app_setting("IMAP_TIMEOUT"))
+            except Exception:
+                failures += 1
+                logger.exception(f"Connecting to {self.identity.host} failed")
+                self.stop.wait(reconnect_delay(failures))
+                continue
+            failures = 0
+            self.connections += 1
+            try:
+                self.listen(client)
+            except Exception:
+                failures += 1
+                logger.exception(f"Listening to {self.identity.username} failed")
+                self.stop.wait(reconnect_delay(failures))
+            finally:
+                try:
+                    client.logout()
+                except Exception:
+                    client.shutdown()
+
+    def listen(self, client: imaplib.IMAP4) -> None:
+        self.notify(client)
+        supports_idle = "IDLE" in client.capabilities
+        while not self.stop.is_set():
+            if supports_idle:
+                new_mail = idle(client, self.idle_timeout, self.stop)
+            else:
+                if self.stop.wait(self.poll_interval):
+                    return
+                client.noop()
+                new_mail = client.response("EXISTS")[1] != [None]
+            if new_mail:
+                self.notify(client)
+
+    def notify(self, client: imaplib.IMAP4) -> None:
+        try:
+            self.on_new_mail(self.imap_connection_id, client)
+        except imaplib.IMAP4.abort:
+            raise
+        except Exception:
+            logger.exception(
+                f"Handling new mail of ImapConnection {self.imap_connection_id} failed"
+            )
+
+
+class MailboxListeners:
+    """
+    The MailboxListener threads of a set of ImapConnections.
+
+    ``update`` is called with the current connections, whenever they may have
+    changed, to start listening to new connections, restart the listeners of
+    edited ones and stop listening to deleted ones. Connections whose account
+    can't be read, for example when their password can't be decrypted, are
+    logged and skipped until they are fixed.
+    """
+
+    def __init__(
+        self,
+        on_new_mail: NewMailHandler,
+        idle_timeout: float | None = None,
+        poll_interval: float | None = None,
+    ) -> None:
+        self.on_new_mail = on_new_mail
+        self.idle_timeout = idle_timeout or app_setting("IMAP_IDLE_TIMEOUT")
+        self.poll_interval = poll_interval or app_setting("IMAP_POLL_INTERVAL")
+        self.listeners: dict[int, MailboxListener] = {}
+        self.stopped: list[MailboxListener] = []
+
+    def __len__(self) -> int:
+        return len(self.listeners)
+
+    def update(self, connections: Iterable[ImapConnection]) -> None:
+        identities = {}
+        for connection in connections:
+            try:
+                identities[connection.pk] = ImapIdentity.from_imap_connection(
+                    connection
+                )
+            except Exception:
+                logger.exception(f"Reading the account of {connection} failed")
+        for pk, listener in list(self.listeners.items()):
+            if identities.get(pk) != listener.identity:
+                listener.stop.set()
+                self.stopped.append(self.listeners.pop(pk))
+        self.stopped = [listener for listener in self.stopped if listener.is_alive()]
+        for pk, identity in identities.items():
+            if pk not in self.listeners:
+                listener = MailboxListener(
+                    pk,
+                    identity,
+                    self.on_new_mail,
+                    threading.Event(),
+                    self.idle_timeout,
+                    self.poll_interval,
+                )
+                listener.start()
+                self.listeners[pk] = listener
+
+    def stop(self) -> None:
+        """Stop every listener and wait for them to disconnect."""
+        listeners = [*self.listeners.values(), *self.stopped]
+        for listener in listeners:
+            listener.stop.set()
+        for listener in listeners:
+            listener.join()
+        self.listeners = {}
+        self.stopped = []
@@ -0,0 +1,201 @@
+import binascii
+import io
+import quopri
+import re
+from collections.abc import Iterable, Iterator
+from email.header import decode_header, make_header
+from email.message import Message
+from email.parser import BytesHeaderParser
+from email.utils import parseaddr
+from typing import NamedTuple
+
+SLUG_RE = re.compile(r"\[([-a-zA-Z0-9_]+)\]")
+TOKEN_RE = re.compile(r"[^\s,;]+")
+QUOTE_HEADER_RE = re.compile(
+    r"^(On .+ wrote:|-+ ?Original Message ?-+)$", re.IGNORECASE
+)
+# Lines longer than this are cut, to bound the memory used per message.
+MAX_LINE_LENGTH = 1000
+
+
+# The UID, the header and the start of the body of a message.
+FetchedMessage = tuple[int, bytes, bytes]
+
+
+class ParsedReply(NamedTuple):
+    """The parts of a learner reply the app acts on."""
+
+    uid: int
+    sender: str
+    slug: str
+    tokens: tuple[str, ...]
+    subject: str = ""
+
+
+def _header(message: Message, name: str) -> str:
+    value = message.get(name)
+    if value is None:
+        return ""
+    try:
+        return str(make_header(decode_header(value)))
+    except (LookupError, UnicodeError, ValueError):
+        return str(value)
+
+
+class _Part:
+    """Content headers of a MIME part."""
+
+    def __init__(self, headers: Message) -> None:
+        self.content_type = headers.get_content_type()
+        self.boundary = headers.get_boundary()
+        self.charset = headers.get_content_charset() or "utf-8"
+        self.encoding = str(headers.get("Content-Transfer-Encoding", "7bit")).lower()
+        self.attachment = headers.get_content_disposition() == "attachment"
+
+
+class _TextDecoder:
+    """Decode the lines of a text part incrementally into text lines."""
+
+    def __init__(self, part: _Part) -> None:
+        self.part = part
+        self.pending = b""
+
+    def feed(self, line: bytes) -> Iterator[str]:
+        if self.part.encoding == "base64":
+            try:
+                self.pending += binascii.a2b_base64(line)
+            except binascii.Error:
+                return
+        elif self.part.encoding == "quoted-printable":
+            # Soft line breaks decode to nothing, so the line continues.
+            self.pending += quopri.decodestring(line)
+        else:
+            self.pending += line
+        *lines, pending = self.pending.split(b"\n")
+        self.pending = pending[: MAX_LINE_LENGTH * 4]
+        for text in lines:
+            yield self.decode(text)
+
+    def decode(self, data: bytes) -> str:
+        try:
+            return data.decode(self.part.charset, errors="replace")[:MAX_LINE_LENGTH]
+        except LookupError:
+            return data.decode("utf-8", errors="replace")[:MAX_LINE_LENGTH]
+
+
+class ReplyScanner:
+    """
+    Extract the course slug and the answer tokens of a reply while its body
+    is fed line by line.
+
+    The slug is read from the ``[slug]`` in the subject. The tokens are the
+    words of the first line of the first text/plain part that is not empty
+    and not quoted. Scanning stops as soon as that line was found, so the rest
+    of the body, quoted history and attachments are never decoded. Only the
+    headers of the current part and one line are kept in memory.
+    """
+
+    def __init__(self, uid: int, header: bytes) -> None:
+        headers = BytesHeaderParser().parsebytes(header)
+        self.uid = uid
+        self.sender = parseaddr(_header(headers, "From"))[1].lower()
+        self.subject = _header(headers, "Subject")[:MAX_LINE_LENGTH]
+        match = SLUG_RE.search(self.subject)
+        self.slug = match.group(1).lower() if match else ""
+        self.tokens: tuple[str, ...] | None = None
+        self.boundaries: list[bytes] = []
+        self.part_headers: list[bytes] | None = None
+        self.decoder: _TextDecoder | None = None
+        self._start_part(_Part(headers))
+
+    @property
+    def done(self) -> bool:
+        return self.tokens is not None
+
+    def _start_part(self, part: _Part) -> None:
+        self.decoder = None
+        if part.boundary:
+            self.boundaries.append(part.boundary.encode())
+        elif part.content_type == "text/plain" and not part.attachment:
+            self.decoder = _TextDecoder(part)
+        elif not self.boundaries:
+            self.tokens = ()
+
+    def _scan(self, text: str) -> bool:
+        text = text.strip()
+        if not text:
+            return False
+        if text.startswith(">") or QUOTE_HEADER_RE.match(text):
+            self.tokens = ()
+        else:
+            self.tokens = tuple(TOKEN_RE.findall(text))
+        return True
+
+    def _boundary(self, line: bytes) -> bool:
+        for depth in range(len(self.boundaries) - 1, -1, -1):
+            delimiter = b"--" + self.boundaries[depth]
+            if line == delimiter:
+                del self.boundaries[depth + 1 :]
+                self.part_headers = []
+                self.decoder = None
+                return True
+            if line == delimiter + b"--":
+                del self.boundaries[depth:]
+                self.part_headers = None
+                self.decoder = None
+                return True
+        return False
+
+    def feed_line(self, line: bytes) -> bool:
+        """Feed the next line of the body, returns True once done."""
+        if self.done:
+            return True
+        stripped = line.rstrip(b"\r\n")
+        if self.boundaries and stripped.startswith(b"--") and self._boundary(stripped):
+            return False
+        if self.part_headers is not None:
+            if stripped:
+                if len(self.part_headers) < 100:
+                    self.part_headers.append(line[:MAX_LINE_LENGTH])
+                return False
+            part = _Part(BytesHeaderParser().parsebytes(b"".join(self.part_headers)))
+            self.part_headers = None
+            self._start_part(part)
+            return False
+        if self.decoder is not None:
+            return any(self._scan(text) for text in self.decoder.feed(line))
+        return False
+
+    def result(self) -> ParsedReply:
+        if not self.done and self.decoder is not None and self.decoder.pending:
+            self._scan(self.decoder.decode(self.decoder.pending))
+        return ParsedReply(
+            self.uid, self.sender, self.slug, self.tokens or (), self.subject
+        )
+
+
+def parse_reply(uid: int, header: bytes, lines: Iterable[bytes]) -> ParsedReply:
+    """Parse a reply from its header and an iterable over its body lines."""
+    scanner = ReplyScanner(uid, header)
+    for line in lines:
+        if scanner.feed_line(line):
+            break
+    return scanner.result()
+
+
+def parse_chunk(
+    messages: list[FetchedMessage],
+) -> list[tuple[int, str, str, tuple[str, ...], str]]:
+    """
+    Parse a chunk of fetched messages into plain tuples.
+
+    Meant to run in worker processes, plain tuples are cheaper to send back
+    than parsed message objects.
+    """
+    replies = (
+        parse_reply(uid, header, io.BytesIO(body)) for uid, header, body in messages
+    )
+    return [
+        (reply.uid, reply.sender, reply.slug, reply.tokens, reply.subject)
+        for reply in replies
+    ]
@@ -0,0 +1,124 @@
+import logging
+import math
+import multiprocessing
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from types import TracebackType
+
+from django_email_learning.conf import app_setting
+from django_email_learning.inbound.parsing import (
+    FetchedMessage,
+    ParsedReply,
+    parse_chunk,
+)
+from django_email_learning.inbound.router import process_replies
+from django_email_learning.models import InboundReply, MailboxCheckpoint
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_context() -> multiprocessing.context.BaseContext:
+    # parsing.py only imports the standard library, so workers start fast.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+class ParsingStage:
+    """
+    Parse fetched messages, in worker processes when ``workers`` is set.
+
+    Decoding MIME parts is CPU bound and does not scale with threads, so
+    every batch is split in one chunk per worker, of at most ``chunk_size``
+    messages, that are parsed by a pool of ``workers`` processes. Without
+    workers messages are parsed in the calling thread, which is cheaper for
+    small batches. The stage can be shared by threads.
+
+    Workers are started by a fork server, forking the threads of the mailbox
+    listeners could copy locks held by other threads into the workers.
+    """
+
+    def __init__(self, workers: int | None = None, chunk_size: int | None = None):
+        self.workers = (
+            app_setting("INBOUND_PARSE_WORKERS") if workers is None else workers
+        )
+        self.chunk_size = chunk_size or app_setting("INBOUND_PARSE_CHUNK_SIZE")
+        self.executor = (
+            ProcessPoolExecutor(max_workers=self.workers, mp_context=_worker_context())
+            if self.workers
+            else None
+        )
+
+    def __enter__(self) -> "ParsingStage":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def _chunks(self, messages: list[FetchedMessage]) -> Iterator[list[FetchedMessage]]:
+        size = min(self.chunk_size, math.ceil(len(messages) / self.workers))
+        for start in range(0, len(messages), size):
+            yield messages[start : start + size]
+
+    def parse(self, messages: list[FetchedMessage]) -> list[ParsedReply]:
+        if self.executor is None or len(messages) < 2:
+            results = [parse_chunk(messages)]
+        else:
+            results = list(self.executor.map(parse_chunk, self._chunks(messages)))
+        return [ParsedReply._make(reply) for chunk in results for reply in chunk]
+
+
+def store_replies(
+    checkpoint: MailboxCheckpoint, replies: list[ParsedReply]
+) -> list[InboundReply]:
+    """
+    Insert the parsed replies with one bulk INSERT.
+
+    Replies that were stored before, because their batch is synced again
+    after a failure, are skipped.
+    """
+    return InboundReply.objects.bulk_create(
+        [
+            InboundReply(
+                imap_connection_id=checkpoint.imap_connection_id,
+                uidvalidity=checkpoint.uidvalidity,
+                uid=reply.uid,
+                sender=reply.sender[:200],
+                slug=reply.slug[:50],
+                tokens=" ".join(reply.tokens)[:1000],
+                subject=reply.subject[:1000],
+            )
+            for reply in replies
+        ],
+        ignore_conflicts=True,
+    )
+
+
+class ReplyPipeline:
+    """
+    A sync_mailbox handler that parses fetched messages, stores them and
+    dispatches their commands.
+    """
+
+    def __init__(self, stage: ParsingStage) -> None:
+        self.stage = stage
+
+    def __call__(
+        self, checkpoint: MailboxCheckpoint, messages: list[FetchedMessage]
+    ) -> None:
+        replies = self.stage.parse(messages)
+        store_replies(checkpoint, replies)
+        processed = process_replies(checkpoint.imap_connection_id)
+        logger.info(
+            f"Stored {len(replies)} replies of ImapConnection "
+            f"{checkpoint.imap_connection_id}, {processed} had a command"
+        )
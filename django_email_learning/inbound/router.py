@@ -0,0 +1,335 @@
+import logging
+import re
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from django_email_learning.answer_keys import AnswerKey, get_answer_key
+from django_email_learning.conf import app_setting
+from django_email_learning.grading import grade_submissions
+from django_email_learning.models import (
+    Course,
+    Enrollment,
+    ImapConnection,
+    InboundReply,
+    Quiz,
+    QuizSubmission,
+)
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "django_email_learning:course_slugs"
+
+# Every command is matched by this one expression. Answers are the numbers of
+# the chosen answers in question order, several answers to one question are
+# joined with "+". Reply prefixes of subjects are skipped.
+COMMAND_RE = re.compile(
+    r"^\s*(?:(?:re|fwd?|aw|sv)\s*:\s*)*(?:"
+    r"(?P<action>enroll|stop)\s+\[?(?P<slug>[-\w]+)\]?"
+    r"|answer\s+(?P<quiz>\d+)\s+(?P<answers>\d+(?:\+\d+)*(?:[\s,]+\d+(?:\+\d+)*)*)"
+    r")\s*$",
+    re.IGNORECASE,
+)
+ANSWERS_SPLIT_RE = re.compile(r"[\s,]+")
+
+
+@dataclass(frozen=True)
+class CourseSlugs:
+    """The courses of an organization by slug."""
+
+    version: int
+    course_ids: dict[str, int]
+    enabled: frozenset[int]
+    # time.monotonic() when the map was loaded.
+    loaded_at: float
+
+
+_slug_maps: dict[int, CourseSlugs] = {}
+_slug_maps_lock = threading.Lock()
+
+
+def _version_cache_key(organization_id: int) -> str:
+    return f"{CACHE_KEY_PREFIX}:version:{organization_id}"
+
+
+def _current_version(organization_id: int) -> int:
+    version = cache.get(_version_cache_key(organization_id))
+    if version is None:
+        cache.add(_version_cache_key(organization_id), time.time_ns(), timeout=None)
+        version = cache.get(_version_cache_key(organization_id))
+    return version
+
+
+def get_course_slugs(organization_id: int) -> CourseSlugs:
+    """
+    Return the slug to course id map of an organization.
+
+    Maps are kept in process memory under a version stored in Django's cache
+    and for at most COURSE_SLUGS_TTL seconds, so a hit doesn't query the
+    database. The Course signals bump the version, other processes only see
+    the bump when the cache is shared by them, the TTL bounds how long they
+    miss a change otherwise.
+    """
+    version = _current_version(organization_id)
+    slugs = _slug_maps.get(organization_id)
+    if (
+        slugs is not None
+        and slugs.version == version
+        and time.monotonic() - slugs.loaded_at < app_setting("COURSE_SLUGS_TTL")
+    ):
+        return slugs
+
+    course_ids = {}
+    enabled = set()
+    for course_id, slug, is_enabled in Course.objects.filter(
+        organization_id=organization_id
+    ).values_list("id", "slug", "enabled"):
+        course_ids[slug.lower()] = course_id
+        if is_enabled:
+            enabled.add(course_id)
+    slugs = CourseSlugs(version, course_ids, frozenset(enabled), time.monotonic())
+    with _slug_maps_lock:
+        _slug_maps[organization_id] = slugs
+    return slugs
+
+
+def _forget_course_slugs(organization_id: int) -> None:
+    with _slug_maps_lock:
+        _slug_maps.pop(organization_id, None)
+
+
+def invalidate_course_slugs(organization_id: int) -> None:
+    try:
+        cache.incr(_version_cache_key(organization_id))
+    except ValueError:
+        cache.set(_version_cache_key(organization_id), time.time_ns(), timeout=None)
+    _forget_course_slugs(organization_id)
+
+
+def _find_course(organization_id: int, slug: str) -> int | None:
+    """
+    Look up a slug that isn't in the slug map, the course may have been
+    created after the map was loaded. The map is reloaded when it is found.
+    """
+    course_id = (
+        Course.objects.filter(organization_id=organization_id, slug__iexact=slug)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if course_id is not None:
+        _forget_course_slugs(organization_id)
+    return course_id
+
+
+class Command(NamedTuple):
+    action: str
+    sender: str
+    course_id: int = 0
+    quiz_id: int = 0
+    # The selected answer numbers of every question.
+    answers: tuple[tuple[int, ...], ...] = ()
+
+
+def parse_command(organization_id: int, sender: str, text: str) -> Command | None:
+    """Return the command in ``text`` or None when it has none."""
+    match = COMMAND_RE.match(text)
+    if match is None:
+        return None
+    if match["action"]:
+        slug = match["slug"].lower()
+        course_id = get_course_slugs(organization_id).course_ids.get(slug)
+        if course_id is None:
+            course_id = _find_course(organization_id, slug)
+        if course_id is None:
+            return None
+        return Command(match["action"].lower(), sender, course_id=course_id)
+    answers = tuple(
+        tuple(int(number) for number in answer.split("+"))
+        for answer in ANSWERS_SPLIT_RE.split(match["answers"].strip())
+    )
+    return Command("answer", sender, quiz_id=int(match["quiz"]), answers=answers)
+
+
+def route(reply: InboundReply, organization_id: int) -> Command | None:
+    """Find the command of a reply in its first line or else in its subject."""
+    return parse_command(organization_id, reply.sender, reply.tokens) or parse_command(
+        organization_id, reply.sender, reply.subject
+    )
+
+
+Handler = Callable[[Command, int], bool]
+HANDLERS: dict[str, Handler] = {}
+
+
+def handler(action: str) -> Callable[[Handler], Handler]:
+    """Register the handler of an action, it returns whether it acted."""
+
+    def register(function: Handler) -> Handler:
+        HANDLERS[action] = function
+        return function
+
+    return register
+
+
+@handler("enroll")
+def enroll(command: Command, organization_id: int) -> bool:
+    if command.course_id not in get_course_slugs(organization_id).enabled:
+        # The course may have been enabled after the slug map was loaded.
+        if not Course.objects.filter(pk=command.course_id, enabled=True).exists():
+            return False
+        _forget_course_slugs(organization_id)
+    try:
+        with transaction.atomic():
+            Enrollment.objects.enroll(Course(pk=command.course_id), command.sender)
+    except IntegrityError:
+        # Learners who enroll again keep their progress.
+        return (
+            Enrollment.objects.filter(
+                course_id=command.course_id, email=command.sender, status="stopped"
+            ).update(status="active")
+            > 0
+        )
+    return True
+
+
+@handler("stop")
+def stop(command: Command, organization_id: int) -> bool:
+    return (
+        Enrollment.objects.filter(
+            course_id=command.course_id, email=command.sender, status="active"
+        ).update(status="stopped")
+        > 0
+    )
+
+
+def _selection_masks(command: Command, answer_key: AnswerKey) -> list[int] | None:
+    """Return the selection mask of every question, None for invalid answers."""
+    if len(command.answers) != answer_key.question_count:
+        return None
+    masks = []
+    for numbers, positions in zip(command.answers, answer_key.answer_ids):
+        if any(not 0 < number <= len(positions) for number in numbers):
+            return None
+        masks.append(sum(1 << (number - 1) for number in set(numbers)))
+    return masks
+
+
+def grade_answers(
+    answers: Sequence[tuple[int, Command]], organization_id: int
+) -> set[int]:
+    """
+    Grade the answer commands of a batch of replies, given with their reply ids.
+
+    Answers count for the active enrollments of the sender in the organization
+    that wait for the answer to the quiz. The answers to each quiz are graded
+    together by grade_submissions, a submission is stored for every one of
+    them and the enrollments that passed advance to their next content.
+    Returns the ids of the replies that were graded.
+    """
+    waiting: dict[tuple[str, int], list[int]] = defaultdict(list)
+    for enrollment_id, email, quiz_id in Enrollment.objects.filter(
+        course__organization_id=organization_id,
+        status="active",
+        next_due_at__isnull=True,
+        next_content__quiz_id__in={command.quiz_id for _, command in answers},
+        email__in={command.sender for _, command in answers},
+    ).values_list("id", "email", "next_content__quiz_id"):
+        waiting[email, quiz_id].append(enrollment_id)
+
+    by_quiz: dict[int, list[tuple[int, Command]]] = defaultdict(list)
+    for reply_id, command in answers:
+        if (command.sender, command.quiz_id) in waiting:
+            by_quiz[command.quiz_id].append((reply_id, command))
+
+    now = timezone.now()
+    submissions: list[QuizSubmission] = []
+    graded_replies = set()
+    for quiz_id, quiz_answers in by_quiz.items():
+        try:
+            answer_key = get_answer_key(quiz_id)
+        except (ValueError, Quiz.DoesNotExist):
+            continue
+        graded = []
+        for reply_id, command in quiz_answers:
+            masks = _selection_masks(command, answer_key)
+            if masks is not None:
+                graded.append((reply_id, command.sender, masks))
+        result = grade_submissions(answer_key, [masks for _, _, masks in graded])
+        for index, (reply_id, sender, masks) in enumerate(graded):
+            graded_replies.add(reply_id)
+            selections = ",".join(map(str, masks))
+            submissions.extend(
+                QuizSubmission(
+                    enrollment_id=enrollment_id,
+                    quiz_id=quiz_id,
+                    reply_id=reply_id,
+                    selections=selections,
+                    score=result.score(index),
+                    passed=result.passed[index],
+                    submitted_at=now,
+                )
+                for enrollment_id in waiting[sender, quiz_id]
+            )
+
+    with transaction.atomic():
+        QuizSubmission.objects.bulk_create(submissions)
+        Enrollment.objects.filter(
+            pk__in={s.enrollment_id for s in submissions if s.passed},
+            next_due_at__isnull=True,
+        ).advance(now)
+    return graded_replies
+
+
+def process_replies(imap_connection_id: int, batch_size: int = 500) -> int:
+    """
+    Dispatch the pending replies received by an ImapConnection.
+
+    Replies are loaded and marked in batches, the courses are resolved from
+    the in-memory slug map and the answers of a batch are graded together.
+    Returns the number of replies that were acted on.
+    """
+    organization_id = ImapConnection.objects.values_list(
+        "organization_id", flat=True
+    ).get(pk=imap_connection_id)
+    pending = InboundReply.objects.filter(
+        imap_connection_id=imap_connection_id, status="pending"
+    ).order_by("id")
+    processed_count = 0
+    while replies := list(pending[:batch_size]):
+        processed: list[int] = []
+        ignored: list[int] = []
+        answers: list[tuple[int, Command]] = []
+        for reply in replies:
+            try:
+                command = route(reply, organization_id)
+                if command is not None and command.action == "answer":
+                    answers.append((reply.pk, command))
+                    continue
+                acted = command is not None and HANDLERS[command.action](
+                    command, organization_id
+                )
+            except Exception:
+                logger.exception(f"Dispatching reply {reply.pk} failed")
+                acted = False
+            (processed if acted else ignored).append(reply.pk)
+        if answers:
+            try:
+                graded = grade_answers(answers, organization_id)
+            except Exception:
+                logger.exception(
+                    f"Grading the answers of {len(answers)} replies failed"
+                )
+                graded = set()
+            for reply_id, _ in answers:
+                (processed if reply_id in graded else ignored).append(reply_id)
+        InboundReply.objects.filter(pk__in=processed).update(status="processed")
+        InboundReply.objects.filter(pk__in=ignored).update(status="ignored")
+        processed_count += len(processed)
+    return processed_count
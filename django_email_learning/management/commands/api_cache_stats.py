@@ -0,0 +1,17 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand
+
+from django_email_learning.api.response_cache import cache_stats
+
+
+class Command(BaseCommand):
+    help = "Print the hits and misses of the API response cache."
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        stats = cache_stats()
+        requests = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / requests if requests else 0.0
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} hit_ratio={ratio:.2f}"
+        )
@@ -0,0 +1,29 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from django_email_learning.delivery.outbox import drain_outbox
+from django_email_learning.delivery.scheduler import schedule_due_content
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue the next lesson or quiz of every learner whose content is due "
+        "in the outbox and send the pending outbox messages. "
+        "Meant to be triggered periodically by cron or a cloud scheduler."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of due enrollments or outbox messages processed at once.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        queued = schedule_due_content(chunk_size=options["chunk_size"])
+        sent = drain_outbox(batch_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Queued {queued} messages, sent {sent} messages.")
+        )
@@ -0,0 +1,64 @@
+import logging
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from django_email_learning.conf import app_setting
+from django_email_learning.inbound.fetch import sync_mailbox
+from django_email_learning.inbound.imap import ImapIdentity, connect
+from django_email_learning.inbound.pipeline import ParsingStage, ReplyPipeline
+from django_email_learning.models import ImapConnection
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fetch the mail that arrived in every ImapConnection since the last "
+        "fetch. Meant to be triggered periodically by cron when "
+        "listen_for_mail is not running."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=app_setting("IMAP_FETCH_BATCH_SIZE"),
+            help="Number of new messages fetched at once.",
+        )
+        parser.add_argument(
+            "--parse-workers",
+            type=int,
+            default=app_setting("INBOUND_PARSE_WORKERS"),
+            help="Number of processes parsing the fetched messages, "
+            "0 parses them in the fetching thread.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        with ParsingStage(options["parse_workers"]) as stage:
+            fetched = self.fetch_all(ReplyPipeline(stage), options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Fetched {fetched} messages."))
+
+    def fetch_all(self, pipeline: ReplyPipeline, batch_size: int) -> int:
+        fetched = 0
+        for connection in ImapConnection.objects.all():
+            try:
+                client = connect(
+                    ImapIdentity.from_imap_connection(connection),
+                    app_setting("IMAP_TIMEOUT"),
+                )
+            except Exception:
+                logger.exception(f"Connecting to {connection} failed")
+                continue
+            try:
+                fetched += sync_mailbox(client, connection.pk, pipeline, batch_size)
+            except Exception:
+                # Replies that were stored stay stored, the rest of the
+                # mailbox is fetched again after the checkpoint next time.
+                logger.exception(f"Fetching the mail of {connection} failed")
+            finally:
+                try:
+                    client.logout()
+                except Exception:
+                    logger.warning(f"Logging out of {connection} failed", exc_info=True)
+        return fetched
@@ -0,0 +1,86 @@
+import imaplib
+import threading
+import time
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import close_old_connections
+
+from django_email_learning.conf import app_setting
+from django_email_learning.inbound.fetch import sync_mailbox
+from django_email_learning.inbound.listener import MailboxListeners
+from django_email_learning.inbound.pipeline import ParsingStage, ReplyPipeline
+from django_email_learning.models import ImapConnection
+
+
+class Command(BaseCommand):
+    help = (
+        "Keep one IMAP connection open per ImapConnection and get notified of "
+        "new learner replies with IDLE, instead of polling every mailbox."
+    )
+
+    def __init__(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        super().__init__(*args, **kwargs)
+        self.stop = threading.Event()
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--idle-timeout",
+            type=float,
+            default=app_setting("IMAP_IDLE_TIMEOUT"),
+            help="Seconds after which IDLE is restarted.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=app_setting("IMAP_POLL_INTERVAL"),
+            help="Seconds between two polls of servers that do not support IDLE.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=app_setting("IMAP_FETCH_BATCH_SIZE"),
+            help="Number of new messages fetched at once.",
+        )
+        parser.add_argument(
+            "--parse-workers",
+            type=int,
+            default=app_setting("INBOUND_PARSE_WORKERS"),
+            help="Number of processes parsing the fetched messages, "
+            "0 parses them in the fetching thread.",
+        )
+
+    def on_new_mail(self, imap_connection_id: int, client: imaplib.IMAP4) -> None:
+        # Listener threads are long-lived, so database connections that
+        # timed out are replaced before every sync.
+        close_old_connections()
+        sync_mailbox(client, imap_connection_id, self.pipeline, self.batch_size)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        with ParsingStage(options["parse_workers"]) as stage:
+            self.pipeline = ReplyPipeline(stage)
+            self.batch_size = options["batch_size"]
+            self.listen(options)
+
+    def listen(self, options: dict[str, Any]) -> None:
+        listeners = MailboxListeners(
+            self.on_new_mail,
+            idle_timeout=options["idle_timeout"],
+            poll_interval=options["poll_interval"],
+        )
+        listeners.update(ImapConnection.objects.all())
+        self.stdout.write(f"Listening to {len(listeners)} mailboxes.")
+        # Connections are edited by other processes, so they are read again
+        # every once in a while to pick up the changes.
+        refresh_interval = app_setting("IMAP_CONNECTIONS_REFRESH_INTERVAL")
+        refresh_at = time.monotonic() + refresh_interval
+        try:
+            while not self.stop.wait(1):
+                if time.monotonic() >= refresh_at:
+                    close_old_connections()
+                    listeners.update(ImapConnection.objects.all())
+                    refresh_at = time.monotonic() + refresh_interval
+        except KeyboardInterrupt:
+            self.stop.set()
+        listeners.stop()
+        self.stdout.write(self.style.SUCCESS("Stopped listening."))
@@ -0,0 +1,96 @@
+import argparse
+import time
+from typing import Any
+
+from cryptography.fernet import InvalidToken
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from django_email_learning.models import ImapConnection, derive_fernet, get_fernet
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-encrypt IMAP connection passwords with the current SECRET_KEY. "
+        "Passwords encrypted with a key in SECRET_KEY_FALLBACKS are decrypted "
+        "and encrypted again, the ones already using SECRET_KEY are skipped."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--chunk-size",
+            type=positive_int,
+            default=500,
+            help="Number of connections fetched and updated at once.",
+        )
+        parser.add_argument(
+            "--start-after",
+            type=int,
+            default=0,
+            help="Resume the rotation after the connection with this id.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        chunk_size = options["chunk_size"]
+        current = derive_fernet(settings.SECRET_KEY)
+        fernet = get_fernet()
+
+        connections = (
+            ImapConnection.objects.filter(pk__gt=options["start_after"])
+            .order_by("pk")
+            .only("pk", "password")
+        )
+        total = connections.count()
+        processed = rotated = failed = 0
+        started_at = time.perf_counter()
+        batch: list[ImapConnection] = []
+
+        for connection in connections.iterator(chunk_size=chunk_size):
+            processed += 1
+            token = connection.password.encode()
+            try:
+                # Only verifies the signature, so it is cheap for rows that
+                # are already encrypted with the current key.
+                current.extract_timestamp(token)
+            except InvalidToken:
+                try:
+                    connection.password = fernet.rotate(token).decode()
+                    batch.append(connection)
+                except InvalidToken:
+                    failed += 1
+                    self.stderr.write(
+                        f"Password of connection {connection.pk} can not be "
+                        "decrypted with SECRET_KEY or SECRET_KEY_FALLBACKS."
+                    )
+
+            if processed % chunk_size == 0 or processed == total:
+                rotated += self._write(batch)
+                batch = []
+                elapsed = time.perf_counter() - started_at
+                self.stdout.write(
+                    f"Processed {processed}/{total} connections "
+                    f"({processed / elapsed:.0f} rows/s), last id {connection.pk}"
+                )
+
+        rotated += self._write(batch)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rotated {rotated} passwords, {processed - rotated - failed} "
+                f"already up to date, {failed} failed."
+            )
+        )
+
+    def _write(self, batch: list[ImapConnection]) -> int:
+        if not batch:
+            return 0
+        with transaction.atomic():
+            ImapConnection.objects.bulk_update(batch, ["password"])
+        return len(batch)
@@ -0,0 +1,57 @@
+from typing import Any
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand, CommandParser
+
+from django_email_learning.conf import app_setting
+from django_email_learning.delivery.worker import DeliveryWorker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run an asyncio worker that sends due lessons and quizzes concurrently, "
+        "limited globally and per SMTP host."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of due enrollments loaded and sent at once.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=app_setting("WORKER_CONCURRENCY"),
+            help="Maximum number of messages sent at the same time.",
+        )
+        parser.add_argument(
+            "--concurrency-per-host",
+            type=int,
+            default=app_setting("WORKER_CONCURRENCY_PER_HOST"),
+            help="Maximum number of messages sent at the same time to one host.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=10,
+            help="Seconds to wait between two passes over the due content.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Deliver the content due now and exit.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        worker = DeliveryWorker(
+            batch_size=options["batch_size"],
+            concurrency=options["concurrency"],
+            concurrency_per_host=options["concurrency_per_host"],
+        )
+        if options["once"]:
+            sent = async_to_sync(worker.deliver_due)()
+            self.stdout.write(self.style.SUCCESS(f"Sent {sent} messages."))
+        else:
+            async_to_sync(worker.run)(options["poll_interval"])
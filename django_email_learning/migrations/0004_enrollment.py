@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0003_coursecontent_waiting_period"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="answer",
+            options={"ordering": ["id"]},
+        ),
+        migrations.AlterModelOptions(
+            name="question",
+            options={"ordering": ["priority", "id"]},
+        ),
+        migrations.CreateModel(
+            name="Enrollment",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("email", models.EmailField(max_length=200)),
+                (
+                    "next_due_at",
+                    models.DateTimeField(blank=True, db_index=True, null=True),
+                ),
+                ("last_sent_at", models.DateTimeField(blank=True, null=True)),
+                ("enrolled_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "course",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="enrollments",
+                        to="django_email_learning.course",
+                    ),
+                ),
+                (
+                    "next_content",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="The content to send next, empty when the course is completed.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="django_email_learning.coursecontent",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("course", "email")},
+            },
+        ),
+    ]
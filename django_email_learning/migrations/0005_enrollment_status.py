@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0004_enrollment"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("active", "Active"),
+                    ("completed", "Completed"),
+                    ("stopped", "Stopped"),
+                ],
+                default="active",
+                max_length=50,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="enrollment",
+            name="next_due_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the next content is due, the previous send time plus the waiting period of the next content.",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="enrollment",
+            index=models.Index(
+                fields=["next_due_at", "status"], name="django_emai_next_du_c23882_idx"
+            ),
+        ),
+    ]
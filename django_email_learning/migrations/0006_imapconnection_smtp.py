@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:15
+
+import django_email_learning.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0005_enrollment_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="imapconnection",
+            name="smtp_port",
+            field=models.IntegerField(db_default=587),
+        ),
+        migrations.AddField(
+            model_name="imapconnection",
+            name="smtp_server",
+            field=models.CharField(
+                blank=True,
+                help_text="Server used to send emails with this account. When empty, emails are sent with the default email backend of the project.",
+                max_length=200,
+                validators=[django_email_learning.models.is_domain_or_ip],
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0006_imapconnection_smtp"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="enrollment",
+            name="lease_expires_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="enrollment",
+            name="lease_token",
+            field=models.CharField(
+                blank=True,
+                help_text="Identifies the delivery worker that claimed the enrollment.",
+                max_length=200,
+            ),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0007_enrollment_lease"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("from_email", models.EmailField(max_length=200)),
+                ("to", models.EmailField(max_length=200)),
+                ("subject", models.CharField(max_length=1000)),
+                ("body", models.TextField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pending"), ("sent", "Sent")],
+                        default="pending",
+                        max_length=50,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+                ("lease_token", models.CharField(blank=True, max_length=200)),
+                ("lease_expires_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "enrollment",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="outbox_messages",
+                        to="django_email_learning.enrollment",
+                    ),
+                ),
+                (
+                    "imap_connection",
+                    models.ForeignKey(
+                        blank=True,
+                        help_text="The account sending the message, the default email backend of the project is used when empty.",
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="django_email_learning.imapconnection",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "id"], name="django_emai_status_4b558c_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0008_outboxmessage"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DeadLetterMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("from_email", models.EmailField(max_length=200)),
+                ("to", models.EmailField(max_length=200)),
+                ("subject", models.CharField(max_length=1000)),
+                ("body", models.TextField()),
+                ("attempts", models.PositiveIntegerField()),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField()),
+                ("failed_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name="outboxmessage",
+            name="django_emai_status_4b558c_idx",
+        ),
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="last_error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="outboxmessage",
+            name="next_attempt_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                help_text="Pending messages are not sent before this time, failed sends are retried with an exponential backoff.",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="outboxmessage",
+            index=models.Index(
+                fields=["status", "next_attempt_at"],
+                name="django_emai_status_da7f4a_idx",
+            ),
+        ),
+        migrations.AddField(
+            model_name="deadlettermessage",
+            name="enrollment",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="dead_letters",
+                to="django_email_learning.enrollment",
+            ),
+        ),
+        migrations.AddField(
+            model_name="deadlettermessage",
+            name="imap_connection",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to="django_email_learning.imapconnection",
+            ),
+        ),
+    ]
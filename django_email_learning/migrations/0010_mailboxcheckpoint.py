@@ -0,0 +1,42 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0009_outbox_retries"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MailboxCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("mailbox", models.CharField(default="INBOX", max_length=200)),
+                ("uidvalidity", models.PositiveBigIntegerField(default=0)),
+                ("last_uid", models.PositiveBigIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "imap_connection",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="checkpoints",
+                        to="django_email_learning.imapconnection",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("imap_connection", "mailbox")},
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0010_mailboxcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="InboundReply",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("uidvalidity", models.PositiveBigIntegerField()),
+                ("uid", models.PositiveBigIntegerField()),
+                ("sender", models.CharField(blank=True, max_length=200)),
+                ("slug", models.CharField(blank=True, max_length=50)),
+                (
+                    "tokens",
+                    models.CharField(
+                        blank=True,
+                        help_text="Words of the first line of the reply, separated by spaces.",
+                        max_length=1000,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("processed", "Processed"),
+                            ("ignored", "Ignored"),
+                        ],
+                        default="pending",
+                        max_length=50,
+                    ),
+                ),
+                ("received_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "imap_connection",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="replies",
+                        to="django_email_learning.imapconnection",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["status", "id"], name="django_emai_status_ed27bd_idx"
+                    )
+                ],
+                "unique_together": {("imap_connection", "uidvalidity", "uid")},
+            },
+        ),
+    ]
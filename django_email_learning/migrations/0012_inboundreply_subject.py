@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0011_inboundreply"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="inboundreply",
+            name="subject",
+            field=models.CharField(blank=True, max_length=1000),
+        ),
+    ]
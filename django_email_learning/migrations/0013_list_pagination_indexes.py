@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0012_inboundreply_subject"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="course",
+            index=models.Index(
+                fields=["organization", "id"], name="django_emai_organiz_28618c_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="imapconnection",
+            index=models.Index(
+                fields=["organization", "id"], name="django_emai_organiz_cfcf1c_idx"
+            ),
+        ),
+    ]
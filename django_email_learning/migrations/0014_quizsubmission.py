@@ -0,0 +1,75 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0013_list_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="enrollment",
+            name="next_due_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the next content is due, the previous send or submission time plus the waiting period of the next content. Empty while waiting for the answer to a quiz.",
+                null=True,
+            ),
+        ),
+        migrations.CreateModel(
+            name="QuizSubmission",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "selections",
+                    models.CharField(
+                        help_text="Selection mask of every question in question order, separated by commas.",
+                        max_length=1000,
+                    ),
+                ),
+                ("score", models.PositiveSmallIntegerField()),
+                ("passed", models.BooleanField()),
+                (
+                    "submitted_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "enrollment",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="submissions",
+                        to="django_email_learning.enrollment",
+                    ),
+                ),
+                (
+                    "quiz",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="submissions",
+                        to="django_email_learning.quiz",
+                    ),
+                ),
+                (
+                    "reply",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        to="django_email_learning.inboundreply",
+                    ),
+                ),
+            ],
+        ),
+    ]
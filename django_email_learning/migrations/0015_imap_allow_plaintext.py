@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0014_quizsubmission"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="imapconnection",
+            name="allow_plaintext",
+            field=models.BooleanField(
+                default=False,
+                help_text="Log in to the IMAP server without TLS when it doesn't offer STARTTLS. Only for servers on a trusted network.",
+            ),
+        ),
+    ]
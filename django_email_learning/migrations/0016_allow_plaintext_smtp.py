@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0015_imap_allow_plaintext"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="imapconnection",
+            name="allow_plaintext",
+            field=models.BooleanField(
+                default=False,
+                help_text="Log in to the IMAP and SMTP servers without TLS when they don't offer STARTTLS. Only for servers on a trusted network.",
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("django_email_learning", "0016_allow_plaintext_smtp"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="quiz",
+            name="answer_key_changed_at",
+            field=models.DateTimeField(
+                blank=True,
+                editable=False,
+                help_text="When the quiz, its questions or answers last changed. Compiled answer keys of another time are stale.",
+                null=True,
+            ),
+        ),
+    ]
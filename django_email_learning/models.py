@@ -1,19 +1,59 @@
 import base64
 import ipaddress
 import re
+import threading
+from datetime import datetime, timedelta
 from typing import Any
 from django.conf import settings
-from django.db import models
+from django.core.mail import EmailMessage
+from django.db import models, transaction
 from django.core.validators import MaxValueValidator
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, MultiFernet
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
 from django.forms import ValidationError
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 FIXED_SALT = b"\x00" * 16
 
+_derived_fernets: dict[str, Fernet] = {}
+_derived_fernets_lock = threading.Lock()
+
+
+def derive_fernet(secret: str) -> Fernet:
+    """
+    Return the Fernet instance for the given secret.
+
+    Deriving the key runs PBKDF2 with 100,000 iterations, so derived keys are
+    cached for the lifetime of the process.
+    """
+    fernet = _derived_fernets.get(secret)
+    if fernet is None:
+        with _derived_fernets_lock:
+            fernet = _derived_fernets.get(secret)
+            if fernet is None:
+                kdf = PBKDF2HMAC(
+                    algorithm=hashes.SHA256(),
+                    length=32,
+                    salt=FIXED_SALT,
+                    iterations=100000,
+                )
+                key = base64.urlsafe_b64encode(kdf.derive(secret.encode()))
+                fernet = Fernet(key)
+                _derived_fernets[secret] = fernet
+    return fernet
+
+
+def get_fernet() -> MultiFernet:
+    """
+    Return a MultiFernet that encrypts with SECRET_KEY and is also able to
+    decrypt values encrypted with any of SECRET_KEY_FALLBACKS.
+    """
+    secrets = [settings.SECRET_KEY, *getattr(settings, "SECRET_KEY_FALLBACKS", [])]
+    return MultiFernet([derive_fernet(secret) for secret in secrets])
+
 
 def is_domain_or_ip(value: str) -> None:
     """
@@ -30,6 +70,69 @@ def is_domain_or_ip(value: str) -> None:
             raise ValueError(f"{value} is not a valid domain or IP address")
 
 
+class ChangeTrackingMixin(models.Model):
+    """
+    Keep track of the field values loaded from the database, so save() only
+    writes the fields that actually changed.
+    """
+
+    class Meta:
+        abstract = True
+
+    def __init__(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        super().__init__(*args, **kwargs)
+        self._snapshot()
+
+    def _snapshot(self, fields: set[str] | None = None) -> None:
+        values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (fields is None or {field.name, field.attname} & fields)
+        }
+        if fields is None:
+            self._loaded_values = values
+        else:
+            self._loaded_values.update(values)
+
+    @property
+    def changed_fields(self) -> set[str]:
+        if self._state.adding:
+            return {field.name for field in self._meta.concrete_fields}
+        return {
+            field.name
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and (
+                field.attname not in self._loaded_values
+                or self._loaded_values[field.attname] != self.__dict__[field.attname]
+            )
+        }
+
+    def unchanged_fields(self) -> list[str]:
+        changed_fields = self.changed_fields
+        return [
+            field.name
+            for field in self._meta.concrete_fields
+            if field.name not in changed_fields
+        ]
+
+    def refresh_from_db(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        super().refresh_from_db(*args, **kwargs)
+        fields = kwargs.get("fields")
+        self._snapshot(None if fields is None else set(fields))
+
+    def save(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        if (
+            not self._state.adding
+            and not kwargs.get("force_insert")
+            and kwargs.get("update_fields") is None
+        ):
+            kwargs["update_fields"] = self.changed_fields
+        super().save(*args, **kwargs)
+        self._snapshot()
+
+
 class Organization(models.Model):
     name = models.CharField(max_length=200, unique=True)
     logo = models.ImageField(upload_to="organization_logos/", null=True, blank=True)
@@ -56,30 +159,46 @@ class OrganizationUser(models.Model):
         return f"{self.user.username} - {self.organization.name}"
 
 
-class ImapConnection(models.Model):
+class ImapConnection(ChangeTrackingMixin, models.Model):
     server = models.CharField(max_length=200, validators=[is_domain_or_ip])
     port = models.IntegerField(db_default=993)
     email = models.EmailField(max_length=200, unique=True)
     password = models.CharField(max_length=200)
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE)
+    smtp_server = models.CharField(
+        max_length=200,
+        blank=True,
+        validators=[is_domain_or_ip],
+        help_text="Server used to send emails with this account. When empty, "
+        "emails are sent with the default email backend of the project.",
+    )
+    smtp_port = models.IntegerField(db_default=587)
+    allow_plaintext = models.BooleanField(
+        default=False,
+        help_text="Log in to the IMAP and SMTP servers without TLS when they "
+        "don't offer STARTTLS. Only for servers on a trusted network.",
+    )
+
+    class Meta:
+        # Pages of the API are read in id order per organization.
+        indexes = [models.Index(fields=["organization", "id"])]
 
     def __str__(self) -> str:
         return f"{self.email}|{self.server}:{self.port}"
 
     def save(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
-        if self.password:
+        changed_fields = self.changed_fields
+        if self.password and "password" in changed_fields:
             self.password = self._encrypt_password(self.password)
-        if self.server:
+        if self.server and "server" in changed_fields:
             self.server = self.server.lower()
-        self.full_clean()
+        if self.smtp_server and "smtp_server" in changed_fields:
+            self.smtp_server = self.smtp_server.lower()
+        self.full_clean(exclude=self.unchanged_fields())
         super().save(*args, **kwargs)
 
-    def _fernet(self) -> Fernet:
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(), length=32, salt=FIXED_SALT, iterations=100000
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(settings.SECRET_KEY.encode()))
-        return Fernet(key)
+    def _fernet(self) -> MultiFernet:
+        return get_fernet()
 
     def _encrypt_password(self, password: str) -> str:
         f = self._fernet()
@@ -90,7 +209,30 @@ class ImapConnection(models.Model):
         return f.decrypt(encrypted_password.encode()).decode()
 
 
-class Course(models.Model):
+class MailboxCheckpoint(models.Model):
+    """
+    The highest UID processed in a mailbox of an ImapConnection.
+
+    UIDs are only meaningful within one UIDVALIDITY of the mailbox, when it
+    changes the mailbox is synced again from the start.
+    """
+
+    imap_connection = models.ForeignKey(
+        ImapConnection, on_delete=models.CASCADE, related_name="checkpoints"
+    )
+    mailbox = models.CharField(max_length=200, default="INBOX")
+    uidvalidity = models.PositiveBigIntegerField(default=0)
+    last_uid = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [["imap_connection", "mailbox"]]
+
+    def __str__(self) -> str:
+        return f"{self.imap_connection.email}/{self.mailbox}: {self.uidvalidity}/{self.last_uid}"
+
+
+class Course(ChangeTrackingMixin, models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(
         max_length=50,
@@ -108,6 +250,7 @@ class Course(models.Model):
 
     class Meta:
         unique_together = [["slug", "organization"], ["title", "organization"]]
+        indexes = [models.Index(fields=["organization", "id"])]
 
     def delete(
         self, using: Any | None = None, keep_parents: bool = False
@@ -128,10 +271,17 @@ class Lesson(models.Model):
         return self.title
 
 
-class Quiz(models.Model):
+class Quiz(ChangeTrackingMixin, models.Model):
     title = models.CharField(max_length=500)
     required_score = models.IntegerField(validators=[MaxValueValidator(100)])
     is_published = models.BooleanField(default=False)
+    answer_key_changed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="When the quiz, its questions or answers last changed. "
+        "Compiled answer keys of another time are stale.",
+    )
 
     class Meta:
         verbose_name_plural = "Quizzes"
@@ -140,17 +290,24 @@ class Quiz(models.Model):
         return self.title
 
     def validate_questions(self) -> None:
-        if not self.questions.exists():
+        answer_counts = list(
+            self.questions.annotate(
+                correct_answers=models.Count(
+                    "answers", filter=models.Q(answers__is_correct=True)
+                ),
+                total_answers=models.Count("answers"),
+            )
+            .order_by("priority")
+            .values_list("correct_answers", "total_answers")
+        )
+        if not answer_counts:
             raise ValidationError("At least one question is required.")
 
-        for question in self.questions.all():
-            try:
-                question.validate_answers()
-            except ValidationError as e:
-                raise ValidationError(f"For question '{question.text}', {e.message}")
+        for correct_answers, total_answers in answer_counts:
+            Question.validate_answer_counts(correct_answers, total_answers)
 
-    def full_clean(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
-        if self.is_published:
+    def full_clean(self, exclude=None, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        if self.is_published and "is_published" not in (exclude or ()):
             try:
                 self.validate_questions()
             except ValueError as e:
@@ -161,10 +318,10 @@ class Quiz(models.Model):
                     )
                 raise e
 
-        super().full_clean(*args, **kwargs)
+        super().full_clean(exclude, *args, **kwargs)
 
     def save(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
-        self.full_clean()
+        self.full_clean(exclude=self.unchanged_fields())
         super().save(*args, **kwargs)
 
 
@@ -173,16 +330,27 @@ class Question(models.Model):
     text = models.CharField(max_length=500)
     priority = models.IntegerField()
 
+    class Meta:
+        ordering = ["priority", "id"]
+
     def __str__(self) -> str:
         return self.text
 
-    def validate_answers(self) -> None:
-        if not self.answers.filter(is_correct=True).exists():
+    @staticmethod
+    def validate_answer_counts(correct_answers: int, total_answers: int) -> None:
+        if not correct_answers:
             raise ValueError("At least one correct answer is required.")
 
-        if self.answers.count() < 2:
+        if total_answers < 2:
             raise ValueError("At least two answers are required.")
 
+    def validate_answers(self) -> None:
+        counts = self.answers.aggregate(
+            correct_answers=models.Count("id", filter=models.Q(is_correct=True)),
+            total_answers=models.Count("id"),
+        )
+        self.validate_answer_counts(counts["correct_answers"], counts["total_answers"])
+
     def is_multiple_choice(self) -> bool:
         return self.answers.filter(is_correct=True).count() > 1
 
@@ -194,6 +362,9 @@ class Answer(models.Model):
     text = models.CharField(max_length=500)
     is_correct = models.BooleanField(default=False)
 
+    class Meta:
+        ordering = ["id"]
+
     def __str__(self) -> str:
         return self.text
 
@@ -203,7 +374,7 @@ class Answer(models.Model):
         return super().delete(*args, **kwargs)
 
 
-class CourseContent(models.Model):
+class CourseContent(ChangeTrackingMixin, models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     priority = models.IntegerField()
     type = models.CharField(
@@ -236,22 +407,347 @@ class CourseContent(models.Model):
         elif self.type == "quiz" and self.quiz:
             self.quiz.full_clean()
 
-    def full_clean(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
-        self._validate_content()
-        return super().full_clean(*args, **kwargs)
+    def full_clean(self, exclude=None, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
+        if not {"type", "lesson", "quiz"}.issubset(exclude or ()):
+            self._validate_content()
+        return super().full_clean(exclude, *args, **kwargs)
 
     def save(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
-        self.full_clean()
+        self.full_clean(exclude=self.unchanged_fields())
         super().save(*args, **kwargs)
 
 
-class BlockedEmail(models.Model):
+class BlockedEmail(ChangeTrackingMixin, models.Model):
     email = models.EmailField(unique=True)
 
     def __str__(self) -> str:
         return self.email
 
     def save(self, *args, **kwargs) -> None:  # type: ignore[no-untyped-def]
-        self.email = self.email.lower()
-        self.full_clean()
+        if "email" in self.changed_fields:
+            self.email = self.email.lower()
+        self.full_clean(exclude=self.unchanged_fields())
         super().save(*args, **kwargs)
+
+
+class EnrollmentQuerySet(models.QuerySet):
+    def enroll(
+        self, course: Course, email: str, now: datetime | None = None
+    ) -> "Enrollment":
+        now = now or timezone.now()
+        first_content = (
+            CourseContent.objects.filter(course=course)
+            .order_by("priority", "id")
+            .first()
+        )
+        return self.create(
+            course=course,
+            email=email.lower(),
+            next_content=first_content,
+            next_due_at=(
+                now + timedelta(seconds=first_content.waiting_period)
+                if first_content
+                else None
+            ),
+            status="active" if first_content else "completed",
+        )
+
+    def advance(self, sent_at: datetime) -> int:
+        """
+        Move the enrollments to the content following their current one.
+
+        The next content, its due date and the status are all computed by the
+        database, so advancing any number of enrollments is a single UPDATE.
+        """
+        current = CourseContent.objects.filter(
+            pk=models.OuterRef(models.OuterRef("next_content_id"))
+        )
+        current_priority = models.Subquery(current.values("priority")[:1])
+        following = (
+            CourseContent.objects.filter(course_id=models.OuterRef("course_id"))
+            .filter(
+                models.Q(priority__gt=current_priority)
+                | models.Q(
+                    priority=current_priority, id__gt=models.OuterRef("next_content_id")
+                )
+            )
+            .order_by("priority", "id")
+        )
+        waiting_period = models.ExpressionWrapper(
+            models.Subquery(following.values("waiting_period")[:1])
+            * models.Value(timedelta(seconds=1)),
+            output_field=models.DurationField(),
+        )
+        # MySQL evaluates the assignments in order and later ones see the
+        # values assigned before them, so every assignment computed from the
+        # current content comes before next_content is replaced.
+        return self.update(
+            next_due_at=models.ExpressionWrapper(
+                models.Value(sent_at) + waiting_period,
+                output_field=models.DateTimeField(),
+            ),
+            status=models.Case(
+                models.When(models.Exists(following), then=models.Value("active")),
+                default=models.Value("completed"),
+            ),
+            next_content=models.Subquery(following.values("id")[:1]),
+            last_sent_at=sent_at,
+            lease_token="",
+            lease_expires_at=None,
+        )
+
+    def content_sent(self, sent_at: datetime) -> int:
+        """
+        Record that the next content of the enrollments was sent.
+
+        Enrollments sent a lesson advance to the following content. Enrollments
+        sent a quiz keep it as their next content without a due date, they
+        advance when the learner submits a passing answer.
+        """
+        quiz = models.Q(next_content__type="quiz")
+        waiting = self.filter(quiz).update(
+            next_due_at=None,
+            last_sent_at=sent_at,
+            lease_token="",
+            lease_expires_at=None,
+        )
+        return waiting + self.exclude(quiz).advance(sent_at)
+
+
+class Enrollment(models.Model):
+    course = models.ForeignKey(
+        Course, on_delete=models.CASCADE, related_name="enrollments"
+    )
+    email = models.EmailField(max_length=200)
+    next_content = models.ForeignKey(
+        CourseContent,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        help_text="The content to send next, empty when the course is completed.",
+    )
+    status = models.CharField(
+        max_length=50,
+        choices=[
+            ("active", "Active"),
+            ("completed", "Completed"),
+            ("stopped", "Stopped"),
+        ],
+        default="active",
+    )
+    next_due_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the next content is due, the previous send or "
+        "submission time plus the waiting period of the next content. Empty "
+        "while waiting for the answer to a quiz.",
+    )
+    last_sent_at = models.DateTimeField(null=True, blank=True)
+    enrolled_at = models.DateTimeField(auto_now_add=True)
+    lease_token = models.CharField(
+        max_length=200,
+        blank=True,
+        help_text="Identifies the delivery worker that claimed the enrollment.",
+    )
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    objects = EnrollmentQuerySet.as_manager()
+
+    class Meta:
+        unique_together = [["course", "email"]]
+        indexes = [models.Index(fields=["next_due_at", "status"])]
+
+    def __str__(self) -> str:
+        return f"{self.email} - {self.course.title}"
+
+    def advance(self, sent_at: datetime) -> None:
+        Enrollment.objects.filter(pk=self.pk).advance(sent_at)
+        self.refresh_from_db(
+            fields=[
+                "next_content",
+                "next_due_at",
+                "status",
+                "last_sent_at",
+                "lease_token",
+                "lease_expires_at",
+            ]
+        )
+
+
+class OutboxMessage(models.Model):
+    enrollment = models.ForeignKey(
+        Enrollment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="outbox_messages",
+    )
+    imap_connection = models.ForeignKey(
+        ImapConnection,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        help_text="The account sending the message, the default email backend "
+        "of the project is used when empty.",
+    )
+    from_email = models.EmailField(max_length=200)
+    to = models.EmailField(max_length=200)
+    subject = models.CharField(max_length=1000)
+    body = models.TextField()
+    status = models.CharField(
+        max_length=50,
+        choices=[
+            ("pending", "Pending"),
+            ("sent", "Sent"),
+        ],
+        default="pending",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        help_text="Pending messages are not sent before this time, failed "
+        "sends are retried with an exponential backoff.",
+    )
+    last_error = models.TextField(blank=True)
+    lease_token = models.CharField(max_length=200, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.to} - {self.subject}"
+
+    def to_email_message(self) -> EmailMessage:
+        return EmailMessage(
+            subject=self.subject,
+            body=self.body,
+            from_email=self.from_email,
+            to=[self.to],
+        )
+
+
+class DeadLetterQuerySet(models.QuerySet):
+    def requeue(self) -> int:
+        """
+        Move the dead letters back to the outbox as new pending messages.
+
+        Returns the number of requeued messages.
+        """
+        letters = list(self)
+        with transaction.atomic():
+            OutboxMessage.objects.bulk_create(
+                OutboxMessage(
+                    enrollment_id=letter.enrollment_id,
+                    imap_connection_id=letter.imap_connection_id,
+                    from_email=letter.from_email,
+                    to=letter.to,
+                    subject=letter.subject,
+                    body=letter.body,
+                )
+                for letter in letters
+            )
+            self.model.objects.filter(pk__in=[letter.pk for letter in letters]).delete()
+        return len(letters)
+
+
+class DeadLetterMessage(models.Model):
+    """An outbox message that failed permanently or too many times."""
+
+    enrollment = models.ForeignKey(
+        Enrollment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="dead_letters",
+    )
+    imap_connection = models.ForeignKey(
+        ImapConnection, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    from_email = models.EmailField(max_length=200)
+    to = models.EmailField(max_length=200)
+    subject = models.CharField(max_length=1000)
+    body = models.TextField()
+    attempts = models.PositiveIntegerField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    objects = DeadLetterQuerySet.as_manager()
+
+    def __str__(self) -> str:
+        return f"{self.to} - {self.subject}"
+
+    @classmethod
+    def from_outbox_message(cls, message: OutboxMessage) -> "DeadLetterMessage":
+        return cls(
+            enrollment_id=message.enrollment_id,
+            imap_connection_id=message.imap_connection_id,
+            from_email=message.from_email,
+            to=message.to,
+            subject=message.subject,
+            body=message.body,
+            attempts=message.attempts,
+            last_error=message.last_error,
+            created_at=message.created_at,
+        )
+
+
+class InboundReply(models.Model):
+    """A parsed reply of a learner, waiting to be acted on."""
+
+    imap_connection = models.ForeignKey(
+        ImapConnection, on_delete=models.CASCADE, related_name="replies"
+    )
+    uidvalidity = models.PositiveBigIntegerField()
+    uid = models.PositiveBigIntegerField()
+    sender = models.CharField(max_length=200, blank=True)
+    subject = models.CharField(max_length=1000, blank=True)
+    slug = models.CharField(max_length=50, blank=True)
+    tokens = models.CharField(
+        max_length=1000,
+        blank=True,
+        help_text="Words of the first line of the reply, separated by spaces.",
+    )
+    status = models.CharField(
+        max_length=50,
+        choices=[
+            ("pending", "Pending"),
+            ("processed", "Processed"),
+            ("ignored", "Ignored"),
+        ],
+        default="pending",
+    )
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = [["imap_connection", "uidvalidity", "uid"]]
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self) -> str:
+        return f"{self.sender} - [{self.slug}] {self.tokens}"
+
+
+class QuizSubmission(models.Model):
+    """A graded answer of a learner to the quiz their enrollment waits for."""
+
+    enrollment = models.ForeignKey(
+        Enrollment, on_delete=models.CASCADE, related_name="submissions"
+    )
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name="submissions")
+    reply = models.ForeignKey(
+        InboundReply, on_delete=models.SET_NULL, null=True, blank=True
+    )
+    selections = models.CharField(
+        max_length=1000,
+        help_text="Selection mask of every question in question order, "
+        "separated by commas.",
+    )
+    score = models.PositiveSmallIntegerField()
+    passed = models.BooleanField()
+    submitted_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.enrollment.email} - {self.quiz.title}: {self.score}%"
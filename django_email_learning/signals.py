@@ -1,7 +1,19 @@
 from django.contrib.auth.models import Group, Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
+from django_email_learning.answer_keys import invalidate_answer_key
+from django_email_learning.api.etags import ORGANIZATIONS, bump_content_version
+from django_email_learning.inbound.router import invalidate_course_slugs
+from django_email_learning.models import (
+    Answer,
+    Course,
+    ImapConnection,
+    Organization,
+    OrganizationUser,
+    Question,
+    Quiz,
+)
 
 
 @receiver(post_migrate)
@@ -95,3 +107,54 @@ def create_default_organization(sender, **kwargs):  # type: ignore[no-untyped-de
         organization = Organization.objects.create(name="My Organization")
         organization.save()
         print("Default organization 'My Organization' created.")
+
+
+@receiver(post_save, sender=Quiz)
+@receiver(post_delete, sender=Quiz)
+def invalidate_quiz_answer_key(sender, instance, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    invalidate_answer_key(instance.id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_answer_key(sender, instance, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    invalidate_answer_key(instance.quiz_id)
+
+
+@receiver(post_save, sender=Answer)
+@receiver(post_delete, sender=Answer)
+def invalidate_answer_answer_key(sender, instance, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    quiz_id = (
+        Question.objects.filter(pk=instance.question_id)
+        .values_list("quiz_id", flat=True)
+        .first()
+    )
+    if quiz_id is not None:
+        invalidate_answer_key(quiz_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_organization_course_slugs(sender, instance, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    invalidate_course_slugs(instance.organization_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=ImapConnection)
+@receiver(post_delete, sender=ImapConnection)
+def bump_organization_content_version(sender, instance, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    bump_content_version(instance.organization_id)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+def bump_organizations_content_version(sender, instance, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    bump_content_version(instance.id)
+    bump_content_version(ORGANIZATIONS)
+
+
+@receiver(post_save, sender=OrganizationUser)
+@receiver(post_delete, sender=OrganizationUser)
+def bump_memberships_content_version(sender, instance, **kwargs) -> None:  # type: ignore[no-untyped-def]
+    bump_content_version(ORGANIZATIONS)
@@ -0,0 +1,138 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django_email_learning.models import Course, ImapConnection, Organization
+
+
+def courses_url(organization_id: int = 1) -> str:
+    return reverse(
+        "django_email_learning:api:course_view",
+        kwargs={"organization_id": organization_id},
+    )
+
+
+@pytest.fixture()
+def course(db) -> Course:
+    return Course.objects.create(title="Python", slug="python", organization_id=1)
+
+
+def test_unchanged_courses_are_not_modified(course, viewer_client):
+    response = viewer_client.get(courses_url())
+    assert response.status_code == 200
+    etag = response["ETag"]
+
+    with CaptureQueriesContext(connection) as queries:
+        response = viewer_client.get(courses_url(), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert not any("_course" in query["sql"] for query in queries)
+
+
+def test_etag_depends_on_the_query(course, viewer_client):
+    etag = viewer_client.get(courses_url())["ETag"]
+    response = viewer_client.get(
+        courses_url() + "?enabled=true", HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        lambda course: Course.objects.create(title="Go", slug="go", organization_id=1),
+        lambda course: course.delete(),
+        lambda course: ImapConnection.objects.create(
+            organization_id=1,
+            server="imap.example.com",
+            email="user@example.com",
+            password="password",
+        ),
+        lambda course: Organization.objects.filter(pk=1).get().save(),
+    ],
+)
+def test_writes_change_the_etag(
+    course, viewer_client, change, django_capture_on_commit_callbacks
+):
+    etag = viewer_client.get(courses_url())["ETag"]
+    with django_capture_on_commit_callbacks(execute=True):
+        change(course)
+    response = viewer_client.get(courses_url(), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_other_organizations_keep_their_etag(course, viewer_client):
+    etag = viewer_client.get(courses_url())["ETag"]
+    Organization.objects.create(pk=2, name="Organization 2")
+    Course.objects.create(title="Go", slug="go", organization_id=2)
+    response = viewer_client.get(courses_url(), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+
+
+def test_single_course_is_not_modified(
+    course, viewer_client, django_capture_on_commit_callbacks
+):
+    url = reverse(
+        "django_email_learning:api:single_course_view",
+        kwargs={"organization_id": 1, "course_id": course.pk},
+    )
+    etag = viewer_client.get(url)["ETag"]
+    assert viewer_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    course.title = "Python 3"
+    with django_capture_on_commit_callbacks(execute=True):
+        course.save()
+    response = viewer_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert json.loads(response.content)["title"] == "Python 3"
+
+
+def test_organization_list_etag_differs_per_user(
+    superadmin_client, viewer_client, django_capture_on_commit_callbacks
+):
+    url = reverse("django_email_learning:api:organizations_view")
+    etag = superadmin_client.get(url)["ETag"]
+    assert superadmin_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert viewer_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Organization.objects.create(name="Organization 2")
+    assert superadmin_client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_versions_are_bumped_when_the_write_commits(
+    course, viewer_client, django_capture_on_commit_callbacks
+):
+    etag = viewer_client.get(courses_url())["ETag"]
+    with django_capture_on_commit_callbacks() as callbacks:
+        course.delete()
+        # Rows read before the commit are still tagged with the old version.
+        assert (
+            viewer_client.get(courses_url(), HTTP_IF_NONE_MATCH=etag).status_code == 304
+        )
+    for callback in callbacks:
+        callback()
+    assert viewer_client.get(courses_url(), HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+def test_errors_have_no_etag(viewer_client):
+    url = reverse(
+        "django_email_learning:api:single_course_view",
+        kwargs={"organization_id": 1, "course_id": 404},
+    )
+    response = viewer_client.get(url)
+    assert response.status_code == 404
+    assert not response.has_header("ETag")
+
+
+def test_etags_can_be_disabled(course, viewer_client, settings):
+    settings.DJANGO_EMAIL_LEARNING = {"API_ETAGS": False}
+    response = viewer_client.get(courses_url())
+    assert response.status_code == 200
+    assert not response.has_header("ETag")
+    response = viewer_client.get(courses_url(), HTTP_IF_NONE_MATCH="*")
+    assert response.status_code == 200
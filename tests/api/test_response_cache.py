@@ -0,0 +1,109 @@
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django_email_learning.api.response_cache import cache_stats
+from django_email_learning.checks import check_api_cache
+from django_email_learning.models import Course, Organization
+
+pytestmark = pytest.mark.usefixtures("shared_api_cache")
+
+
+def courses_url(organization_id: int = 1) -> str:
+    return reverse(
+        "django_email_learning:api:course_view",
+        kwargs={"organization_id": organization_id},
+    )
+
+
+@pytest.fixture()
+def course(db) -> Course:
+    return Course.objects.create(title="Python", slug="python", organization_id=1)
+
+
+def test_responses_are_served_from_the_cache(course, viewer_client):
+    first = viewer_client.get(courses_url())
+    with CaptureQueriesContext(connection) as queries:
+        second = viewer_client.get(courses_url())
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second["ETag"] == first["ETag"]
+    assert not any("_course" in query["sql"] for query in queries)
+    assert cache_stats() == {"hits": 1, "misses": 1}
+
+
+def test_entries_are_kept_per_query_and_role(course, viewer_client, editor_client):
+    viewer_client.get(courses_url())
+    viewer_client.get(courses_url() + "?enabled=true")
+    editor_client.get(courses_url())
+    assert cache_stats() == {"hits": 0, "misses": 3}
+
+
+def test_writes_invalidate_the_cache(
+    course, viewer_client, django_capture_on_commit_callbacks
+):
+    viewer_client.get(courses_url())
+    course.title = "Python 3"
+    with django_capture_on_commit_callbacks(execute=True):
+        course.save()
+    response = viewer_client.get(courses_url())
+    assert json.loads(response.content)["courses"][0]["title"] == "Python 3"
+    assert cache_stats() == {"hits": 0, "misses": 2}
+
+
+def test_errors_and_streams_are_not_cached(course, viewer_client):
+    for _ in range(2):
+        viewer_client.get(courses_url() + "?limit=0")
+        viewer_client.get(courses_url() + "?format=ndjson")
+    assert cache_stats() == {"hits": 0, "misses": 4}
+
+
+def test_cache_can_be_disabled(course, viewer_client, settings):
+    settings.DJANGO_EMAIL_LEARNING = {"API_CACHE_TIMEOUT": 0}
+    viewer_client.get(courses_url())
+    viewer_client.get(courses_url())
+    assert cache_stats() == {"hits": 0, "misses": 0}
+
+
+def test_organization_list_is_cached_per_user(superadmin_client, viewer_client):
+    url = reverse("django_email_learning:api:organizations_view")
+    superadmin_client.get(url)
+    viewer_client.get(url)
+    superadmin_client.get(url)
+    assert cache_stats() == {"hits": 1, "misses": 2}
+
+
+def test_cache_is_disabled_by_default(course, viewer_client, settings):
+    settings.DJANGO_EMAIL_LEARNING = {}
+    viewer_client.get(courses_url())
+    viewer_client.get(courses_url())
+    assert cache_stats() == {"hits": 0, "misses": 0}
+    assert check_api_cache(None) == []
+
+
+def test_cache_is_refused_with_a_local_memory_default_cache(
+    course, viewer_client, settings
+):
+    settings.CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    }
+    viewer_client.get(courses_url())
+    viewer_client.get(courses_url())
+    assert cache_stats() == {"hits": 0, "misses": 0}
+    assert [error.id for error in check_api_cache(None)] == [
+        "django_email_learning.E001"
+    ]
+
+
+def test_single_course_is_only_served_in_its_organization(course, viewer_client):
+    Organization.objects.create(pk=2, name="Organization 2")
+    other = Course.objects.create(title="Go", slug="go", organization_id=2)
+    url = reverse(
+        "django_email_learning:api:single_course_view",
+        kwargs={"organization_id": 1, "course_id": other.pk},
+    )
+    assert viewer_client.get(url).status_code == 404
+    assert viewer_client.get(url).status_code == 404
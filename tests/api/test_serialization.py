@@ -0,0 +1,41 @@
+import json
+
+import pytest
+from django_email_learning.api import serializers
+from django_email_learning.api.serialization import json_response, response_rows
+from django_email_learning.models import Course, ImapConnection, Organization
+
+
+@pytest.fixture()
+def records(db):
+    connection = ImapConnection.objects.create(
+        organization_id=1,
+        server="imap.example.com",
+        email="user@example.com",
+        password="password",
+    )
+    Course.objects.create(
+        title="Python", slug="python", organization_id=1, imap_connection=connection
+    )
+    Course.objects.create(title="Go", slug="go", description="Go!", organization_id=1)
+
+
+@pytest.mark.parametrize(
+    "model,response_model",
+    [
+        (Course, serializers.CourseResponse),
+        (ImapConnection, serializers.ImapConnectionResponse),
+        (Organization, serializers.OrganizationResponse),
+    ],
+)
+def test_rows_match_the_response_models(records, model, response_model):
+    queryset = model.objects.order_by("pk")
+    expected = [response_model.model_validate(obj).model_dump() for obj in queryset]
+    assert list(response_rows(queryset, response_model)) == expected
+
+
+def test_json_response():
+    response = json_response({"courses": [{"id": 1, "title": "Ünïcode"}]}, 201)
+    assert response.status_code == 201
+    assert response["Content-Type"] == "application/json"
+    assert json.loads(response.content) == {"courses": [{"id": 1, "title": "Ünïcode"}]}
@@ -204,6 +204,76 @@ def test_get_courses_filter_by_enabled(
         assert response.json()["courses"][0]["enabled"] is (enabled == "true")
 
 
+@pytest.fixture()
+def many_courses(db) -> list[Course]:
+    return Course.objects.bulk_create(
+        Course(
+            title=f"Course {i}",
+            slug=f"course-{i}",
+            enabled=i % 2 == 0,
+            organization_id=1,
+        )
+        for i in range(7)
+    )
+
+
+def test_get_courses_pages_follow_the_cursor(many_courses, superadmin_client):
+    titles = []
+    url = get_url(1) + "?limit=3"
+    while url:
+        response = superadmin_client.get(url)
+        assert response.status_code == 200
+        assert len(response.json()["courses"]) <= 3
+        titles += [course["title"] for course in response.json()["courses"]]
+        cursor = response.json()["next"]
+        url = cursor and get_url(1) + f"?limit=3&cursor={cursor}"
+    assert titles == [f"Course {i}" for i in range(7)]
+
+
+def test_get_courses_pages_keep_the_enabled_filter(many_courses, superadmin_client):
+    response = superadmin_client.get(get_url(1) + "?enabled=true&limit=2")
+    first_page = response.json()
+    response = superadmin_client.get(
+        get_url(1) + f"?enabled=true&limit=2&cursor={first_page['next']}"
+    )
+    second_page = response.json()
+    assert [c["title"] for c in first_page["courses"] + second_page["courses"]] == [
+        "Course 0",
+        "Course 2",
+        "Course 4",
+        "Course 6",
+    ]
+    assert second_page["next"] is None
+
+
+def test_get_courses_limit_is_capped(many_courses, superadmin_client, settings):
+    settings.DJANGO_EMAIL_LEARNING = {"API_MAX_PAGE_SIZE": 5}
+    response = superadmin_client.get(get_url(1) + "?limit=1000")
+    assert len(response.json()["courses"]) == 5
+    assert response.json()["next"] is not None
+
+
+def test_get_courses_as_ndjson(many_courses, superadmin_client, settings):
+    settings.DJANGO_EMAIL_LEARNING = {"API_STREAM_CHUNK_SIZE": 2}
+    response = superadmin_client.get(get_url(1) + "?format=ndjson&enabled=false")
+    assert response.streaming
+    lines = b"".join(response.streaming_content).splitlines()
+    courses = [json.loads(line) for line in lines]
+    assert [course["title"] for course in courses] == [
+        "Course 1",
+        "Course 3",
+        "Course 5",
+    ]
+    assert courses[0]["organization_id"] == 1
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=many", "cursor=bm9wZQ"])
+def test_get_courses_invalid_page(superadmin_client, query):
+    response = superadmin_client.get(get_url(1) + f"?{query}")
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
 def test_update_course_success(superadmin_client):
     # First, create a course to update
     create_payload = valid_create_course_payload()
@@ -306,7 +376,9 @@ def test_viewer_not_allowed_to_delete_course(sample_course, viewer_client):
     assert delete_response.status_code == 403
 
 
-def test_editor_can_delete_course(sample_course, editor_client):
+def test_editor_can_delete_course(
+    sample_course, editor_client, django_capture_on_commit_callbacks
+):
     # Check that we have one course before the delete
     courses = editor_client.get(get_url(1))
     assert len(courses.json().get("courses")) == 1
@@ -315,7 +387,8 @@ def test_editor_can_delete_course(sample_course, editor_client):
         "django_email_learning:api:single_course_view",
         kwargs={"organization_id": 1, "course_id": sample_course["id"]},
     )
-    delete_response = editor_client.delete(url)
+    with django_capture_on_commit_callbacks(execute=True):
+        delete_response = editor_client.delete(url)
     assert delete_response.status_code == 200
 
     # Check that we don't have any course after the delete
@@ -1,3 +1,5 @@
+import json
+
 from django.urls import reverse
 from django_email_learning.models import ImapConnection
 
@@ -46,6 +48,43 @@ def test_get_imap_connections_with_data(superadmin_client, viewer_client):
     assert "id" in imap_connection
 
 
+def test_get_imap_connections_pages(viewer_client):
+    for i in range(3):
+        ImapConnection.objects.create(
+            organization_id=1,
+            server="imap.example.com",
+            email=f"user{i}@example.com",
+            password="password",
+        )
+    first_page = viewer_client.get(get_url(1) + "?limit=2").json()
+    assert [c["email"] for c in first_page["imap_connections"]] == [
+        "user0@example.com",
+        "user1@example.com",
+    ]
+    second_page = viewer_client.get(
+        get_url(1) + f"?limit=2&cursor={first_page['next']}"
+    ).json()
+    assert second_page == {
+        "imap_connections": [second_page["imap_connections"][0]],
+        "next": None,
+    }
+    assert second_page["imap_connections"][0]["email"] == "user2@example.com"
+
+
+def test_get_imap_connections_as_ndjson(viewer_client):
+    ImapConnection.objects.create(
+        organization_id=1,
+        server="imap.example.com",
+        email="user@example.com",
+        password="password",
+    )
+    response = viewer_client.get(get_url(1) + "?format=ndjson")
+    assert response["Content-Type"] == "application/x-ndjson"
+    (line,) = b"".join(response.streaming_content).splitlines()
+    assert json.loads(line)["email"] == "user@example.com"
+    assert "password" not in json.loads(line)
+
+
 def test_create_imap_connection_success(superadmin_client):
     payload = {
         "email": "user@example.com",
@@ -1,3 +1,5 @@
+import json
+
 from django_email_learning.models import Organization
 from django.urls import reverse
 import pytest
@@ -30,6 +32,20 @@ def test_get_organizations_view_as_organization_user(client):
     assert response.json().get("organizations")[0].get("name") != "Second Org"
 
 
+def test_get_organizations_as_ndjson(superadmin_client, viewer_client):
+    response = superadmin_client.get(get_url() + "?format=ndjson")
+    assert response.streaming
+    assert response["Content-Type"] == "application/x-ndjson"
+    lines = b"".join(response.streaming_content).splitlines()
+    assert [json.loads(line)["name"] for line in lines] == [
+        "My Organization",
+        "Second Org",
+    ]
+
+    response = viewer_client.get(get_url() + "?format=ndjson")
+    assert len(b"".join(response.streaming_content).splitlines()) == 1
+
+
 def test_get_organizations_view_as_anonymous(anonymous_client):
     response = anonymous_client.get(get_url())
     assert response.status_code == 401
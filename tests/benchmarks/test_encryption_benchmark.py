@@ -0,0 +1,48 @@
+"""
+Throughput benchmarks for ImapConnection password encryption.
+
+Run with: pytest -m slow -s tests/benchmarks/test_encryption_benchmark.py
+"""
+
+import base64
+import time
+
+import pytest
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from django.conf import settings
+
+from django_email_learning.models import FIXED_SALT, ImapConnection
+
+ITERATIONS = 20
+
+
+def uncached_fernet() -> Fernet:
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(), length=32, salt=FIXED_SALT, iterations=100000
+    )
+    return Fernet(base64.urlsafe_b64encode(kdf.derive(settings.SECRET_KEY.encode())))
+
+
+def round_trips_per_second(get_fernet) -> float:  # type: ignore[no-untyped-def]
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        token = get_fernet().encrypt(b"my_secret_password")
+        get_fernet().decrypt(token)
+    return ITERATIONS / (time.perf_counter() - start)
+
+
+@pytest.mark.slow
+def test_encrypt_decrypt_throughput():
+    connection = ImapConnection()
+    connection._fernet()  # Warm up the process-wide cache
+
+    uncached = round_trips_per_second(uncached_fernet)
+    cached = round_trips_per_second(connection._fernet)
+
+    print(
+        f"\nencrypt+decrypt round trips/s: uncached={uncached:,.0f} "
+        f"cached={cached:,.0f} speedup={cached / uncached:,.0f}x"
+    )
+    assert cached > uncached
@@ -0,0 +1,57 @@
+"""
+Throughput benchmarks for batch quiz grading.
+
+Run with: pytest -m slow -s tests/benchmarks/test_grading_benchmark.py
+"""
+
+import random
+import time
+
+import pytest
+
+from django_email_learning.answer_keys import AnswerKey
+from django_email_learning.grading import grade_submissions
+
+QUESTIONS = 10
+ANSWERS = 4
+
+
+@pytest.fixture(scope="module")
+def answer_key() -> AnswerKey:
+    rng = random.Random(0)
+    return AnswerKey(
+        quiz_id=1,
+        version=1,
+        required_score=70,
+        question_ids=tuple(range(QUESTIONS)),
+        answer_ids=tuple(
+            tuple(range(q * ANSWERS, (q + 1) * ANSWERS)) for q in range(QUESTIONS)
+        ),
+        correct_masks=tuple(rng.randrange(1, 2**ANSWERS) for _ in range(QUESTIONS)),
+        multiple_choice=(False,) * QUESTIONS,
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("submission_count", [10_000, 100_000])
+def test_batch_grading_throughput(answer_key, submission_count):
+    rng = random.Random(submission_count)
+    submissions = [
+        [rng.randrange(2**ANSWERS) for _ in range(QUESTIONS)]
+        for _ in range(submission_count)
+    ]
+
+    start = time.perf_counter()
+    for submission in submissions:
+        answer_key.passes(submission)
+    one_by_one = submission_count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    result = grade_submissions(answer_key, submissions)
+    batched = submission_count / (time.perf_counter() - start)
+
+    print(
+        f"\n{submission_count:,} submissions graded/s: "
+        f"one by one={one_by_one:,.0f} batched={batched:,.0f}"
+    )
+    assert len(result) == submission_count
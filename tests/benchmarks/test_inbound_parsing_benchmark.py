@@ -0,0 +1,53 @@
+"""
+Scaling benchmark for the process pool stage parsing inbound replies.
+
+Run with: pytest -m slow -s tests/benchmarks/test_inbound_parsing_benchmark.py
+"""
+
+import os
+import time
+
+import pytest
+
+from django_email_learning.conf import app_setting
+from django_email_learning.inbound.pipeline import ParsingStage
+from tests.fake_servers.mailboxes import synthetic_mailbox
+
+CORPUS_SIZE = 20_000
+
+
+@pytest.fixture(scope="module")
+def corpus() -> list[tuple[int, bytes, bytes]]:
+    slugs = tuple(f"course-{n}" for n in range(20))
+    messages = []
+    for uid, raw in enumerate(synthetic_mailbox(CORPUS_SIZE, slugs=slugs), start=1):
+        header, separator, body = raw.partition(b"\r\n\r\n")
+        # Only the start of the body is fetched, see IMAP_PARTIAL_BODY_BYTES.
+        messages.append((uid, header + separator, body[:8192]))
+    return messages
+
+
+@pytest.mark.slow
+def test_parsing_scales_with_workers(corpus):
+    cores = os.cpu_count() or 1
+    worker_counts = sorted({n for n in (0, 1, 2, 4, 8, cores) if n <= cores})
+    baseline = None
+    for workers in worker_counts:
+        # Messages are parsed in the batches sync_mailbox fetches.
+        batch_size = app_setting("IMAP_FETCH_BATCH_SIZE")
+        with ParsingStage(workers=workers) as stage:
+            # Start the workers before timing.
+            stage.parse(corpus[:batch_size])
+            start = time.perf_counter()
+            replies = []
+            for position in range(0, CORPUS_SIZE, batch_size):
+                replies += stage.parse(corpus[position : position + batch_size])
+            elapsed = time.perf_counter() - start
+
+        assert len(replies) == CORPUS_SIZE
+        assert all(reply.tokens for reply in replies)
+        baseline = baseline or elapsed
+        print(
+            f"\n{workers} workers ({cores} cores): {CORPUS_SIZE / elapsed:,.0f} "
+            f"messages/s, speedup {baseline / elapsed:.2f}x"
+        )
@@ -0,0 +1,110 @@
+"""
+Throughput, latency and failure handling of the delivery and ingest paths
+against the fake mail servers, with injected latency and failures.
+
+Run with: pytest -m slow -s tests/benchmarks/test_mail_throughput_benchmark.py
+"""
+
+import imaplib
+import statistics
+import time
+
+import pytest
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from django_email_learning.delivery.outbox import drain_outbox
+from django_email_learning.delivery.smtp import get_email_backend
+from django_email_learning.inbound.fetch import sync_mailbox
+from django_email_learning.inbound.imap import ImapIdentity, connect
+from django_email_learning.inbound.pipeline import ParsingStage, ReplyPipeline
+from django_email_learning.models import InboundReply, OutboxMessage
+from tests.fake_servers.mailboxes import synthetic_mailbox
+
+MESSAGES = 300
+LATENCY = 0.001
+
+
+def percentiles(samples: list[float]) -> str:
+    cuts = statistics.quantiles(samples, n=100)
+    return " ".join(f"p{p}={cuts[p - 1] * 1000:.1f}ms" for p in (50, 95, 99))
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+def test_delivery_throughput_with_failures(smtp_server, fake_mail_account):
+    faults = smtp_server.state.faults
+    faults.latency = LATENCY
+    faults.failure_rate = 0.05
+    OutboxMessage.objects.bulk_create(
+        OutboxMessage(
+            imap_connection=fake_mail_account,
+            from_email=fake_mail_account.email,
+            to=f"learner{i}@example.com",
+            subject="Lesson",
+            body="Lesson content",
+        )
+        for i in range(MESSAGES)
+    )
+
+    start = time.perf_counter()
+    sent = drain_outbox(timezone.now())
+    elapsed = time.perf_counter() - start
+    failures = faults.injected
+
+    retried = OutboxMessage.objects.filter(status="pending", attempts=1)
+    assert sent == len(smtp_server.state.messages) == MESSAGES - failures
+    assert retried.count() == failures > 0
+    assert all(message.next_attempt_at > timezone.now() for message in retried)
+
+    backend = get_email_backend(fake_mail_account)
+    backend.open()
+    latencies = []
+    for i in range(MESSAGES):
+        message = EmailMessage("Lesson", "Lesson content", to=[f"l{i}@example.com"])
+        start_send = time.perf_counter()
+        try:
+            backend.send_messages([message])
+        except Exception:
+            continue
+        latencies.append(time.perf_counter() - start_send)
+    backend.close()
+
+    print(
+        f"\n{MESSAGES / elapsed:,.0f} messages/s with {LATENCY * 1000:.0f}ms "
+        f"latency, {failures} transient failures rescheduled, "
+        f"send latency {percentiles(latencies)}"
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+def test_ingest_throughput_with_dropped_connections(imap_server, fake_mail_account):
+    state = imap_server.state
+    state.mailbox().deliver(*synthetic_mailbox(MESSAGES))
+    state.faults.latency = LATENCY
+    state.faults.failure_rate = 0.2
+    identity = ImapIdentity.from_imap_connection(fake_mail_account)
+
+    start = time.perf_counter()
+    with ParsingStage(workers=0) as stage:
+        pipeline = ReplyPipeline(stage)
+        while True:
+            client = connect(identity, timeout=5)
+            try:
+                sync_mailbox(client, fake_mail_account.pk, pipeline, batch_size=10)
+                client.logout()
+                break
+            except imaplib.IMAP4.abort:
+                continue
+    elapsed = time.perf_counter() - start
+
+    replies = InboundReply.objects.filter(imap_connection=fake_mail_account)
+    assert replies.count() == MESSAGES
+    assert state.faults.injected > 0
+    print(
+        f"\n{MESSAGES / elapsed:,.0f} replies/s with {LATENCY * 1000:.0f}ms "
+        f"latency, {state.connections} connections for "
+        f"{state.faults.injected} dropped fetches, "
+        f"{state.fetched_messages} messages fetched"
+    )
@@ -0,0 +1,55 @@
+"""
+Per-row pydantic validation against bulk serialization of course lists.
+
+Run with: pytest -m slow -s tests/benchmarks/test_serialization_benchmark.py
+"""
+
+import json
+import time
+
+import pytest
+from django.http import JsonResponse
+
+from django_email_learning.api.serialization import json_response, response_rows
+from django_email_learning.api.serializers import CourseResponse
+from django_email_learning.models import Course
+
+
+def per_row(queryset) -> JsonResponse:  # type: ignore[no-untyped-def]
+    return JsonResponse(
+        {"courses": [CourseResponse.model_validate(c).model_dump() for c in queryset]}
+    )
+
+
+def bulk(queryset):  # type: ignore[no-untyped-def]
+    return json_response({"courses": list(response_rows(queryset, CourseResponse))})
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+@pytest.mark.parametrize("row_count", [1_000, 10_000])
+def test_bulk_serialization_speedup(row_count):
+    Course.objects.bulk_create(
+        Course(
+            title=f"Course {i}",
+            slug=f"course-{i}",
+            description="A course about many things. " * 4,
+            organization_id=1,
+        )
+        for i in range(row_count)
+    )
+    queryset = Course.objects.filter(organization_id=1)
+
+    timings = {}
+    for serialize in (per_row, bulk):
+        start = time.perf_counter()
+        response = serialize(queryset)
+        timings[serialize.__name__] = time.perf_counter() - start
+        assert len(json.loads(response.content)["courses"]) == row_count
+
+    print(
+        f"\n{row_count:,} courses: per row {timings['per_row'] * 1000:.1f}ms, "
+        f"bulk {timings['bulk'] * 1000:.1f}ms "
+        f"({timings['per_row'] / timings['bulk']:.1f}x)"
+    )
+    assert timings["bulk"] < timings["per_row"]
@@ -0,0 +1,70 @@
+"""
+Throughput of sending lessons with and without SMTP connection pooling.
+
+Run with: pytest -m slow -s tests/benchmarks/test_smtp_benchmark.py
+"""
+
+import time
+
+import pytest
+from django.core.mail import EmailMessage
+from django.core.mail.backends.smtp import EmailBackend
+
+from django_email_learning.delivery.smtp import SmtpConnectionPool, SmtpIdentity
+from tests.fake_servers.smtp import FakeSmtpServer, SmtpServerState
+
+MESSAGES = 100
+
+
+def make_messages() -> list[EmailMessage]:
+    return [
+        EmailMessage(
+            subject="Lesson",
+            body="Lesson content",
+            from_email="sender@example.com",
+            to=[f"learner{i}@example.com"],
+        )
+        for i in range(MESSAGES)
+    ]
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("connect_delay", [0.0, 0.01])
+def test_pooled_smtp_throughput(connect_delay):
+    state = SmtpServerState(connect_delay=connect_delay)
+    with FakeSmtpServer(state) as server:
+        start = time.perf_counter()
+        for message in make_messages():
+            backend = EmailBackend(
+                host=server.host,
+                port=server.port,
+                username=state.username,
+                password=state.password,
+            )
+            backend.send_messages([message])
+        unpooled = MESSAGES / (time.perf_counter() - start)
+
+        pool = SmtpConnectionPool(
+            SmtpIdentity(
+                server.host,
+                server.port,
+                state.username,
+                state.password,
+                allow_plaintext=True,
+            ),
+            max_connections=1,
+            max_messages_per_connection=MESSAGES,
+        )
+        # The outbox and the worker send one message per call.
+        start = time.perf_counter()
+        for message in make_messages():
+            pool.send_messages([message])
+        pooled = MESSAGES / (time.perf_counter() - start)
+        pool.close()
+
+    print(
+        f"\nmessages/s with {connect_delay * 1000:.0f}ms handshake: "
+        f"connection per message={unpooled:,.0f} pooled={pooled:,.0f}"
+    )
+    assert len(state.messages) == 2 * MESSAGES
+    assert state.noops == 0
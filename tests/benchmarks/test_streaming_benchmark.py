@@ -0,0 +1,62 @@
+"""
+Peak memory of listing courses with a JSON body and with an NDJSON stream.
+
+Run with: pytest -m slow -s tests/benchmarks/test_streaming_benchmark.py
+"""
+
+import tracemalloc
+
+import pytest
+
+from django_email_learning.api.serialization import (
+    json_response,
+    ndjson_response,
+    response_rows,
+)
+from django_email_learning.api.serializers import CourseResponse
+from django_email_learning.models import Course
+
+
+def peak_memory(make_response) -> int:  # type: ignore[no-untyped-def]
+    tracemalloc.start()
+    response = make_response()
+    for _ in response:
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+def test_streaming_memory_stays_flat(settings):
+    # Several chunks per stream, the peak holds the rows of two chunks.
+    settings.DJANGO_EMAIL_LEARNING = {"API_STREAM_CHUNK_SIZE": 500}
+    peaks = {}
+    created = 0
+    for row_count in (2_000, 20_000):
+        Course.objects.bulk_create(
+            Course(
+                title=f"Course {i}",
+                slug=f"course-{i}",
+                description="A course about many things. " * 4,
+                organization_id=1,
+            )
+            for i in range(created, row_count)
+        )
+        created = row_count
+        rows = response_rows(Course.objects.all(), CourseResponse)
+        peaks[row_count] = (
+            peak_memory(lambda: json_response({"courses": list(rows.all())})),
+            peak_memory(lambda: ndjson_response(rows.all())),
+        )
+        print(
+            f"\n{row_count:,} courses: peak memory "
+            f"json={peaks[row_count][0] / 2**20:.1f}MiB "
+            f"ndjson={peaks[row_count][1] / 2**20:.1f}MiB"
+        )
+
+    # Ten times the rows take ten times the memory as one JSON body but not
+    # as a stream.
+    assert peaks[20_000][0] > 5 * peaks[2_000][0]
+    assert peaks[20_000][1] < 1.5 * peaks[2_000][1]
@@ -0,0 +1,57 @@
+import pytest
+from django.core.cache import cache
+from django_email_learning.delivery.smtp import close_pools
+from django_email_learning.models import ImapConnection
+from tests.fake_servers.imap import DEFAULT_ACCOUNT, FakeImapServer
+from tests.fake_servers.smtp import FakeSmtpServer
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # The database is rolled back after every test without firing the signals
+    # that invalidate cached data.
+    yield
+    cache.clear()
+
+
+@pytest.fixture()
+def imap_server():
+    with FakeImapServer() as server:
+        yield server
+
+
+@pytest.fixture()
+def smtp_server():
+    with FakeSmtpServer() as server:
+        yield server
+    close_pools()
+
+
+@pytest.fixture()
+def fake_mail_account(db, imap_server, smtp_server) -> ImapConnection:
+    """An ImapConnection reading from and sending through the fake servers."""
+    smtp_server.state.username = DEFAULT_ACCOUNT
+    connection = ImapConnection(
+        server=imap_server.host,
+        port=imap_server.port,
+        smtp_server=smtp_server.host,
+        smtp_port=smtp_server.port,
+        email=DEFAULT_ACCOUNT,
+        password=imap_server.state.mailbox().password,
+        organization_id=1,
+        allow_plaintext=True,
+    )
+    connection.save()
+    return connection
+
+
+@pytest.fixture()
+def shared_api_cache(settings, tmp_path):
+    """Enable the API response cache with a default cache shared by processes."""
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    }
+    settings.DJANGO_EMAIL_LEARNING = {"API_CACHE_TIMEOUT": 300}
@@ -0,0 +1,37 @@
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+
+
+@dataclass
+class Faults:
+    """
+    Latency and failures injected by the fake servers.
+
+    ``latency`` is added to every reply that ends a network round trip.
+    ``failure_rate`` is the probability of a command failing, how a failure
+    looks depends on the server.
+    """
+
+    latency: float = 0.0
+    failure_rate: float = 0.0
+    seed: int = 0
+    injected: int = 0
+    rng: random.Random = field(init=False)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __post_init__(self) -> None:
+        self.rng = random.Random(self.seed)
+
+    def delay(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def fail(self) -> bool:
+        if not self.failure_rate:
+            return False
+        with self.lock:
+            failed = self.rng.random() < self.failure_rate
+            self.injected += failed
+        return failed
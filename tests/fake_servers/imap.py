@@ -0,0 +1,260 @@
+"""
+A small in-process IMAP server to test the inbound path without a real
+mail provider.
+"""
+
+import re
+import select
+import shlex
+import socket
+import socketserver
+import threading
+from dataclasses import dataclass, field
+
+from tests.fake_servers.faults import Faults
+
+FETCH_SECTION_RE = re.compile(r"BODY(?:\.PEEK)?\[([A-Z]*)\](?:<0\.(\d+)>)?")
+
+
+@dataclass
+class Mailbox:
+    password: str = "secret"
+    messages: list[bytes] = field(default_factory=list)
+    uidvalidity: int = 1
+    # UID of messages[0], UIDs of the mailbox are consecutive.
+    first_uid: int = 1
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def deliver(self, *messages: bytes) -> None:
+        with self.lock:
+            self.messages.extend(messages)
+
+    def uid(self, index: int) -> int:
+        return self.first_uid + index
+
+    def reset_uidvalidity(self, first_uid: int = 1) -> None:
+        """Renumber the messages, as servers do when a mailbox is recreated."""
+        with self.lock:
+            self.uidvalidity += 1
+            self.first_uid = first_uid
+
+
+DEFAULT_ACCOUNT = "course@example.com"
+
+
+@dataclass
+class ImapServerState:
+    """
+    Accounts and counters of a FakeImapServer.
+
+    Injected failures drop the connection while answering a FETCH.
+    """
+
+    idle: bool = True
+    accounts: dict[str, Mailbox] = field(
+        default_factory=lambda: {DEFAULT_ACCOUNT: Mailbox()}
+    )
+    faults: Faults = field(default_factory=Faults)
+    connections: int = 0
+    logins: int = 0
+    fetch_commands: int = 0
+    fetched_messages: int = 0
+    fetched_bytes: int = 0
+    # Increased by drop_connections(), sessions of an older generation close.
+    generation: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def mailbox(self, username: str = DEFAULT_ACCOUNT) -> Mailbox:
+        return self.accounts[username]
+
+    def add_account(self, username: str, password: str = "secret") -> Mailbox:
+        with self.lock:
+            mailbox = self.accounts[username] = Mailbox(password=password)
+        return mailbox
+
+    def deliver(self, message: bytes, to: str = DEFAULT_ACCOUNT) -> None:
+        self.accounts[to].deliver(message)
+
+    def drop_connections(self) -> None:
+        with self.lock:
+            self.generation += 1
+
+
+class ImapHandler(socketserver.StreamRequestHandler):
+    server: "FakeImapServer"
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def complete(self, line: str) -> None:
+        """Send a tagged reply, which ends a round trip of the client."""
+        self.server.state.faults.delay()
+        self.reply(line)
+
+    def dropped(self) -> bool:
+        return self.server.state.generation != self.generation
+
+    def report_new_mail(self) -> None:
+        count = len(self.mailbox.messages)
+        if count != self.reported:
+            self.reported = count
+            self.reply(f"* {count} EXISTS")
+
+    def handle(self) -> None:
+        state = self.server.state
+        with state.lock:
+            state.connections += 1
+            self.generation = state.generation
+        self.mailbox = Mailbox()
+        self.reported = 0
+        self.reply("* OK fake.imap ready")
+        authenticated = False
+
+        while line := self.rfile.readline():
+            if self.dropped():
+                return
+            tag, _, rest = line.decode().rstrip("\r\n").partition(" ")
+            command, _, argument = rest.partition(" ")
+            command = command.upper()
+            if command == "CAPABILITY":
+                capabilities = "IMAP4rev1 IDLE" if state.idle else "IMAP4rev1"
+                self.reply(f"* CAPABILITY {capabilities}")
+                self.complete(f"{tag} OK CAPABILITY completed")
+            elif command == "LOGIN":
+                username, password = shlex.split(argument)
+                mailbox = state.accounts.get(username)
+                if mailbox is not None and mailbox.password == password:
+                    authenticated = True
+                    self.mailbox = mailbox
+                    with state.lock:
+                        state.logins += 1
+                    self.complete(f"{tag} OK LOGIN completed")
+                else:
+                    self.complete(
+                        f"{tag} NO [AUTHENTICATIONFAILED] Invalid credentials"
+                    )
+            elif not authenticated and command != "LOGOUT":
+                self.complete(f"{tag} BAD Not authenticated")
+            elif command == "SELECT":
+                mailbox = self.mailbox
+                self.reported = len(mailbox.messages)
+                self.reply(f"* {self.reported} EXISTS")
+                self.reply("* 0 RECENT")
+                self.reply(f"* OK [UIDVALIDITY {mailbox.uidvalidity}] UIDs valid")
+                self.reply(f"* OK [UIDNEXT {mailbox.uid(len(mailbox.messages))}]")
+                self.complete(f"{tag} OK [READ-WRITE] SELECT completed")
+            elif command == "UID":
+                if not self.uid_command(tag, argument):
+                    return
+            elif command == "NOOP":
+                self.report_new_mail()
+                self.complete(f"{tag} OK NOOP completed")
+            elif command == "IDLE" and state.idle:
+                self.reply("+ idling")
+                if not self.idle():
+                    return
+                self.complete(f"{tag} OK IDLE terminated")
+            elif command == "LOGOUT":
+                self.reply("* BYE fake.imap logging out")
+                self.complete(f"{tag} OK LOGOUT completed")
+                return
+            else:
+                self.complete(f"{tag} BAD Command not implemented")
+
+    def uid_set(self, uid_set: str) -> list[int]:
+        """Return the indexes of the messages in ``uid_set``."""
+        mailbox = self.mailbox
+        highest = mailbox.uid(len(mailbox.messages) - 1)
+        indexes: set[int] = set()
+        for part in uid_set.split(","):
+            first, _, last = part.partition(":")
+            bounds = [
+                highest if uid == "*" else int(uid) for uid in (first, last or first)
+            ]
+            low, high = min(bounds), max(bounds)
+            indexes.update(
+                index
+                for index in range(len(mailbox.messages))
+                if low <= mailbox.uid(index) <= high
+            )
+        return sorted(indexes)
+
+    @staticmethod
+    def section(message: bytes, section: str, length: str) -> tuple[str, bytes]:
+        header, separator, text = message.partition(b"\r\n\r\n")
+        if section == "HEADER":
+            literal = header + separator
+        elif section == "TEXT":
+            literal = text
+        else:
+            literal = message
+        label = f"BODY[{section}]"
+        if length:
+            literal = literal[: int(length)]
+            label += "<0>"
+        return label, literal
+
+    def uid_command(self, tag: str, argument: str) -> bool:
+        """Answer a UID command, False when an injected failure dropped it."""
+        state, mailbox = self.server.state, self.mailbox
+        command, _, rest = argument.partition(" ")
+        command = command.upper()
+        if command == "SEARCH" and rest.upper().startswith("UID "):
+            uids = [mailbox.uid(index) for index in self.uid_set(rest[4:])]
+            self.reply("* SEARCH" + "".join(f" {uid}" for uid in uids))
+            self.complete(f"{tag} OK SEARCH completed")
+        elif command == "FETCH":
+            uid_set, _, items = rest.partition(" ")
+            sections = FETCH_SECTION_RE.findall(items)
+            indexes = self.uid_set(uid_set)
+            if indexes and state.faults.fail():
+                return False
+            with state.lock:
+                state.fetch_commands += 1
+                state.fetched_messages += len(indexes)
+            for index in indexes:
+                response = f"* {index + 1} FETCH (UID {mailbox.uid(index)}".encode()
+                for section, length in sections:
+                    label, literal = self.section(
+                        mailbox.messages[index], section, length
+                    )
+                    state.fetched_bytes += len(literal)
+                    response += f" {label} {{{len(literal)}}}\r\n".encode() + literal
+                self.wfile.write(response + b")\r\n")
+            self.complete(f"{tag} OK FETCH completed")
+        else:
+            self.complete(f"{tag} BAD UID {command} not implemented")
+        return True
+
+    def idle(self) -> bool:
+        """Push new mail until the client sends DONE, False when dropped."""
+        while not self.dropped():
+            self.report_new_mail()
+            readable, _, _ = select.select([self.connection], [], [], 0.02)
+            if readable:
+                return self.rfile.readline().strip().upper() == b"DONE"
+        return False
+
+
+class FakeImapServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, state: ImapServerState | None = None) -> None:
+        super().__init__(("127.0.0.1", 0), ImapHandler)
+        self.state = state or ImapServerState()
+        self.host, self.port = self.server_address[:2]  # type: ignore[misc]
+
+    def __enter__(self) -> "FakeImapServer":
+        threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *args) -> None:  # type: ignore[no-untyped-def]
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,50 @@
+"""Synthetic learner replies to load the fake IMAP server with."""
+
+import base64
+import random
+from email.message import EmailMessage
+
+
+def synthetic_reply(rng: random.Random, sender: str, slug: str) -> bytes:
+    """
+    Return a learner reply to a quiz, as plain text, quoted-printable or
+    base64, with quoted history and sometimes an HTML part or an attachment.
+    """
+    message = EmailMessage()
+    message["From"] = f"Learner <{sender}>"
+    message["Subject"] = f"Re: [{slug}] Quiz {rng.randrange(7)}"
+    answers = ",".join(str(rng.randrange(1, 5)) for _ in range(rng.randrange(1, 4)))
+    quoted = "".join(f"> {rng.random()} quoted line\n" for _ in range(40))
+    message.set_content(
+        f"\nanswer {rng.randrange(1, 50)} {answers}\n\nOn Mon, Course wrote:\n{quoted}",
+        cte=rng.choice(["quoted-printable", "base64", "8bit"]),
+    )
+    if rng.random() < 0.3:
+        message.add_alternative(f"<p>{answers}</p>", subtype="html")
+    if rng.random() < 0.2:
+        message.add_attachment(
+            base64.b64encode(rng.randbytes(3000)), maintype="image", subtype="png"
+        )
+    return message.as_bytes().replace(b"\n", b"\r\n")
+
+
+def synthetic_mailbox(
+    count: int,
+    seed: int = 0,
+    slugs: tuple[str, ...] = ("course",),
+    templates: int = 200,
+) -> list[bytes]:
+    """
+    Return ``count`` replies of different learners.
+
+    Rendering emails is slower than parsing them, so the replies are made
+    from ``templates`` rendered replies with a unique sender each.
+    """
+    rng = random.Random(seed)
+    rendered = [
+        synthetic_reply(rng, "learner{n}@example.com", rng.choice(slugs))
+        for _ in range(templates)
+    ]
+    return [
+        rendered[n % templates].replace(b"{n}", str(n).encode()) for n in range(count)
+    ]
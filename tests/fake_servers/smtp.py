@@ -0,0 +1,177 @@
+"""
+A small in-process SMTP server to test the delivery path without a real
+mail provider.
+"""
+
+import base64
+import socket
+import socketserver
+import threading
+import time
+from dataclasses import dataclass, field
+
+from tests.fake_servers.faults import Faults
+
+
+@dataclass
+class ReceivedMessage:
+    mail_from: str
+    recipients: list[str]
+    data: bytes
+
+
+@dataclass
+class SmtpServerState:
+    """
+    Configuration and counters of a FakeSmtpServer.
+
+    Injected failures reject a message with a temporary 451 reply at the end
+    of its DATA.
+    """
+
+    pipelining: bool = True
+    username: str = "sender@example.com"
+    password: str = "secret"
+    # Seconds spent before the greeting, to mimic TCP and TLS handshakes.
+    connect_delay: float = 0.0
+    refused_recipients: set[str] = field(default_factory=set)
+    faults: Faults = field(default_factory=Faults)
+    messages: list[ReceivedMessage] = field(default_factory=list)
+    connections: int = 0
+    logins: int = 0
+    noops: int = 0
+    # Increased by drop_connections(), sessions of an older generation close.
+    generation: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def drop_connections(self) -> None:
+        with self.lock:
+            self.generation += 1
+
+
+class SmtpHandler(socketserver.StreamRequestHandler):
+    server: "FakeSmtpServer"
+
+    def setup(self) -> None:
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def complete(self, line: str) -> None:
+        """Send a reply the client waits for before its next command."""
+        self.server.state.faults.delay()
+        self.reply(line)
+
+    def envelope_reply(self, line: str) -> None:
+        """Reply to MAIL or RCPT, which pipelining clients do not wait for."""
+        if self.server.state.pipelining:
+            self.reply(line)
+        else:
+            self.complete(line)
+
+    def handle(self) -> None:
+        state = self.server.state
+        with state.lock:
+            state.connections += 1
+            generation = state.generation
+        if state.connect_delay:
+            time.sleep(state.connect_delay)
+        self.reply("220 fake.smtp ESMTP ready")
+        authenticated = False
+        mail_from: str | None = None
+        recipients: list[str] = []
+
+        while line := self.rfile.readline():
+            if state.generation != generation:
+                return
+            command, _, argument = line.decode().rstrip("\r\n").partition(" ")
+            command = command.upper()
+            if command == "EHLO":
+                extensions = ["AUTH PLAIN"]
+                if state.pipelining:
+                    extensions.append("PIPELINING")
+                self.reply("250-fake.smtp")
+                for extension in extensions[:-1]:
+                    self.reply(f"250-{extension}")
+                self.complete(f"250 {extensions[-1]}")
+            elif command == "HELO":
+                self.complete("250 fake.smtp")
+            elif command == "AUTH":
+                _, _, credentials = argument.partition(" ")
+                _, username, password = base64.b64decode(credentials).split(b"\0")
+                if (username.decode(), password.decode()) == (
+                    state.username,
+                    state.password,
+                ):
+                    authenticated = True
+                    with state.lock:
+                        state.logins += 1
+                    self.complete("235 Authentication successful")
+                else:
+                    self.complete("535 Authentication failed")
+            elif command == "MAIL":
+                if not authenticated:
+                    self.envelope_reply("530 Authentication required")
+                    continue
+                mail_from = argument.split(":", 1)[1].strip("<>")
+                recipients = []
+                self.envelope_reply("250 OK")
+            elif command == "RCPT":
+                recipient = argument.split(":", 1)[1].strip("<>")
+                if mail_from is None:
+                    self.envelope_reply("503 Need MAIL command")
+                elif recipient in state.refused_recipients:
+                    self.envelope_reply("550 Mailbox unavailable")
+                else:
+                    recipients.append(recipient)
+                    self.envelope_reply("250 OK")
+            elif command == "DATA":
+                if mail_from is None or not recipients:
+                    self.complete("554 No valid recipients")
+                    continue
+                self.complete("354 End data with <CR><LF>.<CR><LF>")
+                data = b""
+                while (data_line := self.rfile.readline()) not in (b".\r\n", b""):
+                    data += data_line[1:] if data_line.startswith(b"..") else data_line
+                if state.faults.fail():
+                    mail_from, recipients = None, []
+                    self.complete("451 Temporary failure, try again later")
+                    continue
+                with state.lock:
+                    state.messages.append(ReceivedMessage(mail_from, recipients, data))
+                mail_from, recipients = None, []
+                self.complete("250 OK: queued")
+            elif command == "RSET":
+                mail_from, recipients = None, []
+                self.complete("250 OK")
+            elif command == "NOOP":
+                with state.lock:
+                    state.noops += 1
+                self.complete("250 OK")
+            elif command == "QUIT":
+                self.complete("221 Bye")
+                return
+            else:
+                self.complete("502 Command not implemented")
+
+
+class FakeSmtpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, state: SmtpServerState | None = None) -> None:
+        super().__init__(("127.0.0.1", 0), SmtpHandler)
+        self.state = state or SmtpServerState()
+        self.host, self.port = self.server_address[:2]  # type: ignore[misc]
+
+    def __enter__(self) -> "FakeSmtpServer":
+        threading.Thread(
+            target=self.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        ).start()
+        return self
+
+    def __exit__(self, *args) -> None:  # type: ignore[no-untyped-def]
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,117 @@
+import pytest
+from django.core.cache import cache
+from django.utils import timezone
+from django_email_learning.answer_keys import get_answer_key, invalidate_answer_key
+from django_email_learning.models import Answer, Question, Quiz
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture()
+def published_quiz(db) -> Quiz:
+    quiz = Quiz.objects.create(title="Published Quiz", required_score=50)
+    second = Question.objects.create(quiz=quiz, text="Second", priority=2)
+    first = Question.objects.create(quiz=quiz, text="First", priority=1)
+    Answer.objects.bulk_create(
+        [
+            Answer(question=first, text="A", is_correct=False),
+            Answer(question=first, text="B", is_correct=True),
+            Answer(question=second, text="A", is_correct=True),
+            Answer(question=second, text="B", is_correct=False),
+            Answer(question=second, text="C", is_correct=True),
+        ]
+    )
+    quiz.is_published = True
+    quiz.save()
+    return quiz
+
+
+def test_answer_key_is_compiled_in_priority_order(published_quiz):
+    answer_key = get_answer_key(published_quiz.id)
+    first, second = published_quiz.questions.order_by("priority")
+
+    assert answer_key.quiz_id == published_quiz.id
+    assert answer_key.required_score == 50
+    assert answer_key.question_ids == (first.id, second.id)
+    assert answer_key.correct_masks == (0b10, 0b101)
+    assert answer_key.multiple_choice == (False, True)
+    assert answer_key.answer_ids[1] == tuple(
+        second.answers.order_by("id").values_list("id", flat=True)
+    )
+
+
+def test_cached_answer_key_only_queries_the_version(
+    published_quiz, django_assert_num_queries
+):
+    answer_key = get_answer_key(published_quiz.id)
+    with django_assert_num_queries(1):
+        assert get_answer_key(published_quiz.id) is answer_key
+    with django_assert_num_queries(0):
+        assert answer_key.passes([0b10, 0b100])
+        assert answer_key.score([0b10, 0b100]) == 50
+        assert not answer_key.passes([0b01, 0b101 | 0b10])
+
+
+def test_selection_mask_maps_answer_ids_to_bits(published_quiz):
+    answer_key = get_answer_key(published_quiz.id)
+    answer_ids = answer_key.answer_ids[1]
+    assert answer_key.selection_mask(1, [answer_ids[0], answer_ids[2]]) == 0b101
+
+
+def test_answer_key_is_shared_through_django_cache(
+    published_quiz, django_assert_num_queries
+):
+    get_answer_key(published_quiz.id)
+    from django_email_learning import answer_keys
+
+    answer_keys._compiled_keys.clear()
+    with django_assert_num_queries(1):
+        assert get_answer_key(published_quiz.id).correct_masks == (0b10, 0b101)
+
+
+def test_editing_quiz_invalidates_answer_key(published_quiz):
+    answer_key = get_answer_key(published_quiz.id)
+    published_quiz.required_score = 80
+    published_quiz.save()
+    assert get_answer_key(published_quiz.id).required_score == 80
+    assert get_answer_key(published_quiz.id).version != answer_key.version
+
+
+def test_editing_answer_invalidates_answer_key(published_quiz):
+    get_answer_key(published_quiz.id)
+    answer = Answer.objects.get(question__priority=1, text="A")
+    answer.is_correct = True
+    answer.save()
+    answer_key = get_answer_key(published_quiz.id)
+    assert answer_key.correct_masks[0] == 0b11
+    assert answer_key.multiple_choice[0]
+
+
+def test_changes_made_by_other_processes_invalidate_answer_key(published_quiz):
+    get_answer_key(published_quiz.id)
+    # Other processes mark the change in the database, the cache of this
+    # process isn't touched.
+    Answer.objects.filter(question__priority=1, text="A").update(is_correct=True)
+    Quiz.objects.filter(pk=published_quiz.id).update(
+        answer_key_changed_at=timezone.now()
+    )
+    assert get_answer_key(published_quiz.id).correct_masks[0] == 0b11
+
+
+def test_unpublished_quiz_has_no_answer_key(published_quiz):
+    get_answer_key(published_quiz.id)
+    published_quiz.is_published = False
+    published_quiz.save()
+    with pytest.raises(ValueError):
+        get_answer_key(published_quiz.id)
+
+
+def test_invalidate_answer_key_without_version(published_quiz):
+    cache.clear()
+    invalidate_answer_key(published_quiz.id)
+    assert get_answer_key(published_quiz.id).question_count == 2
@@ -0,0 +1,17 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+
+def test_stats_are_printed(db, shared_api_cache):
+    client = Client()
+    client.force_login(User.objects.create(username="admin", is_superuser=True))
+    url = reverse("django_email_learning:api:organizations_view")
+    client.get(url)
+    client.get(url)
+    out = StringIO()
+    call_command("api_cache_stats", stdout=out)
+    assert out.getvalue().strip() == "hits=1 misses=1 hit_ratio=0.50"
@@ -0,0 +1,73 @@
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+
+from django_email_learning.models import ImapConnection, derive_fernet
+
+OLD_KEY = "old-secret-key"
+NEW_KEY = "new-secret-key"
+
+
+@pytest.fixture()
+def connections(db) -> list[ImapConnection]:
+    with override_settings(SECRET_KEY=OLD_KEY):
+        created = []
+        for i in range(5):
+            connection = ImapConnection(
+                server="imap.example.com",
+                port=993,
+                email=f"user{i}@example.com",
+                password=f"password-{i}",
+                organization_id=1,
+            )
+            connection.save()
+            created.append(connection)
+    return created
+
+
+def rotate(*args: str) -> str:
+    out = StringIO()
+    with override_settings(SECRET_KEY=NEW_KEY, SECRET_KEY_FALLBACKS=[OLD_KEY]):
+        call_command("rotate_imap_passwords", *args, stdout=out, stderr=StringIO())
+    return out.getvalue()
+
+
+def test_passwords_are_encrypted_with_new_key(connections):
+    output = rotate("--chunk-size", "2")
+
+    assert "Rotated 5 passwords" in output
+    assert "Processed 2/5 connections" in output
+    assert "rows/s" in output
+    new_fernet = derive_fernet(NEW_KEY)
+    for original in connections:
+        connection = ImapConnection.objects.get(pk=original.pk)
+        password = new_fernet.decrypt(connection.password.encode()).decode()
+        assert password == f"password-{connections.index(original)}"
+
+
+def test_rotation_skips_passwords_already_using_new_key(connections):
+    rotate()
+    output = rotate()
+    assert "Rotated 0 passwords, 5 already up to date, 0 failed." in output
+
+
+def test_rotation_can_resume_after_given_id(connections):
+    output = rotate("--start-after", str(connections[2].pk))
+    assert "Rotated 2 passwords" in output
+    old_fernet = derive_fernet(OLD_KEY)
+    first = ImapConnection.objects.get(pk=connections[0].pk)
+    assert old_fernet.decrypt(first.password.encode()) == b"password-0"
+
+
+def test_undecryptable_passwords_are_reported(connections):
+    ImapConnection.objects.filter(pk=connections[0].pk).update(password="garbage")
+    output = rotate()
+    assert "Rotated 4 passwords, 0 already up to date, 1 failed." in output
+
+
+@pytest.mark.parametrize("chunk_size", ["0", "-1"])
+def test_chunk_size_must_be_positive(connections, chunk_size):
+    with pytest.raises(CommandError, match="is not a positive integer"):
+        rotate("--chunk-size", chunk_size)
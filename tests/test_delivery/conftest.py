@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django_email_learning.models import (
+    Answer,
+    Course,
+    CourseContent,
+    Enrollment,
+    ImapConnection,
+    Lesson,
+    OutboxMessage,
+    Question,
+    Quiz,
+)
+
+
+@pytest.fixture()
+def imap_connection(db) -> ImapConnection:
+    connection = ImapConnection(
+        server="imap.example.com",
+        port=993,
+        email="course@example.com",
+        password="my_secret_password",
+        organization_id=1,
+    )
+    connection.save()
+    return connection
+
+
+@pytest.fixture()
+def course(db, imap_connection) -> Course:
+    course = Course(
+        title="Delivery Course",
+        slug="delivery",
+        imap_connection=imap_connection,
+        organization_id=1,
+        enabled=True,
+    )
+    course.save()
+    return course
+
+
+@pytest.fixture()
+def published_quiz(db) -> Quiz:
+    quiz = Quiz.objects.create(title="Check your knowledge", required_score=50)
+    question = Question.objects.create(quiz=quiz, text="Two plus two?", priority=1)
+    Answer.objects.bulk_create(
+        [
+            Answer(question=question, text="Three"),
+            Answer(question=question, text="Four", is_correct=True),
+        ]
+    )
+    quiz.is_published = True
+    quiz.save()
+    return quiz
+
+
+@pytest.fixture()
+def contents(course, published_quiz) -> list[CourseContent]:
+    first = Lesson.objects.create(
+        title="First lesson", content="Welcome!", is_published=True
+    )
+    second = Lesson.objects.create(
+        title="Second lesson", content="Keep going.", is_published=True
+    )
+    return [
+        CourseContent.objects.create(
+            course=course, priority=1, type="lesson", lesson=first, waiting_period=0
+        ),
+        CourseContent.objects.create(
+            course=course,
+            priority=2,
+            type="lesson",
+            lesson=second,
+            waiting_period=3600,
+        ),
+        CourseContent.objects.create(
+            course=course,
+            priority=3,
+            type="quiz",
+            quiz=published_quiz,
+            waiting_period=600,
+        ),
+    ]
+
+
+@pytest.fixture()
+def enroll(course, contents):
+    def _enroll(email: str, due_in: int = -60, content_index: int = 0) -> Enrollment:
+        return Enrollment.objects.create(
+            course=course,
+            email=email,
+            next_content=contents[content_index],
+            next_due_at=timezone.now() + timedelta(seconds=due_in),
+        )
+
+    return _enroll
+
+
+@pytest.fixture()
+def undecryptable_messages(imap_connection) -> list[OutboxMessage]:
+    """
+    Queue a message of an account whose password can't be decrypted, as after
+    a key rotation without fallback keys, and one of the default backend.
+    """
+    ImapConnection.objects.filter(pk=imap_connection.pk).update(
+        smtp_server="smtp.example.com", password="not-a-fernet-token"
+    )
+    return OutboxMessage.objects.bulk_create(
+        OutboxMessage(
+            imap_connection=connection,
+            from_email="course@example.com",
+            to=to,
+            subject="Lesson",
+            body="Lesson content",
+            next_attempt_at=timezone.now(),
+        )
+        for connection, to in [
+            (imap_connection, "learner@example.com"),
+            (None, "other@example.com"),
+        ]
+    )
@@ -0,0 +1,58 @@
+"""
+Entry points of the processes claiming due enrollments concurrently in
+test_leases.py. Each process configures Django against a shared SQLite file.
+"""
+
+import os
+
+
+def setup_django(db_path: str) -> None:
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_service.settings")
+    import django
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = db_path
+    settings.DATABASES["default"]["OPTIONS"] = {"timeout": 60}
+    django.setup()
+
+
+def create_due_enrollments(db_path: str, count: int) -> None:
+    setup_django(db_path)
+    from django.core.management import call_command
+    from django.utils import timezone
+    from django_email_learning.models import (
+        Course,
+        CourseContent,
+        Enrollment,
+        Lesson,
+    )
+
+    call_command("migrate", verbosity=0)
+    course = Course.objects.create(
+        title="Course", slug="course", organization_id=1, enabled=True
+    )
+    lesson = Lesson.objects.create(title="Lesson", content="Hi", is_published=True)
+    content = CourseContent.objects.create(
+        course=course, priority=1, type="lesson", lesson=lesson, waiting_period=0
+    )
+    Enrollment.objects.bulk_create(
+        Enrollment(
+            course=course,
+            email=f"learner{i}@example.com",
+            next_content=content,
+            next_due_at=timezone.now(),
+        )
+        for i in range(count)
+    )
+
+
+def claim_all(db_path: str, owner: str) -> list[int]:
+    setup_django(db_path)
+    from django.utils import timezone
+    from django_email_learning.delivery.scheduler import claim_due_enrollments
+
+    claimed = []
+    now = timezone.now()
+    while chunk := claim_due_enrollments(owner, now, limit=7):
+        claimed += [enrollment.pk for enrollment in chunk]
+    return claimed
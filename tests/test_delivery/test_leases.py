@@ -0,0 +1,201 @@
+import multiprocessing
+from datetime import datetime, timedelta
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.db.models import QuerySet
+from django.utils import timezone
+from django_email_learning.conf import app_setting
+from django_email_learning.delivery import leases, scheduler
+from django_email_learning.delivery.outbox import (
+    claim_outbox_messages,
+    drain_outbox,
+    mark_sent,
+)
+from django_email_learning.delivery.retries import record_failures
+from django_email_learning.delivery.scheduler import (
+    claim_due_enrollments,
+    schedule_due_content,
+)
+from django_email_learning.models import DeadLetterMessage, Enrollment, OutboxMessage
+from tests.test_delivery import lease_processes
+
+
+class Clock:
+    """Stands in for django.utils.timezone in the leases module."""
+
+    def __init__(self) -> None:
+        self.time = timezone.now()
+
+    def now(self) -> datetime:
+        return self.time
+
+
+@pytest.fixture()
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(leases, "timezone", clock)
+    return clock
+
+
+def test_claimed_enrollments_are_leased(enroll, clock):
+    due = enroll("due@example.com")
+    enroll("later@example.com", due_in=3600)
+    now = timezone.now()
+    clock.time = now + timedelta(seconds=10)
+
+    claimed = claim_due_enrollments("worker-1", now, limit=10, lease_seconds=60)
+
+    assert [enrollment.pk for enrollment in claimed] == [due.pk]
+    due.refresh_from_db()
+    assert due.lease_token.startswith("worker-1:")
+    # Leases run from the claim, not from the start of the pass.
+    assert due.lease_expires_at == now + timedelta(seconds=70)
+
+
+def test_leased_enrollments_are_not_claimed_again(enroll):
+    for i in range(3):
+        enroll(f"learner{i}@example.com")
+    now = timezone.now()
+
+    first = claim_due_enrollments("worker-1", now, limit=2, lease_seconds=60)
+    second = claim_due_enrollments("worker-2", now, limit=2, lease_seconds=60)
+
+    assert len(first) == 2
+    assert len(second) == 1
+    assert not claim_due_enrollments("worker-3", now, limit=2, lease_seconds=60)
+
+
+def test_expired_leases_are_claimed_again(enroll, clock):
+    enroll("learner@example.com")
+    now = timezone.now()
+    claim_due_enrollments("worker-1", now, limit=10, lease_seconds=60)
+
+    clock.time += timedelta(seconds=61)
+    claimed = claim_due_enrollments("worker-2", now, limit=10, lease_seconds=60)
+
+    assert len(claimed) == 1
+    assert Enrollment.objects.get().lease_token.startswith("worker-2:")
+
+
+def test_claims_late_in_a_long_pass_are_not_expired(enroll, clock):
+    enroll("learner@example.com")
+    pass_started_at = timezone.now()
+    lease_seconds = app_setting("LEASE_SECONDS")
+    clock.time = pass_started_at + timedelta(seconds=lease_seconds + 1)
+
+    assert claim_due_enrollments("worker-1", pass_started_at, limit=10)
+    assert not claim_due_enrollments("worker-2", clock.time, limit=10)
+
+
+def test_lost_enrollment_leases_queue_nothing(enroll, clock, monkeypatch):
+    enroll("learner@example.com")
+    now = timezone.now()
+    build = scheduler.build_outbox_messages
+    takeovers = []
+
+    def build_after_takeover(chunk):  # type: ignore[no-untyped-def]
+        # worker-1 is slow: its lease expires and worker-2 claims the
+        # enrollment before worker-1 queues the content.
+        clock.time += timedelta(seconds=app_setting("LEASE_SECONDS") + 1)
+        takeovers.append(claim_due_enrollments("worker-2", now, limit=10))
+        return build(chunk)
+
+    monkeypatch.setattr(scheduler, "build_outbox_messages", build_after_takeover)
+
+    assert schedule_due_content(now, owner="worker-1") == 0
+    assert len(takeovers) == 1 and takeovers[0]
+    assert OutboxMessage.objects.count() == 0
+    assert Enrollment.objects.get().lease_token.startswith("worker-2:")
+
+
+def test_lost_outbox_leases_are_not_written(enroll, clock):
+    for i in range(2):
+        enroll(f"learner{i}@example.com")
+    schedule_due_content()
+    now = timezone.now()
+    lost, failed = claim_outbox_messages("worker-1", now, limit=10, lease_seconds=60)
+    clock.time += timedelta(seconds=61)
+    assert len(claim_outbox_messages("worker-2", now, limit=10)) == 2
+
+    mark_sent([lost], timezone.now())
+    record_failures([(failed, ValueError("Broken"))], timezone.now())
+
+    assert OutboxMessage.objects.filter(status="pending").count() == 2
+    assert not DeadLetterMessage.objects.exists()
+    assert all(
+        message.lease_token.startswith("worker-2:")
+        for message in OutboxMessage.objects.all()
+    )
+
+
+def test_outbox_is_sent_once_when_a_lease_is_lost(enroll, clock):
+    enroll("learner@example.com")
+    schedule_due_content()
+    now = timezone.now()
+    claim_outbox_messages("worker-1", now, limit=10, lease_seconds=60)
+    clock.time += timedelta(seconds=61)
+
+    assert drain_outbox(now, owner="worker-2") == 1
+    assert len(mail.outbox) == 1
+    assert not claim_outbox_messages("worker-1", now, limit=10)
+
+
+def test_advancing_releases_the_lease(enroll):
+    enrollment = enroll("learner@example.com")
+    claim_due_enrollments("worker-1", timezone.now(), limit=10, lease_seconds=60)
+    enrollment.advance(timezone.now())
+    assert enrollment.lease_token == ""
+    assert enrollment.lease_expires_at is None
+
+
+def test_claiming_with_skip_locked(enroll, monkeypatch):
+    monkeypatch.setattr(connection.features, "has_select_for_update_skip_locked", True)
+    for i in range(3):
+        enroll(f"learner{i}@example.com")
+    now = timezone.now()
+
+    assert len(claim_due_enrollments("worker-1", now, limit=2, lease_seconds=60)) == 2
+    assert len(claim_due_enrollments("worker-2", now, limit=2, lease_seconds=60)) == 1
+
+
+@pytest.mark.parametrize(
+    "has_select_for_update_of, of", [(True, ("self",)), (False, ())]
+)
+def test_only_claimed_rows_are_locked_where_supported(
+    enroll, monkeypatch, has_select_for_update_of, of
+):
+    monkeypatch.setattr(connection.features, "has_select_for_update_skip_locked", True)
+    monkeypatch.setattr(
+        connection.features, "has_select_for_update_of", has_select_for_update_of
+    )
+    locks = []
+    select_for_update = QuerySet.select_for_update
+
+    def record_lock(queryset, **kwargs):  # type: ignore[no-untyped-def]
+        locks.append(kwargs)
+        return select_for_update(queryset, **kwargs)
+
+    monkeypatch.setattr(QuerySet, "select_for_update", record_lock)
+    enroll("learner@example.com")
+
+    claim_due_enrollments("worker-1", timezone.now(), limit=10, lease_seconds=60)
+
+    assert locks == [{"skip_locked": True, "of": of}]
+
+
+def test_claims_are_exactly_once_across_processes(tmp_path):
+    db_path = str(tmp_path / "leases.sqlite3")
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        pool.apply(lease_processes.create_due_enrollments, (db_path, 300))
+
+    with context.Pool(4) as pool:
+        results = pool.starmap(
+            lease_processes.claim_all, [(db_path, f"worker-{i}") for i in range(4)]
+        )
+
+    claimed = [pk for result in results for pk in result]
+    assert len(claimed) == 300
+    assert len(set(claimed)) == 300
@@ -0,0 +1,109 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django_email_learning.delivery import outbox as outbox_module
+from django_email_learning.delivery.outbox import claim_outbox_messages, drain_outbox
+from django_email_learning.delivery.scheduler import schedule_due_content
+from django_email_learning.models import OutboxMessage
+
+
+def test_due_content_is_queued_and_enrollments_advanced(enroll, contents):
+    due = enroll("due@example.com")
+    enroll("later@example.com", due_in=3600)
+
+    assert schedule_due_content() == 1
+
+    assert len(mail.outbox) == 0
+    message = OutboxMessage.objects.get()
+    assert message.enrollment == due
+    assert message.to == "due@example.com"
+    assert message.from_email == "course@example.com"
+    assert message.subject == "[delivery] First lesson"
+    assert message.body == "Welcome!"
+    assert message.status == "pending"
+    due.refresh_from_db()
+    assert due.next_content == contents[1]
+
+
+def test_chunk_is_queued_with_one_insert(enroll):
+    for i in range(5):
+        enroll(f"learner{i}@example.com")
+
+    with CaptureQueriesContext(connection) as captured:
+        assert schedule_due_content(chunk_size=5) == 5
+
+    inserts = [q for q in captured.captured_queries if q["sql"].startswith("INSERT")]
+    assert len(inserts) == 1
+    assert OutboxMessage.objects.count() == 5
+
+
+def test_drain_sends_and_marks_messages(enroll):
+    for i in range(3):
+        enroll(f"learner{i}@example.com")
+    schedule_due_content()
+
+    assert drain_outbox(batch_size=2) == 3
+
+    assert sorted(message.to[0] for message in mail.outbox) == [
+        f"learner{i}@example.com" for i in range(3)
+    ]
+    assert not OutboxMessage.objects.filter(status="pending").exists()
+    assert not OutboxMessage.objects.filter(sent_at__isnull=True).exists()
+    assert drain_outbox() == 0
+
+
+def test_failed_messages_are_retried_after_a_backoff(enroll, monkeypatch):
+    enroll("learner@example.com")
+    schedule_due_content()
+
+    def fail(messages):  # type: ignore[no-untyped-def]
+        raise ConnectionError("Connection lost")
+
+    class FailingBackend:
+        send_messages = staticmethod(fail)
+
+        def __enter__(self):  # type: ignore[no-untyped-def]
+            return self
+
+        def __exit__(self, *args):  # type: ignore[no-untyped-def]
+            return None
+
+    with monkeypatch.context() as patch:
+        patch.setattr(
+            outbox_module, "get_email_backend", lambda connection: FailingBackend()
+        )
+        assert drain_outbox() == 0
+
+    now = timezone.now()
+    assert claim_outbox_messages("worker-2", now, limit=10) == []
+    later = now + timedelta(days=1)
+    assert drain_outbox(later) == 1
+    assert len(mail.outbox) == 1
+
+
+def test_backend_errors_are_recorded_as_failures(undecryptable_messages):
+    assert drain_outbox() == 1
+
+    assert [message.to for message in mail.outbox] == [["other@example.com"]]
+    failed = OutboxMessage.objects.get(to="learner@example.com")
+    assert (failed.status, failed.attempts, failed.lease_token) == ("pending", 1, "")
+    assert failed.last_error.startswith("InvalidToken")
+
+
+@pytest.mark.parametrize("limit", [1, 2])
+def test_claimed_messages_are_not_claimed_again(enroll, limit):
+    for i in range(3):
+        enroll(f"learner{i}@example.com")
+    schedule_due_content()
+    now = timezone.now()
+
+    first = claim_outbox_messages("worker-1", now, limit=limit, lease_seconds=60)
+    second = claim_outbox_messages("worker-2", now, limit=10, lease_seconds=60)
+
+    assert len(first) == limit
+    assert {m.pk for m in first}.isdisjoint({m.pk for m in second})
+    assert len(first) + len(second) == 3
@@ -0,0 +1,113 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from django_email_learning.delivery.outbox import drain_outbox
+from django_email_learning.checks import check_rate_limits
+from django_email_learning.delivery import ratelimit
+from django_email_learning.delivery.ratelimit import TokenBucket, acquire
+from django_email_learning.delivery.scheduler import schedule_due_content
+from django_email_learning.models import OutboxMessage
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_bucket_allows_bursts_and_refills():
+    bucket = TokenBucket(key="test", rate=2, capacity=5)
+
+    assert bucket.take(3, now=100.0) == 3
+    assert bucket.take(3, now=100.0) == 2
+    assert bucket.take(1, now=100.0) == 0
+    assert bucket.take(5, now=101.0) == 2
+    assert bucket.take(10, now=200.0) == 5
+
+
+def test_bucket_state_is_shared_through_the_cache():
+    TokenBucket(key="shared", rate=1, capacity=3).take(3, now=100.0)
+    assert TokenBucket(key="shared", rate=1, capacity=3).take(1, now=100.0) == 0
+
+
+def test_tokens_are_given_back_when_the_host_limit_is_lower(settings, imap_connection):
+    imap_connection.smtp_server = "smtp.example.com"
+    imap_connection.save()
+    settings.DJANGO_EMAIL_LEARNING = {
+        "SMTP_RATE_LIMIT": {"rate": 1, "capacity": 10},
+        "SMTP_HOST_RATE_LIMITS": {"smtp.example.com": {"rate": 1, "capacity": 4}},
+    }
+
+    assert acquire(imap_connection, 6, now=100.0) == (4, 2.0)
+    connection_bucket = TokenBucket(
+        key=f"connection:{imap_connection.pk}", rate=1, capacity=10
+    )
+    assert connection_bucket.take(10, now=100.0) == 6
+
+
+def test_no_limits_are_applied_by_default(imap_connection):
+    assert acquire(imap_connection, 1000) == (1000, 0.0)
+
+
+def test_throttled_messages_are_deferred(settings, enroll):
+    settings.DJANGO_EMAIL_LEARNING = {
+        "SMTP_RATE_LIMIT": {"rate": 0.5, "capacity": 2},
+    }
+    for i in range(5):
+        enroll(f"learner{i}@example.com")
+    schedule_due_content()
+
+    assert drain_outbox() == 2
+
+    assert len(mail.outbox) == 2
+    deferred = OutboxMessage.objects.filter(status="pending")
+    assert deferred.count() == 3
+    soon = timezone.now() + timedelta(seconds=10)
+    assert all(
+        message.lease_expires_at is None and message.next_attempt_at <= soon
+        for message in deferred
+    )
+
+
+@pytest.mark.parametrize(
+    "limit",
+    [{"rate": 0, "capacity": 5}, {"rate": -1, "capacity": 5}, {"rate": 1}],
+)
+def test_invalid_limits_are_refused(settings, imap_connection, limit):
+    settings.DJANGO_EMAIL_LEARNING = {
+        "SMTP_HOST_RATE_LIMITS": {"smtp.example.com": limit},
+    }
+
+    assert [error.id for error in check_rate_limits(None)] == [
+        "django_email_learning.E002"
+    ]
+    imap_connection.smtp_server = "smtp.example.com"
+    with pytest.raises(ImproperlyConfigured):
+        acquire(imap_connection, 1)
+
+
+def test_valid_limits_pass_the_check(settings):
+    settings.DJANGO_EMAIL_LEARNING = {
+        "SMTP_RATE_LIMIT": {"rate": 0.5, "capacity": 2},
+        "SMTP_HOST_RATE_LIMITS": {"smtp.example.com": {"rate": 5, "capacity": 50}},
+    }
+    assert check_rate_limits(None) == []
+
+
+def test_locked_buckets_throttle_messages(settings, imap_connection, monkeypatch):
+    settings.DJANGO_EMAIL_LEARNING = {
+        "SMTP_RATE_LIMIT": {"rate": 1, "capacity": 10},
+    }
+    monkeypatch.setattr(ratelimit, "LOCK_ATTEMPTS", 2)
+    bucket = TokenBucket(key=f"connection:{imap_connection.pk}", rate=1, capacity=10)
+    cache.add(f"{bucket.cache_key}:lock", 1)
+
+    assert acquire(imap_connection, 3, now=100.0) == (0, ratelimit.LOCKED_RETRY_DELAY)
+
+    cache.delete(f"{bucket.cache_key}:lock")
+    assert bucket.take(10, now=100.0) == 10
@@ -0,0 +1,98 @@
+import smtplib
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django_email_learning.delivery.retries import (
+    backoff_delay,
+    is_transient,
+    record_failures,
+)
+from django_email_learning.delivery.scheduler import schedule_due_content
+from django_email_learning.models import DeadLetterMessage, OutboxMessage
+
+
+@pytest.mark.parametrize(
+    "error,transient",
+    [
+        (smtplib.SMTPResponseException(421, b"Try again later"), True),
+        (smtplib.SMTPResponseException(550, b"Mailbox unavailable"), False),
+        (smtplib.SMTPRecipientsRefused({"a@example.com": (450, b"Busy")}), True),
+        (smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"No user")}), False),
+        (smtplib.SMTPAuthenticationError(535, b"Bad credentials"), True),
+        (smtplib.SMTPServerDisconnected("Connection lost"), True),
+        (ConnectionRefusedError(), True),
+        (TimeoutError(), True),
+        (ValueError("Header values can't contain newlines"), False),
+    ],
+)
+def test_failures_are_classified(error, transient):
+    assert is_transient(error) is transient
+
+
+def test_backoff_grows_exponentially_with_jitter(settings):
+    settings.DJANGO_EMAIL_LEARNING = {"RETRY_BASE_DELAY": 10, "RETRY_MAX_DELAY": 60}
+    assert 5 <= backoff_delay(1) <= 10
+    assert 20 <= backoff_delay(3) <= 40
+    assert 30 <= backoff_delay(10) <= 60
+    assert len({backoff_delay(5) for _ in range(20)}) > 1
+
+
+@pytest.fixture()
+def queued(enroll) -> list[OutboxMessage]:
+    for i in range(3):
+        enroll(f"learner{i}@example.com")
+    schedule_due_content()
+    return list(OutboxMessage.objects.order_by("pk"))
+
+
+def test_transient_failures_are_retried_later(queued):
+    now = timezone.now()
+    record_failures([(queued[0], ConnectionResetError("Reset"))], now)
+
+    message = OutboxMessage.objects.get(pk=queued[0].pk)
+    assert message.status == "pending"
+    assert message.attempts == 1
+    assert message.last_error == "ConnectionResetError: Reset"
+    assert now + timedelta(seconds=30) <= message.next_attempt_at
+    assert message.next_attempt_at <= now + timedelta(seconds=60)
+
+
+def test_permanent_and_exhausted_failures_are_dead_lettered(settings, queued):
+    settings.DJANGO_EMAIL_LEARNING = {"RETRY_MAX_ATTEMPTS": 3}
+    queued[1].attempts = 2
+    record_failures(
+        [
+            (queued[0], smtplib.SMTPResponseException(550, b"No such user")),
+            (queued[1], TimeoutError("Timed out")),
+        ],
+        timezone.now(),
+    )
+
+    assert list(OutboxMessage.objects.values_list("pk", flat=True)) == [queued[2].pk]
+    letters = DeadLetterMessage.objects.order_by("to")
+    assert [(letter.to, letter.attempts) for letter in letters] == [
+        ("learner0@example.com", 1),
+        ("learner1@example.com", 3),
+    ]
+    assert letters[1].last_error == "TimeoutError: Timed out"
+    assert letters[0].enrollment == queued[0].enrollment
+
+
+def test_dead_letters_are_requeued_in_bulk(queued, django_assert_num_queries):
+    record_failures(
+        [(message, ValueError("Broken")) for message in queued], timezone.now()
+    )
+    assert DeadLetterMessage.objects.count() == 3
+
+    with django_assert_num_queries(5):
+        assert DeadLetterMessage.objects.filter(to__startswith="learner").requeue() == 3
+
+    assert not DeadLetterMessage.objects.exists()
+    requeued = OutboxMessage.objects.order_by("to")
+    assert [message.to for message in requeued] == [
+        f"learner{i}@example.com" for i in range(3)
+    ]
+    assert all(
+        message.status == "pending" and message.attempts == 0 for message in requeued
+    )
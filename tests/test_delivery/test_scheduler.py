@@ -0,0 +1,86 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+from django_email_learning.delivery.scheduler import (
+    deliver_due_content,
+    due_enrollments,
+)
+from django_email_learning.models import BlockedEmail, Enrollment
+
+
+def test_only_due_enrollments_are_delivered(enroll, contents):
+    due = enroll("due@example.com")
+    enroll("later@example.com", due_in=3600)
+
+    sent = deliver_due_content()
+
+    assert sent == 1
+    assert len(mail.outbox) == 1
+    message = mail.outbox[0]
+    assert message.to == ["due@example.com"]
+    assert message.from_email == "course@example.com"
+    assert message.subject == "[delivery] First lesson"
+    assert message.body == "Welcome!"
+
+    due.refresh_from_db()
+    assert due.next_content == contents[1]
+    assert due.last_sent_at is not None
+    assert due.next_due_at == due.last_sent_at + timedelta(seconds=3600)
+
+
+def test_quiz_is_rendered_with_numbered_answers(enroll, published_quiz):
+    enroll("learner@example.com", content_index=2)
+    deliver_due_content()
+    assert mail.outbox[0].subject == "[delivery] Check your knowledge"
+    assert mail.outbox[0].body.splitlines()[:3] == [
+        "1. Two plus two?",
+        "   1) Three",
+        "   2) Four",
+    ]
+    assert f'"answer {published_quiz.pk} 1,3"' in mail.outbox[0].body.splitlines()[-1]
+
+
+def test_enrollment_waits_for_the_answer_after_a_quiz(enroll, contents):
+    enrollment = enroll("learner@example.com", content_index=2)
+    deliver_due_content()
+    enrollment.refresh_from_db()
+    assert enrollment.next_content == contents[2]
+    assert enrollment.next_due_at is None
+    assert enrollment.last_sent_at is not None
+    assert enrollment.status == "active"
+    assert not due_enrollments(timezone.now()).exists()
+    assert deliver_due_content() == 0
+
+
+def test_blocked_emails_and_disabled_courses_are_not_due(enroll, course):
+    enroll("blocked@example.com")
+    BlockedEmail.objects.create(email="blocked@example.com")
+    assert not due_enrollments(timezone.now()).exists()
+
+    enroll("learner@example.com")
+    course.enabled = False
+    course.save()
+    assert not due_enrollments(timezone.now()).exists()
+
+
+def test_due_content_is_delivered_in_chunks(enroll):
+    for i in range(7):
+        enroll(f"learner{i}@example.com")
+
+    sent = deliver_due_content(chunk_size=3)
+
+    assert sent == 7
+    assert sorted(message.to[0] for message in mail.outbox) == [
+        f"learner{i}@example.com" for i in range(7)
+    ]
+    assert not Enrollment.objects.filter(last_sent_at__isnull=True).exists()
+
+
+def test_command_reports_sent_messages(enroll):
+    enroll("learner@example.com")
+    out = StringIO()
+    call_command("deliver_due_content", "--chunk-size", "10", stdout=out)
+    assert "Queued 1 messages, sent 1 messages." in out.getvalue()
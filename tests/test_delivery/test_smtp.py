@@ -0,0 +1,185 @@
+import dataclasses
+import smtplib
+import threading
+
+import pytest
+from django.core import mail
+from django.core.mail import EmailMessage
+from django_email_learning.delivery.scheduler import deliver_due_content
+from django_email_learning.delivery.smtp import (
+    PooledEmailBackend,
+    SmtpConnectionPool,
+    SmtpIdentity,
+    get_email_backend,
+    get_pool,
+)
+
+
+@pytest.fixture()
+def identity(smtp_server) -> SmtpIdentity:
+    return SmtpIdentity(
+        host=smtp_server.host,
+        port=smtp_server.port,
+        username="sender@example.com",
+        password="secret",
+        # The fake server doesn't offer STARTTLS.
+        allow_plaintext=True,
+    )
+
+
+def make_messages(count: int) -> list[EmailMessage]:
+    return [
+        EmailMessage(
+            subject=f"Lesson {i}",
+            body=f"Body {i}\n.\nNot the end",
+            from_email="sender@example.com",
+            to=[f"learner{i}@example.com"],
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("pipelining", [True, False])
+def test_pool_reuses_one_connection(smtp_server, identity, pipelining):
+    smtp_server.state.pipelining = pipelining
+    pool = SmtpConnectionPool(
+        identity, max_connections=2, max_messages_per_connection=50
+    )
+
+    assert pool.send_messages(make_messages(5)) == 5
+    assert pool.send_messages(make_messages(5)) == 5
+
+    assert smtp_server.state.connections == 1
+    assert smtp_server.state.logins == 1
+    assert len(smtp_server.state.messages) == 10
+    received = smtp_server.state.messages[0]
+    assert received.recipients == ["learner0@example.com"]
+    assert b"Body 0\r\n.\r\nNot the end" in received.data
+
+
+def test_connections_are_recycled_after_max_messages(smtp_server, identity):
+    pool = SmtpConnectionPool(
+        identity, max_connections=1, max_messages_per_connection=3
+    )
+    assert pool.send_messages(make_messages(7)) == 7
+    assert smtp_server.state.connections == 3
+
+
+def test_connection_is_discarded_on_error(smtp_server, identity):
+    smtp_server.state.refused_recipients = {"learner1@example.com"}
+    pool = SmtpConnectionPool(
+        identity, max_connections=1, max_messages_per_connection=50
+    )
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.send_messages(make_messages(3))
+    assert pool.send_messages(make_messages(1)) == 1
+
+    assert smtp_server.state.connections == 2
+    assert len(smtp_server.state.messages) == 2
+
+
+def test_authenticated_identities_require_starttls(smtp_server, identity):
+    identity = dataclasses.replace(identity, allow_plaintext=False)
+    pool = SmtpConnectionPool(
+        identity, max_connections=1, max_messages_per_connection=50
+    )
+    with pytest.raises(smtplib.SMTPNotSupportedError, match="STARTTLS"):
+        pool.send_messages(make_messages(1))
+    assert smtp_server.state.logins == 0
+
+    anonymous = SmtpIdentity(host=smtp_server.host, port=smtp_server.port)
+    with pytest.raises(smtplib.SMTPSenderRefused):
+        SmtpConnectionPool(
+            anonymous, max_connections=1, max_messages_per_connection=50
+        ).send_messages(make_messages(1))
+
+
+def test_recently_used_connections_are_reused_without_a_check(smtp_server, identity):
+    pool = SmtpConnectionPool(
+        identity, max_connections=1, max_messages_per_connection=50
+    )
+    for message in make_messages(10):
+        assert pool.send_messages([message]) == 1
+    assert smtp_server.state.connections == 1
+    assert smtp_server.state.noops == 0
+
+
+def test_dropped_idle_connections_are_replaced(smtp_server, identity):
+    pool = SmtpConnectionPool(
+        identity,
+        max_connections=1,
+        max_messages_per_connection=50,
+        idle_check_after=0,
+    )
+    assert pool.send_messages(make_messages(1)) == 1
+    assert pool.send_messages(make_messages(1)) == 1
+    assert smtp_server.state.noops == 1
+    smtp_server.state.drop_connections()
+
+    assert pool.send_messages(make_messages(2)) == 2
+    assert smtp_server.state.connections == 2
+    assert len(smtp_server.state.messages) == 4
+
+
+def test_long_idle_connections_are_replaced_without_a_check(smtp_server, identity):
+    pool = SmtpConnectionPool(
+        identity, max_connections=1, max_messages_per_connection=50, max_idle=0
+    )
+    assert pool.send_messages(make_messages(1)) == 1
+    assert pool.send_messages(make_messages(1)) == 1
+    assert smtp_server.state.connections == 2
+
+
+def test_pool_size_is_bounded(smtp_server, identity):
+    pool = SmtpConnectionPool(
+        identity, max_connections=2, max_messages_per_connection=500
+    )
+    threads = [
+        threading.Thread(target=pool.send_messages, args=(make_messages(20),))
+        for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(smtp_server.state.messages) == 120
+    assert smtp_server.state.connections <= 2
+
+
+def test_backend_shares_pool_per_identity(identity):
+    assert PooledEmailBackend(identity).pool is get_pool(identity)
+    assert PooledEmailBackend(identity).pool is PooledEmailBackend(identity).pool
+
+
+def test_backend_can_fail_silently(smtp_server, identity):
+    smtp_server.state.refused_recipients = {"learner0@example.com"}
+    assert (
+        PooledEmailBackend(identity, fail_silently=True).send_messages(make_messages(1))
+        == 0
+    )
+
+
+def test_connection_without_smtp_server_uses_default_backend(imap_connection):
+    assert not isinstance(get_email_backend(imap_connection), PooledEmailBackend)
+    assert not isinstance(get_email_backend(None), PooledEmailBackend)
+
+
+def test_due_content_is_sent_through_the_pool(smtp_server, imap_connection, enroll):
+    imap_connection.smtp_server = smtp_server.host
+    imap_connection.smtp_port = smtp_server.port
+    imap_connection.allow_plaintext = True
+    imap_connection.save()
+    smtp_server.state.username = imap_connection.email
+    smtp_server.state.password = "my_secret_password"
+    for i in range(4):
+        enroll(f"learner{i}@example.com")
+
+    assert deliver_due_content() == 4
+
+    assert len(mail.outbox) == 0
+    assert smtp_server.state.connections == 1
+    assert sorted(m.recipients[0] for m in smtp_server.state.messages) == [
+        f"learner{i}@example.com" for i in range(4)
+    ]
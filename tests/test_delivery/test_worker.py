@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from io import StringIO
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.db import OperationalError
+from django_email_learning.delivery import worker as worker_module
+from django_email_learning.delivery.worker import DeliveryWorker
+from django_email_learning.models import Enrollment, OutboxMessage
+
+
+class SlowBackend(BaseEmailBackend):
+    def __init__(self, failing: set[str] | None = None) -> None:
+        super().__init__()
+        self.failing = failing or set()
+        self.active = 0
+        self.max_active = 0
+        self.sent: list[str] = []
+        self.lock = threading.Lock()
+
+    def send_messages(self, email_messages):  # type: ignore[no-untyped-def]
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.02)
+        with self.lock:
+            self.active -= 1
+        recipient = email_messages[0].to[0]
+        if recipient in self.failing:
+            raise ConnectionError("Connection lost")
+        with self.lock:
+            self.sent.append(recipient)
+        return 1
+
+
+@pytest.fixture()
+def slow_backend(monkeypatch) -> SlowBackend:
+    backend = SlowBackend()
+    monkeypatch.setattr(worker_module, "get_email_backend", lambda connection: backend)
+    return backend
+
+
+def test_worker_delivers_due_content(enroll, contents):
+    for i in range(5):
+        enroll(f"learner{i}@example.com")
+    enroll("later@example.com", due_in=3600)
+
+    worker = DeliveryWorker(batch_size=2, concurrency=10, concurrency_per_host=5)
+    sent = async_to_sync(worker.deliver_due)()
+
+    assert sent == 5
+    assert len(mail.outbox) == 5
+    assert Enrollment.objects.filter(next_content=contents[1]).count() == 5
+
+
+@pytest.mark.parametrize(
+    "concurrency,concurrency_per_host,expected_max", [(10, 2, 2), (3, 10, 3)]
+)
+def test_worker_limits_concurrent_sends(
+    slow_backend, enroll, concurrency, concurrency_per_host, expected_max
+):
+    for i in range(12):
+        enroll(f"learner{i}@example.com")
+
+    worker = DeliveryWorker(
+        batch_size=12,
+        concurrency=concurrency,
+        concurrency_per_host=concurrency_per_host,
+    )
+    assert async_to_sync(worker.deliver_due)() == 12
+
+    assert slow_backend.max_active == expected_max
+    assert len(slow_backend.sent) == 12
+
+
+def test_failed_sends_stay_pending(slow_backend, enroll, contents):
+    slow_backend.failing = {"learner1@example.com"}
+    for i in range(3):
+        enroll(f"learner{i}@example.com")
+
+    worker = DeliveryWorker(batch_size=10, concurrency=5, concurrency_per_host=5)
+    assert async_to_sync(worker.deliver_due)() == 2
+
+    failed = OutboxMessage.objects.get(to="learner1@example.com")
+    assert failed.status == "pending"
+    assert failed.sent_at is None
+    assert failed.attempts == 1
+    assert failed.last_error == "ConnectionError: Connection lost"
+    assert OutboxMessage.objects.filter(status="sent").count() == 2
+
+
+def test_backend_errors_are_recorded_as_failures(undecryptable_messages):
+    worker = DeliveryWorker(batch_size=10, concurrency=5, concurrency_per_host=5)
+    assert async_to_sync(worker.deliver_due)() == 1
+
+    assert [message.to for message in mail.outbox] == [["other@example.com"]]
+    failed = OutboxMessage.objects.get(to="learner@example.com")
+    assert (failed.status, failed.attempts, failed.lease_token) == ("pending", 1, "")
+    assert failed.last_error.startswith("InvalidToken")
+
+
+def test_worker_carries_on_after_a_failed_pass(monkeypatch, caplog):
+    worker = DeliveryWorker(batch_size=10, concurrency=2, concurrency_per_host=1)
+    closed = []
+    passes = []
+
+    async def deliver_due():  # type: ignore[no-untyped-def]
+        passes.append(closed.copy())
+        if len(passes) == 1:
+            raise OperationalError("server closed the connection unexpectedly")
+        if len(passes) == 3:
+            raise asyncio.CancelledError
+        return 1
+
+    monkeypatch.setattr(
+        worker_module, "close_old_connections", lambda: closed.append(1)
+    )
+    monkeypatch.setattr(worker, "deliver_due", deliver_due)
+
+    with pytest.raises(asyncio.CancelledError):
+        async_to_sync(worker.run)(poll_interval=0)
+
+    assert passes == [[1], [1, 1], [1, 1, 1]]
+    assert "Delivery pass failed" in caplog.text
+    assert "Delivery worker sent 1 messages" in caplog.text
+
+
+def test_command_delivers_once(enroll):
+    enroll("learner@example.com")
+    out = StringIO()
+    call_command("run_delivery_worker", "--once", stdout=out)
+    assert "Sent 1 messages." in out.getvalue()
+    assert len(mail.outbox) == 1
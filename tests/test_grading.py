@@ -0,0 +1,90 @@
+import random
+
+import pytest
+from django_email_learning.answer_keys import AnswerKey
+from django_email_learning.grading import grade_submissions
+
+
+def make_answer_key(
+    correct_masks: list[int], answer_counts: list[int], required_score: int = 60
+) -> AnswerKey:
+    answer_ids = []
+    next_id = 1
+    for count in answer_counts:
+        answer_ids.append(tuple(range(next_id, next_id + count)))
+        next_id += count
+    return AnswerKey(
+        quiz_id=1,
+        version=1,
+        required_score=required_score,
+        question_ids=tuple(range(1, len(correct_masks) + 1)),
+        answer_ids=tuple(answer_ids),
+        correct_masks=tuple(correct_masks),
+        multiple_choice=tuple(mask.bit_count() > 1 for mask in correct_masks),
+    )
+
+
+def test_grade_submissions():
+    answer_key = make_answer_key([0b01, 0b110, 0b1], [2, 3, 4], required_score=60)
+    result = grade_submissions(
+        answer_key,
+        [
+            [0b01, 0b110, 0b1],
+            [0b10, 0b110, 0b1],
+            [0b01, 0b010, 0b11],
+            [0b00, 0b000, 0b0],
+        ],
+    )
+
+    assert len(result) == 4
+    assert list(result.correct_counts) == [3, 2, 1, 0]
+    assert result.passed == [True, True, False, False]
+    assert result.score(1) == 66
+    assert result.correct_questions(1) == [False, True, True]
+    assert result.correct_questions(2) == [True, False, False]
+
+
+def test_bits_outside_of_question_answers_are_ignored():
+    answer_key = make_answer_key([0b01], [2])
+    result = grade_submissions(answer_key, [[0b101]])
+    assert result.passed == [True]
+
+
+@pytest.mark.parametrize("answer_count", [3, 7, 8, 15, 16, 40])
+def test_batch_grading_matches_answer_key(answer_count):
+    rng = random.Random(answer_count)
+    question_count = 12
+    correct_masks = [rng.randrange(1, 2**answer_count) for _ in range(question_count)]
+    answer_key = make_answer_key(correct_masks, [answer_count] * question_count)
+    submissions = [
+        [
+            mask if rng.random() < 0.7 else rng.randrange(2**answer_count)
+            for mask in correct_masks
+        ]
+        for _ in range(500)
+    ]
+
+    result = grade_submissions(answer_key, submissions)
+
+    for index, submission in enumerate(submissions):
+        assert result.correct_counts[index] == answer_key.correct_count(submission)
+        assert result.passed[index] == answer_key.passes(submission)
+
+
+def test_empty_batch():
+    answer_key = make_answer_key([0b1], [2])
+    result = grade_submissions(answer_key, [])
+    assert len(result) == 0
+    assert len(result.question_correctness) == 1
+
+
+def test_submission_with_wrong_number_of_selections_raises_error():
+    answer_key = make_answer_key([0b1, 0b1], [2, 2])
+    with pytest.raises(ValueError):
+        grade_submissions(answer_key, [[0b1, 0b1], [0b1]])
+
+
+def test_negative_selection_raises_error():
+    answer_key = make_answer_key([0b1], [2])
+    with pytest.raises(ValueError):
+        grade_submissions(answer_key, [[-1]])
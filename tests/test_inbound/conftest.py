@@ -0,0 +1,16 @@
+import pytest
+from django_email_learning.inbound.imap import ImapIdentity
+from tests.fake_servers.imap import DEFAULT_ACCOUNT
+
+
+@pytest.fixture()
+def imap_identity(imap_server) -> ImapIdentity:
+    return ImapIdentity(
+        host=imap_server.host,
+        port=imap_server.port,
+        username=DEFAULT_ACCOUNT,
+        password="secret",
+        use_ssl=False,
+        # The fake server doesn't offer STARTTLS.
+        allow_plaintext=True,
+    )
@@ -0,0 +1,175 @@
+import dataclasses
+import imaplib
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django_email_learning.inbound.fetch import sync_mailbox
+from django_email_learning.inbound.imap import connect
+from django_email_learning.management.commands import fetch_mail
+from django_email_learning.models import (
+    ImapConnection,
+    InboundReply,
+    MailboxCheckpoint,
+)
+
+
+def make_message(number: int) -> bytes:
+    return f"Subject: Answer {number}\r\n\r\nBody {number}\r\n".encode()
+
+
+@pytest.fixture()
+def client(imap_identity):
+    client = connect(imap_identity, timeout=5)
+    yield client
+    client.logout()
+
+
+def test_servers_without_starttls_are_refused(imap_server, imap_identity):
+    identity = dataclasses.replace(imap_identity, allow_plaintext=False)
+    with pytest.raises(imaplib.IMAP4.error, match="doesn't offer STARTTLS"):
+        connect(identity, timeout=5)
+    assert imap_server.state.logins == 0
+
+
+class Collector:
+    def __init__(self) -> None:
+        self.batches: list[list[tuple[int, bytes, bytes]]] = []
+
+    def __call__(self, checkpoint, messages):  # type: ignore[no-untyped-def]
+        self.batches.append(messages)
+
+    @property
+    def uids(self) -> list[int]:
+        return [uid for batch in self.batches for uid, _, _ in batch]
+
+
+def test_new_messages_are_fetched_in_batches(imap_server, fake_mail_account, client):
+    for i in range(7):
+        imap_server.state.deliver(make_message(i))
+    collect = Collector()
+
+    assert sync_mailbox(client, fake_mail_account.pk, collect, batch_size=3) == 7
+
+    assert [len(batch) for batch in collect.batches] == [3, 3, 1]
+    assert collect.uids == list(range(1, 8))
+    assert collect.batches[0][0] == (
+        1,
+        b"Subject: Answer 0\r\n\r\n",
+        b"Body 0\r\n",
+    )
+    assert imap_server.state.fetch_commands == 3
+    checkpoint = MailboxCheckpoint.objects.get(imap_connection=fake_mail_account)
+    assert (checkpoint.uidvalidity, checkpoint.last_uid) == (1, 7)
+
+
+def test_only_mail_after_the_checkpoint_is_fetched(
+    imap_server, fake_mail_account, client
+):
+    for i in range(50):
+        imap_server.state.deliver(make_message(i))
+    sync_mailbox(client, fake_mail_account.pk, Collector())
+    imap_server.state.fetched_messages = 0
+
+    collect = Collector()
+    assert sync_mailbox(client, fake_mail_account.pk, collect) == 0
+    imap_server.state.deliver(make_message(50))
+    imap_server.state.deliver(make_message(51))
+    assert sync_mailbox(client, fake_mail_account.pk, collect) == 2
+
+    assert collect.uids == [51, 52]
+    assert imap_server.state.fetched_messages == 2
+
+
+def test_uidvalidity_change_resyncs_the_mailbox(imap_server, fake_mail_account, client):
+    for i in range(3):
+        imap_server.state.deliver(make_message(i))
+    sync_mailbox(client, fake_mail_account.pk, Collector())
+
+    imap_server.state.mailbox().reset_uidvalidity(first_uid=1)
+    collect = Collector()
+    assert sync_mailbox(client, fake_mail_account.pk, collect) == 3
+
+    assert collect.uids == [1, 2, 3]
+    checkpoint = MailboxCheckpoint.objects.get(imap_connection=fake_mail_account)
+    assert (checkpoint.uidvalidity, checkpoint.last_uid) == (2, 3)
+
+
+def test_failed_batches_are_fetched_again(imap_server, fake_mail_account, client):
+    for i in range(4):
+        imap_server.state.deliver(make_message(i))
+
+    def fail_second_batch(checkpoint, messages):  # type: ignore[no-untyped-def]
+        if messages[0][0] > 2:
+            raise RuntimeError("Database is down")
+
+    with pytest.raises(RuntimeError):
+        sync_mailbox(client, fake_mail_account.pk, fail_second_batch, batch_size=2)
+    collect = Collector()
+    sync_mailbox(client, fake_mail_account.pk, collect, batch_size=2)
+
+    assert collect.uids == [3, 4]
+
+
+def test_only_the_start_of_big_messages_is_fetched(
+    imap_server, fake_mail_account, client
+):
+    attachment = b"A" * 1_000_000
+    imap_server.state.deliver(b"Subject: Re: [python] Quiz\r\n\r\n1,3\r\n" + attachment)
+    collect = Collector()
+
+    sync_mailbox(client, fake_mail_account.pk, collect, body_bytes=100)
+
+    [(uid, header, body)] = collect.batches[0]
+    assert header == b"Subject: Re: [python] Quiz\r\n\r\n"
+    assert body == b"1,3\r\n" + b"A" * 95
+    assert imap_server.state.fetched_bytes < 200
+
+
+def test_command_fetches_every_connection(imap_server, fake_mail_account):
+    imap_server.state.deliver(make_message(0))
+    out = StringIO()
+
+    call_command("fetch_mail", stdout=out)
+    call_command("fetch_mail", stdout=out)
+
+    assert out.getvalue().splitlines() == ["Fetched 1 messages.", "Fetched 0 messages."]
+    reply = InboundReply.objects.get()
+    assert (reply.uid, reply.tokens, reply.status) == (1, "Body 0", "ignored")
+
+
+def test_command_carries_on_after_a_failed_connection(
+    imap_server, fake_mail_account, monkeypatch, caplog
+):
+    imap_server.state.add_account("broken@example.com")
+    broken = ImapConnection(
+        server=imap_server.host,
+        port=imap_server.port,
+        email="broken@example.com",
+        password="secret",
+        organization_id=1,
+        allow_plaintext=True,
+    )
+    broken.save()
+    imap_server.state.deliver(make_message(0))
+
+    def sync(client, imap_connection_id, *args):  # type: ignore[no-untyped-def]
+        if imap_connection_id == broken.pk:
+            raise imaplib.IMAP4.abort("socket error: EOF")
+        return sync_mailbox(client, imap_connection_id, *args)
+
+    def logout(client):  # type: ignore[no-untyped-def]
+        client.shutdown()
+        raise OSError("Connection reset by peer")
+
+    monkeypatch.setattr(fetch_mail, "sync_mailbox", sync)
+    monkeypatch.setattr(imaplib.IMAP4, "logout", logout)
+    out = StringIO()
+
+    call_command("fetch_mail", stdout=out)
+
+    assert out.getvalue().splitlines() == ["Fetched 1 messages."]
+    failed = [r for r in caplog.records if r.message.startswith("Fetching the mail")]
+    assert len(failed) == 1
+    assert failed[0].exc_info[1].args == ("socket error: EOF",)
+    assert InboundReply.objects.filter(imap_connection=fake_mail_account).exists()
@@ -0,0 +1,196 @@
+import queue
+import threading
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django_email_learning.inbound.imap import connect, idle
+from django_email_learning.inbound.listener import MailboxListener, MailboxListeners
+from django_email_learning.management.commands.listen_for_mail import (
+    Command as ListenCommand,
+)
+from django_email_learning.models import ImapConnection
+
+
+def test_idle_returns_when_new_mail_arrives(imap_server, imap_identity):
+    client = connect(imap_identity, timeout=5)
+    threading.Timer(0.1, imap_server.state.deliver, [b"Subject: hi\r\n\r\n1"]).start()
+
+    assert idle(client, timeout=5, stop=threading.Event())
+
+    assert client.noop()[0] == "OK"
+    client.logout()
+
+
+def test_idle_times_out_without_new_mail(imap_server, imap_identity):
+    client = connect(imap_identity, timeout=5)
+    assert not idle(client, timeout=0.2, stop=threading.Event(), check_interval=0.05)
+    client.logout()
+
+
+@pytest.fixture()
+def listen(settings, imap_identity):
+    settings.DJANGO_EMAIL_LEARNING = {
+        "IMAP_RECONNECT_BASE_DELAY": 0.05,
+        "IMAP_TIMEOUT": 5,
+    }
+    notifications: queue.Queue[int] = queue.Queue()
+
+    def notify(imap_connection_id, client):  # type: ignore[no-untyped-def]
+        notifications.put(imap_connection_id)
+
+    stop = threading.Event()
+    listeners = []
+
+    def start(**kwargs) -> MailboxListener:  # type: ignore[no-untyped-def]
+        listener = MailboxListener(
+            7,
+            kwargs.pop("identity", imap_identity),
+            notify,
+            stop,
+            idle_timeout=kwargs.pop("idle_timeout", 5),
+            poll_interval=kwargs.pop("poll_interval", 0.05),
+        )
+        listener.start()
+        listeners.append(listener)
+        return listener
+
+    yield start, notifications
+    stop.set()
+    for listener in listeners:
+        listener.join(5)
+        assert not listener.is_alive()
+
+
+@pytest.mark.parametrize("supports_idle", [True, False])
+def test_listener_notifies_new_mail(listen, imap_server, supports_idle):
+    imap_server.state.idle = supports_idle
+    start, notifications = listen
+    start()
+
+    # Mail that arrived before the listener connected is handled first.
+    assert notifications.get(timeout=5) == 7
+    imap_server.state.deliver(b"Subject: answer\r\n\r\n1,3")
+    assert notifications.get(timeout=5) == 7
+
+
+def test_listener_reconnects_after_connection_loss(listen, imap_server):
+    start, notifications = listen
+    listener = start()
+    assert notifications.get(timeout=5) == 7
+
+    imap_server.state.drop_connections()
+
+    assert notifications.get(timeout=5) == 7
+    assert listener.connections == 2
+    assert imap_server.state.logins == 2
+
+
+def test_listener_retries_failed_logins(listen, imap_server, imap_identity):
+    imap_server.state.mailbox().password = "changed"
+    start, notifications = listen
+    start()
+
+    with pytest.raises(queue.Empty):
+        notifications.get(timeout=0.3)
+    imap_server.state.mailbox().password = "secret"
+    assert notifications.get(timeout=5) == 7
+
+
+@pytest.fixture()
+def listeners(settings, db, imap_server):
+    settings.DJANGO_EMAIL_LEARNING = {"IMAP_TIMEOUT": 5}
+    notifications: queue.Queue[int] = queue.Queue()
+
+    def notify(imap_connection_id, client):  # type: ignore[no-untyped-def]
+        notifications.put(imap_connection_id)
+
+    listeners = MailboxListeners(notify, idle_timeout=5, poll_interval=0.05)
+    yield listeners, notifications
+    listeners.stop()
+
+
+def add_connection(imap_server, email: str) -> ImapConnection:
+    imap_server.state.add_account(email)
+    connection = ImapConnection(
+        server="127.0.0.1",
+        port=imap_server.port,
+        email=email,
+        password="secret",
+        organization_id=1,
+        allow_plaintext=True,
+    )
+    connection.save()
+    return connection
+
+
+def test_connections_that_cannot_be_read_are_skipped(listeners, imap_server, caplog):
+    listeners, notifications = listeners
+    broken = add_connection(imap_server, "broken@example.com")
+    ImapConnection.objects.filter(pk=broken.pk).update(password="not-a-fernet-token")
+    working = add_connection(imap_server, "working@example.com")
+
+    listeners.update(ImapConnection.objects.all())
+
+    assert list(listeners.listeners) == [working.pk]
+    assert notifications.get(timeout=5) == working.pk
+    assert f"Reading the account of {broken} failed" in caplog.text
+
+
+def test_listeners_follow_changed_connections(listeners, imap_server):
+    listeners, notifications = listeners
+    edited = add_connection(imap_server, "edited@example.com")
+    deleted = add_connection(imap_server, "deleted@example.com")
+    listeners.update(ImapConnection.objects.all())
+    assert {notifications.get(timeout=5) for _ in range(2)} == {edited.pk, deleted.pk}
+    deleted_listener = listeners.listeners[deleted.pk]
+
+    imap_server.state.mailbox("edited@example.com").password = "changed"
+    edited.password = "changed"
+    edited.save()
+    deleted.delete()
+    added = add_connection(imap_server, "added@example.com")
+    listeners.update(ImapConnection.objects.all())
+
+    assert {notifications.get(timeout=5) for _ in range(2)} == {edited.pk, added.pk}
+    assert set(listeners.listeners) == {edited.pk, added.pk}
+    assert listeners.listeners[edited.pk].identity.password == "changed"
+    deleted_listener.join(5)
+    assert not deleted_listener.is_alive()
+
+
+def test_command_listens_to_every_connection(db, imap_server):
+    ImapConnection(
+        server="127.0.0.1",
+        port=imap_server.port,
+        email="course@example.com",
+        password="secret",
+        organization_id=1,
+        allow_plaintext=True,
+    ).save()
+    command = ListenCommand()
+    command.stop.set()
+    out = StringIO()
+
+    call_command(command, stdout=out)
+
+    assert "Listening to 1 mailboxes." in out.getvalue()
+    assert "Stopped listening." in out.getvalue()
+
+
+def test_command_reads_connections_again(settings, db, imap_server, monkeypatch):
+    settings.DJANGO_EMAIL_LEARNING = {"IMAP_CONNECTIONS_REFRESH_INTERVAL": 0}
+    updates = []
+    update = MailboxListeners.update
+
+    def record_update(listeners, connections):  # type: ignore[no-untyped-def]
+        updates.append(list(connections))
+        update(listeners, updates[-1])
+
+    monkeypatch.setattr(MailboxListeners, "update", record_update)
+    command = ListenCommand()
+    threading.Timer(1.5, command.stop.set).start()
+
+    call_command(command, stdout=StringIO())
+
+    assert len(updates) >= 2
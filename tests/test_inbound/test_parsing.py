@@ -0,0 +1,98 @@
+import base64
+import io
+import re
+from email.message import EmailMessage
+
+from django_email_learning.inbound.fetch import parse_fetch_response
+from django_email_learning.inbound.parsing import ParsedReply, ReplyScanner, parse_reply
+
+
+def split(message: EmailMessage | bytes) -> tuple[bytes, bytes]:
+    raw = message if isinstance(message, bytes) else message.as_bytes()
+    header, separator, body = re.sub(rb"\r?\n", b"\r\n", raw).partition(b"\r\n\r\n")
+    return header + separator, body
+
+
+def parse(message: EmailMessage | bytes, uid: int = 1) -> ParsedReply:
+    header, body = split(message)
+    return parse_reply(uid, header, io.BytesIO(body))
+
+
+def reply(body: str, subject: str = "Re: [python-101] Quiz 1") -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "Learner <Learner@Example.com>"
+    message["Subject"] = subject
+    message.set_content(body)
+    return message
+
+
+def test_plain_reply_is_parsed():
+    assert parse(reply("\n1, 3\n\nThanks!\n")) == ParsedReply(
+        1, "learner@example.com", "python-101", ("1", "3"), "Re: [python-101] Quiz 1"
+    )
+
+
+def test_quoted_history_is_ignored():
+    body = "> 1. Two plus two?\n>    1) Three\n"
+    assert parse(reply(body)).tokens == ()
+    body = "On Mon, 1 Jan 2024, Course <course@example.com> wrote:\n> 1,3\n"
+    assert parse(reply(body)).tokens == ()
+
+
+def test_encoded_subject_and_body_are_decoded():
+    message = reply("réponse 2 ; 4\n", subject="=?utf-8?q?Re=3A_=5Bfran=C3=A7ais=5D?=")
+    message.set_content("réponse 2 ; 4\n", cte="quoted-printable")
+    parsed = parse(message)
+    assert parsed.slug == ""
+    assert parsed.tokens == ("réponse", "2", "4")
+
+    message = reply("x", subject="Re: [python-101] Quiz")
+    message.set_content("enroll python-101\n", cte="base64")
+    assert parse(message).tokens == ("enroll", "python-101")
+
+
+def test_first_text_part_of_multipart_replies_is_used():
+    message = reply("stop python-101\n")
+    message.add_alternative("<p>stop python-101</p>", subtype="html")
+    message.add_attachment(b"\0" * 1000, maintype="application", subtype="pdf")
+    assert parse(message).tokens == ("stop", "python-101")
+
+
+def test_text_attachments_are_not_answers():
+    message = reply("")
+    message.add_attachment("1,2,3", filename="answers.txt")
+    assert parse(message).tokens == ()
+
+
+def test_scanning_stops_after_the_answer_line():
+    header, body = split(reply("1,3\n" + "> quoted line\n" * 10_000))
+    lines = iter(io.BytesIO(body))
+    scanner = ReplyScanner(1, header)
+
+    for line in lines:
+        if scanner.feed_line(line):
+            break
+
+    assert scanner.result().tokens == ("1", "3")
+    assert sum(1 for _ in lines) > 9_000
+
+
+def test_truncated_body_is_parsed():
+    header, body = split(
+        b"From: a@example.com\r\nSubject: [c] q\r\n"
+        b"Content-Type: text/plain\r\nContent-Transfer-Encoding: base64\r\n\r\n"
+        + base64.encodebytes(b"2,4,5")
+    )
+    assert parse_reply(1, header, io.BytesIO(body[:4])).tokens == ("2", "4")
+
+
+def test_fetch_response_items_are_collected_per_message():
+    data = [
+        (b"1 (UID 7 BODY[HEADER] {9}", b"Subject: "),
+        (b" BODY[TEXT]<0> {3}", b"1,3"),
+        b")",
+        (b"2 (BODY[TEXT]<0> {1}", b"2"),
+        (b" BODY[HEADER] {4}", b"X: y"),
+        b" UID 9)",
+    ]
+    assert parse_fetch_response(data) == [(7, b"Subject: ", b"1,3"), (9, b"X: y", b"2")]
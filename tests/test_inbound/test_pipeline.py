@@ -0,0 +1,93 @@
+import pytest
+from django_email_learning.inbound.parsing import ParsedReply
+from django_email_learning.inbound.pipeline import (
+    ParsingStage,
+    ReplyPipeline,
+    store_replies,
+)
+from django_email_learning.models import ImapConnection, InboundReply, MailboxCheckpoint
+
+
+def fetched(count: int) -> list[tuple[int, bytes, bytes]]:
+    return [
+        (
+            uid,
+            f"From: learner{uid}@example.com\r\nSubject: Re: [course] Quiz\r\n\r\n".encode(),
+            f"{uid},{uid + 1}\r\n> quoted\r\n".encode(),
+        )
+        for uid in range(1, count + 1)
+    ]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_stage_parses_in_order(workers):
+    with ParsingStage(workers=workers, chunk_size=3) as stage:
+        replies = stage.parse(fetched(10))
+
+    assert replies[0] == ParsedReply(
+        1, "learner1@example.com", "course", ("1", "2"), "Re: [course] Quiz"
+    )
+    assert [reply.uid for reply in replies] == list(range(1, 11))
+    assert all(isinstance(reply, ParsedReply) for reply in replies)
+
+
+def test_fetched_batches_are_split_between_workers():
+    with ParsingStage(workers=2) as stage:
+        chunks = list(stage._chunks(fetched(100)))
+        assert [len(chunk) for chunk in chunks] == [50, 50]
+        assert [reply.uid for reply in stage.parse(fetched(100))] == list(range(1, 101))
+    with ParsingStage(workers=2, chunk_size=30) as stage:
+        assert [len(chunk) for chunk in stage._chunks(fetched(100))] == [
+            30,
+            30,
+            30,
+            10,
+        ]
+
+
+@pytest.fixture()
+def checkpoint(db) -> MailboxCheckpoint:
+    connection = ImapConnection(
+        server="imap.example.com",
+        email="course@example.com",
+        password="secret",
+        organization_id=1,
+    )
+    connection.save()
+    return MailboxCheckpoint.objects.create(
+        imap_connection=connection, uidvalidity=5, last_uid=0
+    )
+
+
+def test_replies_are_stored_with_one_insert(checkpoint, django_assert_num_queries):
+    with ParsingStage(workers=0) as stage:
+        replies = stage.parse(fetched(20))
+    with django_assert_num_queries(1):
+        store_replies(checkpoint, replies)
+
+    assert InboundReply.objects.count() == 20
+    reply = InboundReply.objects.get(uid=3)
+    assert (reply.uidvalidity, reply.sender, reply.slug, reply.tokens) == (
+        5,
+        "learner3@example.com",
+        "course",
+        "3 4",
+    )
+
+
+def test_pipeline_stores_and_dispatches_replies(checkpoint):
+    with ParsingStage(workers=0) as stage:
+        ReplyPipeline(stage)(checkpoint, fetched(3))
+
+    assert set(InboundReply.objects.values_list("status", flat=True)) == {"ignored"}
+
+
+def test_replies_synced_again_are_not_duplicated(checkpoint):
+    replies = [ParsedReply(1, "a@example.com", "course", ("1",))]
+    store_replies(checkpoint, replies)
+    store_replies(checkpoint, replies)
+    assert InboundReply.objects.count() == 1
+
+    checkpoint.uidvalidity = 6
+    store_replies(checkpoint, replies)
+    assert InboundReply.objects.count() == 2
@@ -0,0 +1,314 @@
+import pytest
+from django.core.cache import cache
+from django_email_learning.grading import grade_submissions
+from django_email_learning.inbound import router
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django_email_learning.inbound.router import (
+    Command,
+    get_course_slugs,
+    parse_command,
+    process_replies,
+)
+from django_email_learning.models import (
+    Answer,
+    Course,
+    Enrollment,
+    ImapConnection,
+    InboundReply,
+    Lesson,
+    CourseContent,
+    Organization,
+    Question,
+    Quiz,
+    QuizSubmission,
+)
+
+SENDER = "learner@example.com"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture()
+def imap_connection(db) -> ImapConnection:
+    connection = ImapConnection(
+        server="imap.example.com",
+        email="course@example.com",
+        password="secret",
+        organization_id=1,
+    )
+    connection.save()
+    return connection
+
+
+@pytest.fixture()
+def course(db) -> Course:
+    course = Course(title="Python", slug="python-101", organization_id=1, enabled=True)
+    course.save()
+    lesson = Lesson.objects.create(title="Hello", content="Hi", is_published=True)
+    CourseContent.objects.create(
+        course=course, priority=1, type="lesson", lesson=lesson, waiting_period=0
+    )
+    return course
+
+
+@pytest.fixture()
+def quiz(db) -> Quiz:
+    quiz = Quiz.objects.create(title="Quiz", required_score=50)
+    for priority, correct in enumerate([(1,), (0, 2)]):
+        question = Question.objects.create(quiz=quiz, text="?", priority=priority)
+        Answer.objects.bulk_create(
+            Answer(question=question, text=str(i), is_correct=i in correct)
+            for i in range(3)
+        )
+    quiz.is_published = True
+    quiz.save()
+    return quiz
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("enroll python-101", Command("enroll", SENDER, course_id=-1)),
+        ("Re: STOP [Python-101]", Command("stop", SENDER, course_id=-1)),
+        (
+            "answer 12 2 1+3",
+            Command("answer", SENDER, quiz_id=12, answers=((2,), (1, 3))),
+        ),
+        (
+            "answer 12 2,1+3",
+            Command("answer", SENDER, quiz_id=12, answers=((2,), (1, 3))),
+        ),
+        ("enroll unknown-course", None),
+        ("Re: [python-101] Quiz", None),
+        ("answer python-101 1", None),
+        ("", None),
+    ],
+)
+def test_commands_are_parsed(course, text, expected):
+    if expected is not None and expected.course_id:
+        expected = expected._replace(course_id=course.pk)
+    assert parse_command(1, SENDER, text) == expected
+
+
+def test_slug_map_is_cached_until_a_course_changes(course, django_assert_num_queries):
+    get_course_slugs(1)
+    with django_assert_num_queries(0):
+        for _ in range(100):
+            assert parse_command(1, SENDER, "stop python-101") is not None
+    # Unknown slugs are looked up, they may belong to a course that is newer
+    # than the map.
+    with django_assert_num_queries(1):
+        assert parse_command(1, SENDER, "stop go-101") is None
+
+    other = Course(title="Go", slug="go-101", organization_id=1)
+    other.save()
+    assert parse_command(1, SENDER, "stop go-101") == Command(
+        "stop", SENDER, course_id=other.pk
+    )
+    assert other.pk not in get_course_slugs(1).enabled
+
+    other.delete()
+    assert parse_command(1, SENDER, "stop go-101") is None
+
+
+def test_courses_changed_by_other_processes_are_routed(imap_connection, course):
+    get_course_slugs(1)
+    # Other processes change courses without bumping the version in the
+    # cache of this process.
+    other = Course.objects.bulk_create(
+        [Course(title="Go", slug="go-101", organization_id=1, enabled=False)]
+    )[0]
+
+    assert parse_command(1, SENDER, "enroll Go-101") == Command(
+        "enroll", SENDER, course_id=other.pk
+    )
+    Course.objects.filter(pk=other.pk).update(enabled=True)
+    make_reply(imap_connection, 1, tokens="enroll go-101")
+    assert process_replies(imap_connection.pk) == 1
+    assert Enrollment.objects.filter(course=other, email=SENDER).exists()
+
+
+def test_slug_maps_expire(settings, course):
+    settings.DJANGO_EMAIL_LEARNING = {"COURSE_SLUGS_TTL": 0}
+    get_course_slugs(1)
+    Course.objects.filter(pk=course.pk).update(enabled=False)
+    assert course.pk not in get_course_slugs(1).enabled
+
+
+def make_reply(imap_connection, uid, tokens="", subject="") -> InboundReply:
+    return InboundReply.objects.create(
+        imap_connection=imap_connection,
+        uidvalidity=1,
+        uid=uid,
+        sender=SENDER,
+        tokens=tokens,
+        subject=subject,
+    )
+
+
+def test_replies_are_dispatched(imap_connection, course, quiz):
+    enroll = make_reply(imap_connection, 1, subject="enroll python-101")
+    again = make_reply(imap_connection, 2, tokens="enroll python-101")
+    answer = make_reply(imap_connection, 3, tokens=f"answer {quiz.pk} 2 1+3")
+    chatter = make_reply(imap_connection, 4, tokens="thanks for the course!")
+
+    assert process_replies(imap_connection.pk, batch_size=2) == 1
+
+    statuses = dict(InboundReply.objects.values_list("pk", "status"))
+    assert statuses == {
+        enroll.pk: "processed",
+        again.pk: "ignored",
+        # The enrollment doesn't wait for the answer to the quiz.
+        answer.pk: "ignored",
+        chatter.pk: "ignored",
+    }
+    assert not QuizSubmission.objects.exists()
+    enrollment = Enrollment.objects.get(course=course, email=SENDER)
+    assert enrollment.status == "active"
+
+    make_reply(imap_connection, 6, tokens="stop python-101")
+    make_reply(imap_connection, 7, tokens="enroll python-101")
+    process_replies(imap_connection.pk)
+    enrollment.refresh_from_db()
+    assert enrollment.status == "active"
+    assert InboundReply.objects.filter(status="processed").count() == 3
+
+
+@pytest.fixture()
+def waiting_for(course, quiz):
+    """Enroll a learner in a course that waits for the answer to ``quiz``."""
+    quiz_content = CourseContent.objects.create(
+        course=course, priority=2, type="quiz", quiz=quiz, waiting_period=0
+    )
+    lesson = Lesson.objects.create(title="Bye", content="Bye", is_published=True)
+    last = CourseContent.objects.create(
+        course=course, priority=3, type="lesson", lesson=lesson, waiting_period=60
+    )
+
+    def _waiting_for(email: str, course: Course = course) -> Enrollment:
+        return Enrollment.objects.create(
+            course=course,
+            email=email,
+            next_content=quiz_content,
+            next_due_at=None,
+        )
+
+    _waiting_for.last = last  # type: ignore[attr-defined]
+    return _waiting_for
+
+
+def test_answers_are_graded_and_stored(imap_connection, quiz, waiting_for):
+    enrollment = waiting_for(SENDER)
+    other = waiting_for("other@example.com")
+    failed = make_reply(imap_connection, 1, tokens=f"answer {quiz.pk} 1 1+3")
+    passed = make_reply(imap_connection, 2, tokens=f"answer {quiz.pk} 2 1+3")
+    invalid = make_reply(imap_connection, 3, tokens=f"answer {quiz.pk} 2 4")
+    InboundReply.objects.filter(pk=passed.pk).update(sender="other@example.com")
+
+    assert process_replies(imap_connection.pk) == 2
+
+    statuses = dict(InboundReply.objects.values_list("pk", "status"))
+    assert statuses == {
+        failed.pk: "processed",
+        passed.pk: "processed",
+        invalid.pk: "ignored",
+    }
+    submissions = {s.reply_id: s for s in QuizSubmission.objects.all()}
+    assert set(submissions) == {failed.pk, passed.pk}
+    assert submissions[failed.pk].enrollment == enrollment
+    assert submissions[failed.pk].selections == "1,5"
+    assert (submissions[failed.pk].score, submissions[failed.pk].passed) == (50, True)
+    assert submissions[passed.pk].enrollment == other
+    assert submissions[passed.pk].selections == "2,5"
+    assert (submissions[passed.pk].score, submissions[passed.pk].passed) == (100, True)
+
+    for learner in (enrollment, other):
+        learner.refresh_from_db()
+        assert learner.next_content == waiting_for.last
+        assert learner.next_due_at is not None
+
+
+def test_failed_answers_keep_the_enrollment_waiting(imap_connection, quiz, waiting_for):
+    enrollment = waiting_for(SENDER)
+    make_reply(imap_connection, 1, tokens=f"answer {quiz.pk} 1 1")
+
+    assert process_replies(imap_connection.pk) == 1
+
+    submission = QuizSubmission.objects.get()
+    assert (submission.score, submission.passed) == (0, False)
+    enrollment.refresh_from_db()
+    assert enrollment.next_content.quiz == quiz
+    assert enrollment.next_due_at is None
+
+    make_reply(imap_connection, 2, tokens=f"answer {quiz.pk} 2 1+3")
+    assert process_replies(imap_connection.pk) == 1
+    enrollment.refresh_from_db()
+    assert enrollment.next_content == waiting_for.last
+
+
+def test_answers_only_count_in_the_organization_of_the_connection(
+    imap_connection, quiz, waiting_for
+):
+    organization = Organization.objects.create(name="Other")
+    course = Course(
+        title="Other", slug="other", organization=organization, enabled=True
+    )
+    course.save()
+    enrollment = waiting_for(SENDER, course=course)
+    make_reply(imap_connection, 1, tokens=f"answer {quiz.pk} 2 1+3")
+
+    assert process_replies(imap_connection.pk) == 0
+
+    assert not QuizSubmission.objects.exists()
+    enrollment.refresh_from_db()
+    assert enrollment.next_due_at is None
+
+
+def test_answers_are_graded_in_one_batch_per_quiz(
+    imap_connection, quiz, waiting_for, monkeypatch
+):
+    batches = []
+
+    def grade(answer_key, submissions):
+        batches.append(len(submissions))
+        return grade_submissions(answer_key, submissions)
+
+    monkeypatch.setattr(router, "grade_submissions", grade)
+    for uid in range(10):
+        waiting_for(f"learner{uid}@example.com")
+        reply = make_reply(imap_connection, uid, tokens=f"answer {quiz.pk} 2 1+3")
+        InboundReply.objects.filter(pk=reply.pk).update(
+            sender=f"learner{uid}@example.com"
+        )
+
+    assert process_replies(imap_connection.pk) == 10
+    assert batches == [10]
+    assert QuizSubmission.objects.filter(passed=True).count() == 10
+
+
+def test_disabled_courses_can_not_be_enrolled(imap_connection, course):
+    course.enabled = False
+    course.save()
+    make_reply(imap_connection, 1, tokens="enroll python-101")
+    assert process_replies(imap_connection.pk) == 0
+    assert not Enrollment.objects.exists()
+
+
+def test_dispatching_does_not_look_up_courses(imap_connection, course):
+    for uid in range(20):
+        make_reply(imap_connection, uid, tokens="stop python-101")
+    get_course_slugs(1)
+
+    with CaptureQueriesContext(connection) as captured:
+        process_replies(imap_connection.pk)
+
+    course_table = Course._meta.db_table
+    assert not any(
+        f'"{course_table}"' in query["sql"] for query in captured.captured_queries
+    )
@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django_email_learning.models import BlockedEmail, Course, ImapConnection
+
+
+def test_new_instance_reports_all_fields_as_changed():
+    course = Course(title="Title", slug="slug", organization_id=1)
+    assert {"title", "slug", "enabled", "organization"} <= course.changed_fields
+
+
+def test_loaded_instance_has_no_changed_fields(course):
+    loaded = Course.objects.get(pk=course.pk)
+    assert loaded.changed_fields == set()
+    loaded.title = "New Title"
+    loaded.imap_connection = None
+    assert loaded.changed_fields == {"title", "imap_connection"}
+
+
+def test_saving_unchanged_instance_runs_no_query(course):
+    loaded = Course.objects.get(pk=course.pk)
+    with CaptureQueriesContext(connection) as queries:
+        loaded.save()
+    assert len(queries) == 0
+
+
+def test_update_only_writes_changed_fields(course):
+    loaded = Course.objects.get(pk=course.pk)
+    loaded.title = "New Title"
+    with CaptureQueriesContext(connection) as queries:
+        loaded.save()
+    assert len(queries) == 1
+    update = queries[0]["sql"]
+    assert '"title"' in update
+    assert '"slug"' not in update
+    assert '"description"' not in update
+    assert loaded.changed_fields == set()
+    assert Course.objects.get(pk=course.pk).title == "New Title"
+
+
+def test_password_is_not_encrypted_again_when_unchanged(imap_connection):
+    loaded = ImapConnection.objects.get(pk=imap_connection.pk)
+    loaded.port = 143
+    loaded.save()
+    loaded = ImapConnection.objects.get(pk=imap_connection.pk)
+    assert loaded.decrypt_password(loaded.password) == "my_secret_password"
+
+
+def test_changed_password_is_encrypted(imap_connection):
+    loaded = ImapConnection.objects.get(pk=imap_connection.pk)
+    loaded.password = "a_new_password"
+    loaded.save()
+    loaded = ImapConnection.objects.get(pk=imap_connection.pk)
+    assert loaded.decrypt_password(loaded.password) == "a_new_password"
+
+
+def test_unchanged_unique_email_is_not_validated_again(imap_connection):
+    loaded = ImapConnection.objects.get(pk=imap_connection.pk)
+    loaded.port = 143
+    with CaptureQueriesContext(connection) as queries:
+        loaded.save()
+    assert len(queries) == 1
+    assert queries[0]["sql"].startswith("UPDATE")
+
+
+def test_deferred_fields_are_tracked_after_loading(imap_connection):
+    loaded = ImapConnection.objects.only("pk").get(pk=imap_connection.pk)
+    assert loaded.server == "imap.example.com"
+    assert loaded.changed_fields == set()
+
+
+def test_blocked_email_is_lowercased_when_changed(blocked_email):
+    loaded = BlockedEmail.objects.get(pk=blocked_email.pk)
+    loaded.email = "ANOTHER@EMAIL.COM"
+    loaded.save()
+    assert BlockedEmail.objects.get(pk=blocked_email.pk).email == "another@email.com"
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+from django_email_learning.models import CourseContent, Enrollment, Lesson
+
+
+@pytest.fixture()
+def contents(course) -> list[CourseContent]:
+    contents = []
+    for priority, waiting_period in [(1, 60), (2, 3600), (3, 0)]:
+        lesson = Lesson.objects.create(
+            title=f"Lesson {priority}", content="Content", is_published=True
+        )
+        contents.append(
+            CourseContent.objects.create(
+                course=course,
+                priority=priority,
+                type="lesson",
+                lesson=lesson,
+                waiting_period=waiting_period,
+            )
+        )
+    return contents
+
+
+def test_enroll_schedules_first_content(course, contents):
+    now = timezone.now()
+    enrollment = Enrollment.objects.enroll(course, "Learner@Example.com", now=now)
+    assert enrollment.email == "learner@example.com"
+    assert enrollment.status == "active"
+    assert enrollment.next_content == contents[0]
+    assert enrollment.next_due_at == now + timedelta(seconds=60)
+
+
+def test_enroll_in_course_without_content(course):
+    enrollment = Enrollment.objects.enroll(course, "learner@example.com")
+    assert enrollment.status == "completed"
+    assert enrollment.next_due_at is None
+
+
+def test_advance_computes_next_due_at_from_send_time(course, contents):
+    enrollment = Enrollment.objects.enroll(course, "learner@example.com")
+    sent_at = timezone.now()
+    enrollment.advance(sent_at)
+    assert enrollment.next_content == contents[1]
+    assert enrollment.last_sent_at == sent_at
+    assert enrollment.next_due_at == sent_at + timedelta(seconds=3600)
+    assert enrollment.status == "active"
+
+
+def test_advance_past_last_content_completes_enrollment(course, contents):
+    enrollment = Enrollment.objects.enroll(course, "learner@example.com")
+    for _ in contents:
+        enrollment.advance(timezone.now())
+    assert enrollment.next_content is None
+    assert enrollment.next_due_at is None
+    assert enrollment.status == "completed"
+
+
+def test_advancing_many_enrollments_is_a_single_update(
+    course, contents, django_assert_num_queries
+):
+    for i in range(20):
+        enrollment = Enrollment.objects.enroll(course, f"learner{i}@example.com")
+        if i % 2:
+            enrollment.advance(timezone.now())
+
+    sent_at = timezone.now()
+    with django_assert_num_queries(1):
+        assert Enrollment.objects.all().advance(sent_at) == 20
+
+    assert Enrollment.objects.filter(next_content=contents[1]).count() == 10
+    assert Enrollment.objects.filter(next_content=contents[2]).count() == 10
+    assert not Enrollment.objects.exclude(last_sent_at=sent_at).exists()
+
+
+def test_advance_follows_every_step_of_the_course(
+    course, contents, django_assert_num_queries
+):
+    steps = [
+        Enrollment.objects.enroll(course, f"learner{i}@example.com") for i in range(4)
+    ]
+    for step, enrollment in enumerate(steps):
+        for _ in range(step):
+            enrollment.advance(timezone.now())
+
+    sent_at = timezone.now()
+    with django_assert_num_queries(1) as captured:
+        Enrollment.objects.all().advance(sent_at)
+
+    # On SQLite and PostgreSQL every assignment sees the row before the
+    # UPDATE, on MySQL only the assignments left of next_content do.
+    sql = captured.captured_queries[0]["sql"]
+    assert (
+        sql.index('SET "next_due_at" =')
+        < sql.index(', "status" =')
+        < sql.index(', "next_content_id" =')
+    )
+    # Each enrollment moves to the content after the one it was at, due after
+    # the waiting period of that content, whatever order the database
+    # evaluates the assignments in.
+    expected = [
+        (contents[1].pk, sent_at + timedelta(seconds=3600), "active"),
+        (contents[2].pk, sent_at, "active"),
+        (None, None, "completed"),
+        (None, None, "completed"),
+    ]
+    for enrollment, (next_content_id, next_due_at, status) in zip(steps, expected):
+        enrollment.refresh_from_db()
+        assert enrollment.next_content_id == next_content_id
+        assert enrollment.next_due_at == next_due_at
+        assert enrollment.status == status
+        assert enrollment.last_sent_at == sent_at
+
+
+def test_due_lookup_index_is_defined():
+    indexes = [index.fields for index in Enrollment._meta.indexes]
+    assert ["next_due_at", "status"] in indexes
@@ -1,4 +1,7 @@
+from django.conf import settings
+from django.test import override_settings
 from django_email_learning.models import ImapConnection
+from cryptography.fernet import InvalidToken
 import pytest
 
 
@@ -39,3 +42,26 @@ def test_imap_invalid_server_validation(invalid_server, imap_connection):
 def test_imap_valid_server_validation(valid_server, imap_connection):
     imap_connection.server = valid_server
     imap_connection.full_clean()  # Should not raise
+
+
+def test_derived_key_is_cached_per_secret():
+    from django_email_learning import models
+
+    models._derived_fernets.pop("cache-test-secret", None)
+    first = models.derive_fernet("cache-test-secret")
+    second = models.derive_fernet("cache-test-secret")
+    assert first is second
+    assert models.derive_fernet("another-secret") is not first
+
+
+def test_password_encrypted_with_fallback_key_can_be_decrypted(imap_connection):
+    with override_settings(SECRET_KEY="new-secret-key", SECRET_KEY_FALLBACKS=[]):
+        with pytest.raises(InvalidToken):
+            imap_connection.decrypt_password(imap_connection.password)
+
+    old_secret_key = settings.SECRET_KEY
+    with override_settings(
+        SECRET_KEY="new-secret-key", SECRET_KEY_FALLBACKS=[old_secret_key]
+    ):
+        decrypted_password = imap_connection.decrypt_password(imap_connection.password)
+    assert decrypted_password == "my_secret_password"
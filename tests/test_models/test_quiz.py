@@ -0,0 +1,68 @@
+import pytest
+from django.forms import ValidationError
+from django_email_learning.models import Answer, Question, Quiz
+
+
+def add_question(quiz: Quiz, priority: int, answers: list[bool]) -> Question:
+    question = Question.objects.create(
+        quiz=quiz, text=f"Question {priority}", priority=priority
+    )
+    Answer.objects.bulk_create(
+        Answer(question=question, text=f"Answer {i}", is_correct=is_correct)
+        for i, is_correct in enumerate(answers)
+    )
+    return question
+
+
+def test_quiz_without_questions_can_not_be_published(quiz):
+    quiz.is_published = True
+    with pytest.raises(ValidationError) as exc_info:
+        quiz.save()
+    assert "At least one question is required." in str(exc_info.value)
+
+
+def test_quiz_can_not_be_published_the_first_time(db):
+    quiz = Quiz(title="Published Quiz", required_score=50, is_published=True)
+    with pytest.raises(ValidationError) as exc_info:
+        quiz.save()
+    assert "Quiz can not be saved as published the first time." in str(exc_info.value)
+
+
+@pytest.mark.parametrize(
+    "answers,message",
+    [
+        ([False, False], "At least one correct answer is required."),
+        ([True], "At least two answers are required."),
+    ],
+)
+def test_quiz_with_invalid_question_can_not_be_published(quiz, answers, message):
+    add_question(quiz, 1, [True, False])
+    add_question(quiz, 2, answers)
+    quiz.is_published = True
+    with pytest.raises(ValueError) as exc_info:
+        quiz.save()
+    assert str(exc_info.value) == message
+
+
+def test_quiz_with_valid_questions_can_be_published(quiz):
+    add_question(quiz, 1, [True, False])
+    add_question(quiz, 2, [True, True, False])
+    quiz.is_published = True
+    quiz.save()
+    assert Quiz.objects.get(pk=quiz.pk).is_published
+
+
+@pytest.mark.parametrize("question_count", [1, 5, 25])
+def test_validate_questions_runs_a_single_query(
+    quiz, question_count, django_assert_num_queries
+):
+    for priority in range(question_count):
+        add_question(quiz, priority, [True, False, False])
+    with django_assert_num_queries(1):
+        quiz.validate_questions()
+
+
+def test_validate_answers_runs_a_single_query(quiz, django_assert_num_queries):
+    question = add_question(quiz, 1, [False, True])
+    with django_assert_num_queries(1):
+        question.validate_answers()